@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Pages through a list by the primary key of its last row instead of an offset, so every page costs the same
+    however deep into the list it is, and rows added while paging are neither skipped nor repeated.
+    """
+    ordering = 'pk'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
@@ -8,6 +8,9 @@ from inventory.models.equipment import Equipment, Condition
 from inventory.models.material import Material, MaterialClass, MaterialCategory
 from inventory.models.brand import Brand
 from inventory.models.storage_location import StorageLocation
+from inventory.models.stock_holder import StockHolder
+from inventory.models.transfer import Transfer
+from inventory.models.vehicle import Vehicle
 
 User = get_user_model()
 
@@ -39,7 +42,7 @@ class CustomerLocationSerializer(serializers.HyperlinkedModelSerializer):
 
 class CustomerSerializer(serializers.HyperlinkedModelSerializer):
     service_locations = LocationSerializer(many=True)
-    billing_location = LocationSerializer()
+    billing_location = LocationSerializer(source='billinglocation', required=False, allow_null=True)
 
     @staticmethod
     def get_location_contacts(location, customer) -> list:
@@ -69,7 +72,7 @@ class CustomerSerializer(serializers.HyperlinkedModelSerializer):
         # TODO Implement the related serializers and fix email / phone contact information
 
         service_locations = validated_data.pop('service_locations') if 'service_locations' in validated_data else []
-        billing_location = validated_data.pop('billing_location') if 'billing_location' in validated_data else None
+        billing_location = validated_data.pop('billinglocation') if 'billinglocation' in validated_data else None
 
         service_location_objects = []
         for service_location in service_locations:
@@ -129,15 +132,15 @@ class MaterialSerializer(serializers.HyperlinkedModelSerializer):
 
     class Meta:
         model = Material
-        fields = ['id', 'url', 'name', 'brand', 'status', ]
+        fields = ['id', 'url', 'name', 'brand', ]
 
 
 class StockLocationSerializer(serializers.HyperlinkedModelSerializer):
-    location = LocationSerializer()
+    location = LocationSerializer(source='address')
 
     class Meta:
         model = StorageLocation
-        fields = ['id', 'url', 'name', 'status', 'location']
+        fields = ['id', 'url', 'name', 'location']
 
 
 class ConditionSerializer(serializers.HyperlinkedModelSerializer):
@@ -154,4 +157,49 @@ class EquipmentSerializer(serializers.HyperlinkedModelSerializer):
 
     class Meta:
         model = Equipment
-        fields = ['id', 'url', 'name', 'material', 'status', 'condition', 'storage_location', 'user', ]
\ No newline at end of file
+        fields = ['id', 'url', 'name', 'material', 'status', 'condition', 'storage_location', 'user', ]
+
+class VehicleSerializer(serializers.HyperlinkedModelSerializer):
+    asset_requirement_category = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta:
+        model = Vehicle
+        fields = ['id', 'url', 'name', 'vehicle_type', 'driver', 'vin_number', 'license_plate', 'make', 'model',
+                  'model_year', 'asset_requirement_category']
+
+
+class TransferSerializer(serializers.HyperlinkedModelSerializer):
+    source = serializers.PrimaryKeyRelatedField(queryset=StockHolder.objects.all())
+    destination = serializers.PrimaryKeyRelatedField(queryset=StockHolder.objects.all())
+
+    class Meta:
+        model = Transfer
+        fields = ['id', 'url', 'source', 'destination', 'release_agent', 'transfer_agent', 'status', 'start_date',
+                  'end_date', 'notes', 'created_at']
+        read_only_fields = ['status', 'start_date', 'end_date']
+
+
+class BulkTransferMaterialItemSerializer(serializers.Serializer):
+    material = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class BulkTransferEquipmentItemSerializer(serializers.Serializer):
+    equipment_item = serializers.IntegerField()
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class BulkTransferItemSerializer(serializers.Serializer):
+    """A transfer of the bulk payload. References are plain ids so the batch can be checked in bulk."""
+    source = serializers.IntegerField()
+    destination = serializers.IntegerField()
+    release_agent = serializers.IntegerField()
+    transfer_agent = serializers.IntegerField()
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+    materials = BulkTransferMaterialItemSerializer(many=True, required=False, default=list)
+    equipment_items = BulkTransferEquipmentItemSerializer(many=True, required=False, default=list)
+
+
+class BulkTransferSerializer(serializers.Serializer):
+    transfers = BulkTransferItemSerializer(many=True, allow_empty=False)
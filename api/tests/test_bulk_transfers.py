@@ -0,0 +1,69 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from inventory.models.transfer import Transfer, TransferAcceptance, TransferMaterialItem
+from inventory.models.vehicle import Vehicle
+from inventory.services.stock_ledger_service import StockLedgerService
+from inventory.tests.helpers import create_material, create_storage_location, create_user, create_vehicle
+
+
+class TestBulkTransfers(TestCase):
+    url = '/api/transfers/bulk/'
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.storage_location = create_storage_location()
+        self.vehicles = list(Vehicle.objects.select_related('stock_holder').filter(
+            pk__in=[create_vehicle(f'Vehicle {i}').pk for i in range(10)]))
+        self.materials = [create_material(f'Material {i}') for i in range(5)]
+        ledger = StockLedgerService(user=self.user)
+        for material in self.materials:
+            ledger.receive(material, 100, destination=self.storage_location)
+
+    def get_payload(self, vehicles, quantity=1):
+        return {'transfers': [{
+            'source': self.storage_location.stock_holder.pk, 'destination': vehicle.stock_holder.pk,
+            'release_agent': self.user.pk, 'transfer_agent': self.user.pk,
+            'materials': [{'material': material.pk, 'quantity': quantity} for material in self.materials],
+        } for vehicle in vehicles]}
+
+    def test_bulk_create(self):
+        response = self.client.post(self.url, self.get_payload(self.vehicles), format='json')
+        self.assertEqual(201, response.status_code)
+        self.assertEqual(10, Transfer.objects.count())
+        self.assertEqual(50, TransferMaterialItem.objects.count())
+        self.assertEqual(10, TransferAcceptance.objects.count())
+        self.assertEqual(5, len(response.data['transfers'][0]['materials']))
+        self.assertIsNotNone(response.data['transfers'][0]['materials'][0]['id'])
+
+    def test_bulk_create_changes_the_version_of_the_transfer_list(self):
+        etag = self.client.get('/api/transfers/').headers['ETag']
+        self.assertEqual(304, self.client.get('/api/transfers/', HTTP_IF_NONE_MATCH=etag).status_code)
+        self.client.post(self.url, self.get_payload(self.vehicles[:1]), format='json')
+        response = self.client.get('/api/transfers/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(1, len(response.data['results']))
+
+    def test_batch_stock_is_validated_as_a_whole(self):
+        response = self.client.post(self.url, self.get_payload(self.vehicles, quantity=11), format='json')
+        self.assertEqual(400, response.status_code)
+        self.assertTrue(all(line['errors'] for line in response.data['transfers'][0]['materials']))
+        self.assertFalse(Transfer.objects.exists())
+
+    def test_unknown_references_are_reported_per_line(self):
+        payload = self.get_payload(self.vehicles[:1])
+        payload['transfers'][0]['materials'].append({'material': 0, 'quantity': 1})
+        payload['transfers'][0]['destination'] = 0
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(1, len(response.data['transfers'][0]['errors']))
+        self.assertEqual(1, len(response.data['transfers'][0]['materials'][-1]['errors']))
+        self.assertFalse(response.data['transfers'][0]['materials'][0]['errors'])
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        with self.assertNumQueries(9):
+            self.client.post(self.url, self.get_payload(self.vehicles[:2]), format='json')
+        with self.assertNumQueries(9):
+            self.client.post(self.url, self.get_payload(self.vehicles), format='json')
@@ -0,0 +1,30 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from customers.models.customer import BillingLocation, Customer
+from inventory.tests.helpers import create_user
+from inventory.utils.fragment_cache import get_cache
+
+
+class TestConditionalGet(TestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(create_user())
+        self.customer = Customer.objects.create(customer_type=Customer.CustomerType.RESIDENTIAL, first_name='First',
+                                                last_name='Last')
+
+    def test_answers_unchanged_lists_and_objects_with_not_modified(self):
+        for url in ['/api/customers/', f'/api/customers/{self.customer.pk}/']:
+            with self.subTest(url=url):
+                etag = self.client.get(url).headers['ETag']
+                with self.assertNumQueries(0):
+                    self.assertEqual(304, self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code)
+                self.assertNotEqual(etag, self.client.get(url, {'page_size': 1}).headers['ETag'])
+
+                # The billing location is nested through a reverse relation
+                BillingLocation.objects.update_or_create(customer=self.customer, defaults={
+                    'name': url, 'street_address': '1 Street', 'city': 'City', 'state': 'State',
+                    'postal_code': '00000'})
+                self.assertEqual(200, self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code)
@@ -0,0 +1,53 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from customers.models.customer import BillingLocation, Customer, ServiceLocation
+from inventory.tests.helpers import create_material, create_storage_location, create_user
+
+
+class TestPagination(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(create_user())
+        for i in range(12):
+            customer = Customer.objects.create(customer_type=Customer.CustomerType.RESIDENTIAL,
+                                               first_name=f'First {i}', last_name=f'Last {i}')
+            for j in range(2):
+                customer.service_locations.add(ServiceLocation.objects.create(
+                    customer=customer, name=f'Location {i}-{j}', street_address=f'{j} Street', city='City',
+                    state='State', postal_code='00000'))
+            if i % 2:
+                BillingLocation.objects.create(customer=customer, name=f'Billing {i}', street_address='1 Street',
+                                               city='City', state='State', postal_code='00000')
+            create_material(f'Material {i}')
+            create_storage_location(f'Storage Location {i}')
+
+    def count_queries(self, url: str, page_size: int) -> int:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, {'page_size': page_size})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(page_size, len(response.data['results']))
+        return len(context)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        for url in ['/api/customers/', '/api/materials/', '/api/storage_location/']:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url, 2), self.count_queries(url, 10))
+
+    def test_pages_follow_the_cursor(self):
+        names, url = [], '/api/customers/'
+        params = {'page_size': 5}
+        while url:
+            response = self.client.get(url, params)
+            names += [customer['first_name'] for customer in response.data['results']]
+            url, params = response.data['next'], None
+        self.assertEqual([f'First {i}' for i in range(12)], names)
+
+    def test_nests_the_billing_location(self):
+        response = self.client.get('/api/customers/', {'page_size': 2})
+        self.assertIsNone(response.data['results'][0]['billing_location'])
+        self.assertEqual('Billing 1', response.data['results'][1]['billing_location']['name'])
+        self.assertEqual(2, len(response.data['results'][1]['service_locations']))
@@ -0,0 +1,28 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from customers.models.customer import Customer
+from inventory.tests.helpers import create_material, create_user
+
+
+class TestSearch(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(create_user())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.material = create_material('Termidor SC')
+            self.customer = Customer.objects.create(customer_type=Customer.CustomerType.RESIDENTIAL,
+                                                    first_name='Terry', last_name='Smith')
+
+    def test_returns_typed_hits(self):
+        response = self.client.get('/api/search/', {'q': 'ter', 'limit': 5})
+        self.assertEqual(200, response.status_code)
+        results = {hit['type']: hit for hit in response.data['results']}
+        self.assertEqual({'material', 'customer'}, set(results))
+        self.assertEqual(self.material.pk, results['material']['id'])
+        self.assertTrue(results['customer']['url'].endswith(f'/api/customers/{self.customer.pk}/'))
+
+        response = self.client.get('/api/search/', {'q': 'ter', 'type': 'customer'})
+        self.assertEqual(['customer'], [hit['type'] for hit in response.data['results']])
+        self.assertEqual(400, self.client.get('/api/search/', {'q': 'ter', 'type': 'vehicle'}).status_code)
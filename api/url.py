@@ -2,7 +2,7 @@ from rest_framework import routers
 
 from api.viewsets import BrandViewSet, EquipmentViewSet, MaterialViewSet, \
     ContactViewSet, CustomerViewSet, LocationViewSet, MaterialCategoryViewSet, \
-    StockLocationViewSet, UserViewSet
+    StockLocationViewSet, UserViewSet, TransferViewSet, VehicleViewSet, SearchViewSet
 
 router = routers.DefaultRouter()
 router.register(r'brands', BrandViewSet)
@@ -14,3 +14,6 @@ router.register(r'locations', LocationViewSet)
 router.register(r'categories', MaterialCategoryViewSet)
 router.register(r'storage_location', StockLocationViewSet)
 router.register(r'users', UserViewSet)
+router.register(r'transfers', TransferViewSet)
+router.register(r'vehicles', VehicleViewSet)
+router.register(r'search', SearchViewSet, basename='search')
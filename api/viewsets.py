@@ -1,15 +1,56 @@
 import rest_framework.permissions
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import viewsets, filters
+from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.reverse import reverse
+from rest_framework.response import Response
 
+from api.pagination import KeysetPagination
 from api.serializers import BrandSerializer, EquipmentSerializer, MaterialSerializer, MaterialCategorySerializer, \
     ContactSerializer, CustomerSerializer, LocationSerializer, \
-    StockLocationSerializer, MaterialTypeSerializer, UserSerializer
+    StockLocationSerializer, MaterialTypeSerializer, UserSerializer, TransferSerializer, BulkTransferSerializer, \
+    VehicleSerializer
 from inventory.models.equipment import Equipment
+from inventory.models.search import SearchDocument
+from inventory.services.compliance_service import VehicleComplianceService
+from inventory.services.search_service import SearchService
+from inventory.services.transfer_service import TransferService
+from inventory.utils.fragment_cache import get_lookup_models, get_versioned_response
 
 
 class BaseViewSet(viewsets.ModelViewSet):
+    """
+    Pages lists by keyset. Viewsets whose serializer nests related objects declare the relations it reads in
+    `select_related` and `prefetch_related`, so a page costs the same number of queries whatever its size.
+    Lists and objects are tagged with a version of the models they are read from, and answered with 304 Not
+    Modified without a query while the version the client sends is current.
+    """
     permission_classes = [rest_framework.permissions.IsAuthenticated, ]
+    pagination_class = KeysetPagination
+    select_related = ()
+    prefetch_related = ()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset
+
+    def get_versioned_response(self, request, get_response):
+        models = get_lookup_models(self.queryset.model, [*self.select_related, *self.prefetch_related])
+        parts = (type(self).__qualname__, self.action, sorted(self.kwargs.items()), sorted(request.GET.lists()),
+                 request.accepted_media_type, request.user.pk)
+        return get_versioned_response(request, models, parts, get_response)
+
+    def list(self, request, *args, **kwargs):
+        return self.get_versioned_response(request, lambda: super(BaseViewSet, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_versioned_response(
+            request, lambda: super(BaseViewSet, self).retrieve(request, *args, **kwargs))
 
 
 class BrandViewSet(BaseViewSet):
@@ -33,6 +74,7 @@ class EquipmentViewSet(BaseViewSet):
 class MaterialViewSet(BaseViewSet):
     serializer_class = MaterialSerializer
     queryset = serializer_class.Meta.model.objects.all()
+    select_related = ('brand', )
 
 
 class MaterialCategoryViewSet(BaseViewSet):
@@ -48,6 +90,8 @@ class ContactViewSet(BaseViewSet):
 class CustomerViewSet(BaseViewSet):
     serializer_class = CustomerSerializer
     queryset = serializer_class.Meta.model.objects.all()
+    select_related = ('billinglocation', )
+    prefetch_related = ('service_locations', )
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['first_name', 'last_name', 'company_name', 'email', 'phone_number']
     search_fields = ['first_name', 'last_name', 'company_name', 'email', 'phone_number']
@@ -56,6 +100,7 @@ class CustomerViewSet(BaseViewSet):
 class StockLocationViewSet(BaseViewSet):
     serializer_class = StockLocationSerializer
     queryset = serializer_class.Meta.model.objects.all()
+    select_related = ('address', )
 
 
 class MaterialTypeViewSet(BaseViewSet):
@@ -66,3 +111,58 @@ class MaterialTypeViewSet(BaseViewSet):
 class UserViewSet(BaseViewSet):
     serializer_class = UserSerializer
     queryset = serializer_class.Meta.model.objects.all()
+
+
+class TransferViewSet(BaseViewSet):
+    serializer_class = TransferSerializer
+    queryset = serializer_class.Meta.model.objects.all()
+    filterset_fields = ['status']
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Creates a batch of transfers with their lines, returning a result per transfer and per line."""
+        serializer = BulkTransferSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results, created = TransferService(user=request.user).create_many(serializer.validated_data['transfers'])
+        return Response(data={'transfers': results},
+                        status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+
+
+class VehicleViewSet(BaseViewSet):
+    serializer_class = VehicleSerializer
+    queryset = serializer_class.Meta.model.objects.all()
+    filterset_fields = ['vehicle_type', 'driver', 'asset_requirement_category']
+
+    @action(detail=False)
+    def compliance(self, request):
+        """Reports the shortfall and surplus of every vehicle against its requirements in a fixed number of queries."""
+        return Response(data=VehicleComplianceService.get_report(self.filter_queryset(self.get_queryset())))
+
+
+class SearchViewSet(viewsets.ViewSet):
+    """
+    Searches materials, equipment items, customers and targets at once for the words of `q`, optionally limited to
+    the document types given as `type`, and returns the best ranked hits with their type and id.
+    """
+    permission_classes = [rest_framework.permissions.IsAuthenticated, ]
+    detail_routes = {
+        SearchDocument.DocumentType.MATERIAL: 'material-detail',
+        SearchDocument.DocumentType.CUSTOMER: 'customer-detail',
+    }
+    default_limit = 20
+    max_limit = 100
+
+    def list(self, request):
+        document_types = request.query_params.getlist('type')
+        unknown = set(document_types) - set(SearchDocument.DocumentType.values)
+        if unknown:
+            raise ValidationError({'type': [f'Unknown document type {document_type}' for document_type in unknown]})
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            raise ValidationError({'limit': ['A number is required']})
+        hits = SearchService().search(request.query_params.get('q', ''), document_types, limit)
+        for hit in hits:
+            route = self.detail_routes.get(hit['type'])
+            hit['url'] = reverse(route, kwargs={'pk': hit['id']}, request=request) if route else None
+        return Response(data={'results': hits})
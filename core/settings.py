@@ -42,7 +42,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'inventory.middleware.TelemetryMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'inventory.middleware.QueryInspectorMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,7 +52,6 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'inventory.middleware.AxiosMiddleware',
     'django.middleware.locale.LocaleMiddleware'
 ]
 
@@ -83,6 +84,7 @@ DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DI
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
 AUTH_USER_MODEL = 'users.User'
+AUTHENTICATION_BACKENDS = ['users.backends.CachedPermissionBackend']
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator', },
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator', },
@@ -119,6 +121,53 @@ FIXTURE_DIRS = (os.path.join(BASE_DIR, 'mmportal', 'fixtures'),)
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Files cached between runs, kept out of the source tree: the scraped pesticides and the rendered partials
+CACHE_DIR = env('CACHE_DIR', default=os.path.join(Path.home(), '.cache', 'inventory_mgmt'))
+
+# EPA Scraper
+PESTICIDE_CACHE_PATH = env('PESTICIDE_CACHE_PATH', default=os.path.join(CACHE_DIR, 'pesticides'))
+PESTICIDE_CACHE_TTL = timedelta(days=env.int('PESTICIDE_CACHE_TTL_DAYS', default=30))
+
+# Query Inspector: 'warn' or 'raise' on queries a request repeats from the same line
+QUERY_INSPECTOR = env('QUERY_INSPECTOR', default=None)
+QUERY_INSPECTOR_THRESHOLD = env.int('QUERY_INSPECTOR_THRESHOLD', default=3)
+
+# Telemetry: request metrics of the last TELEMETRY_WINDOW seconds, served to staff at main/metrics and, when
+# INTERNAL_IPS lists them, to anonymous clients such as a local Prometheus scraper. Empty by default, since
+# behind a reverse proxy every client connects from the proxy's address.
+TELEMETRY_ENABLED = env.bool('TELEMETRY_ENABLED', default=True)
+TELEMETRY_WINDOW = env.int('TELEMETRY_WINDOW_SECONDS', default=300)
+INTERNAL_IPS = env.list('INTERNAL_IPS', default=[])
+
+# Search: 'fts5' for the SQLite full-text index, 'terms' for the inverted index kept in SearchTerm, 'auto' for
+# FTS5 wherever the database provides it
+SEARCH_BACKEND = env('SEARCH_BACKEND', default='auto')
+
+# Caches: rendered partials, invalidated by model generations, and resolved user permissions. Both must be shared by
+# every worker, or the others keep serving partials and 304s a write made stale and permissions that were revoked or
+# granted, so they default to files; point them at a shared backend such as Redis when the workers run on several
+# hosts
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'fragments': {
+        'BACKEND': env('FRAGMENT_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': env('FRAGMENT_CACHE_LOCATION', default=os.path.join(CACHE_DIR, 'fragments')),
+        'TIMEOUT': env.int('FRAGMENT_CACHE_TIMEOUT', default=600),
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    'permissions': {
+        'BACKEND': env('PERMISSION_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': env('PERMISSION_CACHE_LOCATION', default=os.path.join(CACHE_DIR, 'permissions')),
+        'TIMEOUT': env.int('PERMISSION_CACHE_TIMEOUT', default=300),
+    },
+}
+PERMISSION_CACHE = 'permissions'
+
+# Tests run against caches in a temporary directory of their own
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
 # Phone Number
 PHONENUMBER_DEFAULT_REGION = 'US'
 
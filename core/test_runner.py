@@ -0,0 +1,34 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+FILE_BASED_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the tests with the file caches and the pesticide cache in a directory of their own, removed afterwards, so
+    a run neither writes into CACHE_DIR nor reads the partials and generations an earlier run left there.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.mkdtemp(prefix='inventory_mgmt_tests_')
+        caches = {
+            alias: {**cache, 'LOCATION': os.path.join(self.cache_dir, alias)}
+            if cache['BACKEND'] == FILE_BASED_CACHE else cache
+            for alias, cache in settings.CACHES.items()
+        }
+        self.cache_settings = override_settings(
+            CACHE_DIR=self.cache_dir, CACHES=caches,
+            PESTICIDE_CACHE_PATH=os.path.join(self.cache_dir, 'pesticides'))
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -49,6 +49,10 @@ class Customer(MPTTModel):
         verbose_name = _('Customer')
         verbose_name_plural = _('Customers')
         ordering = ('company_name', 'first_name', 'last_name', 'pk',)
+        indexes = [
+            models.Index(fields=['company_name', 'first_name', 'last_name']),
+            models.Index(fields=['last_name', 'first_name']),
+        ]
 
 
 class ServiceLocation(Address):
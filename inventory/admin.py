@@ -1,14 +1,22 @@
-from django.contrib.admin import register, ModelAdmin, TabularInline, StackedInline
+from collections import defaultdict
+
+from django.contrib import messages
+from django.contrib.admin import action, register, ModelAdmin, TabularInline, StackedInline
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.contenttypes.admin import GenericStackedInline
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import PermissionDenied
 from django.db import models
-from django.db.models import Count
+from django.db.models import Count, prefetch_related_objects
 from django.forms import TextInput, Textarea
+from django.http import HttpResponseRedirect
 from django.urls import reverse
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 from mptt.admin import MPTTModelAdmin
 from common.models.field import Field
+from inventory.exceptions import TransactionError
+from inventory.managers import effective_price
 from inventory.models import Transfer, TransferAcceptance, Vehicle, VehicleEquipmentItem, VehicleMaterial, \
     PurchaseOrderEquipmentItem, PurchaseOrderMaterialItem, PurchaseOrder
 from inventory.models.brand import Brand
@@ -16,9 +24,13 @@ from inventory.models.equipment import Equipment, Condition, EquipmentCategory,
     EquipmentItem
 from inventory.models.material import Material, MaterialClass, MaterialCategory
 from inventory.models.material import MaterialField
+from inventory.models.price_history import VendorMaterialPrice, VendorEquipmentPrice
+from inventory.models.stock_holder import StockHolder
+from inventory.models.stock_movement import StockMovement, StockBalance
 from inventory.models.storage_location import StorageLocation, MaterialStock
 from inventory.models.transfer import TransferMaterialItem, TransferEquipmentItem
 from inventory.models.vendor import Vendor, VendorMaterial, VendorEquipment
+from inventory.services.transfer_service import TransferService
 
 
 class MaterialClassInline(TabularInline):
@@ -66,6 +78,7 @@ class MaterialInline(TabularInline):
 class MaterialStockInline(TabularInline):
     model = MaterialStock
     extra = 1
+    readonly_fields = ('quantity',)
 
 
 class EquipmentItemInline(TabularInline):
@@ -147,8 +160,11 @@ class PurchaseOrderEquipmentItemInline(TabularInline):
     readonly_fields = ['price']
     fields = ['equipment', 'quantity', 'received_quantity', 'price']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(effective_price=effective_price(prefix='equipment__'))
+
     def price(self, obj):
-        return obj.quantity * obj.equipment.current_price
+        return obj.quantity * obj.effective_price if hasattr(obj, 'effective_price') else None
 
     price.short_description = _('Price')
 
@@ -160,8 +176,11 @@ class PurchaseOrderMaterialItemInline(TabularInline):
     readonly_fields = ['price']
     fields = ['material', 'quantity', 'received_quantity', 'price']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(effective_price=effective_price(prefix='material__'))
+
     def price(self, obj):
-        return obj.quantity * obj.material.current_price
+        return obj.quantity * obj.effective_price if hasattr(obj, 'effective_price') else None
 
     price.short_description = _('Price')
 
@@ -169,6 +188,7 @@ class PurchaseOrderMaterialItemInline(TabularInline):
 @register(PurchaseOrder)
 class PurchaseOrderAdmin(ModelAdmin):
     list_display = ['id', 'vendor', 'date', 'created_by', 'approved_by', 'status', 'fulfillment_status', 'total_price']
+    list_select_related = ['vendor', 'created_by', 'approved_by']
     list_filter = ['status', 'created_by', 'approved_by', 'date']
     search_fields = ['vendor__name']
     autocomplete_fields = ['vendor', 'created_by', 'approved_by']
@@ -179,12 +199,21 @@ class PurchaseOrderAdmin(ModelAdmin):
         (_('Total Price'), {'fields': ['total_price']}),
     ]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_totals()
+
     def total_price(self, obj):
         return obj.total_price
 
+    total_price.short_description = _('Total Price')
+    total_price.admin_order_field = 'total'
+
     def fulfillment_status(self, obj):
         return obj.fulfillment_status
 
+    fulfillment_status.short_description = _('Fulfillment Status')
+    fulfillment_status.admin_order_field = 'fulfillment'
+
 
 @register(EquipmentField)
 class EquipmentFieldAdmin(ModelAdmin):
@@ -284,6 +313,9 @@ class VendorMaterialInline(TabularInline):
     autocomplete_fields = ('material',)
     readonly_fields = ['current_price']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_effective_price()
+
     def current_price(self, obj):
         return obj.current_price
 
@@ -296,6 +328,9 @@ class VendorEquipmentInline(TabularInline):
     autocomplete_fields = ('equipment',)
     readonly_fields = ['current_price']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_effective_price()
+
     def current_price(self, obj):
         return obj.current_price
 
@@ -327,25 +362,66 @@ class VendorAdmin(ModelAdmin):
     website_link.allow_tags = True
 
 
+class VendorItemPriceInline(TabularInline):
+    extra = 0
+    fields = readonly_fields = ['effective_from', 'effective_to', 'price', 'is_promotion']
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+class VendorMaterialPriceInline(VendorItemPriceInline):
+    model = VendorMaterialPrice
+
+
+class VendorEquipmentPriceInline(VendorItemPriceInline):
+    model = VendorEquipmentPrice
+
+
 @register(VendorMaterial)
 class VendorMaterialAdmin(ModelAdmin):
+    inlines = [VendorMaterialPriceInline]
     list_display = ['material', 'sku', 'unit_price', 'promo_unit_price', 'promo_start_date', 'promo_end_date',
                     'current_price']
     list_display_links = ['material']
+    list_select_related = ['material']
     list_filter = ['promo_start_date', 'promo_end_date']
     search_fields = ['material__name', 'sku']
     autocomplete_fields = ['material']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_effective_price()
+
+    def current_price(self, obj):
+        return obj.current_price
+
+    current_price.short_description = _('Current Price')
+    current_price.admin_order_field = 'effective_price'
+
 
 @register(VendorEquipment)
 class VendorEquipmentAdmin(ModelAdmin):
+    inlines = [VendorEquipmentPriceInline]
     list_display = ['equipment', 'sku', 'unit_price', 'promo_unit_price', 'promo_start_date', 'promo_end_date',
                     'current_price']
     list_display_links = ['equipment']
+    list_select_related = ['equipment']
     list_filter = ['promo_start_date', 'promo_end_date']
     search_fields = ['equipment__name', 'sku']
     autocomplete_fields = ['equipment']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_effective_price()
+
+    def current_price(self, obj):
+        return obj.current_price
+
+    current_price.short_description = _('Current Price')
+    current_price.admin_order_field = 'effective_price'
+
 
 @register(MaterialCategory)
 class MaterialCategoryAdmin(MPTTModelAdmin):
@@ -362,47 +438,116 @@ class MaterialClassAdmin(ModelAdmin):
     list_display = ('name', 'description')
 
 
-class TransferEquipmentItemInline(StackedInline):
-    model = TransferEquipmentItem
+class TransferLineInline(StackedInline):
+    """The lines of a transfer, which are frozen once its completion recorded them in the stock ledger."""
     extra = 0
 
+    @staticmethod
+    def is_completed(obj) -> bool:
+        return obj is not None and obj.status == Transfer.TransferStatus.COMPLETED
+
+    def has_add_permission(self, request, obj=None):
+        return not self.is_completed(obj) and super().has_add_permission(request, obj)
 
-class TransferMaterialItemInline(StackedInline):
+    def has_change_permission(self, request, obj=None):
+        return not self.is_completed(obj) and super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        return not self.is_completed(obj) and super().has_delete_permission(request, obj)
+
+
+class TransferEquipmentItemInline(TransferLineInline):
+    model = TransferEquipmentItem
+
+
+class TransferMaterialItemInline(TransferLineInline):
     model = TransferMaterialItem
-    extra = 0
 
 
 @register(Transfer)
 class TransferAdmin(ModelAdmin):
     list_display = ('created_at', 'source', 'destination','release_agent', 'transfer_agent', 'status')
-    search_fields = ('item__name', 'source__name', 'destination__name')
-    list_filter = ('status',)
+    list_select_related = ('source', 'destination', 'release_agent', 'transfer_agent')
+    search_fields = ('source__name', 'destination__name', 'notes')
+    list_filter = ('status', 'source__holder_type', 'destination__holder_type')
+    autocomplete_fields = ('source', 'destination')
     inlines = (TransferEquipmentItemInline, TransferMaterialItemInline)
+    actions = ('complete_transfers',)
+    completed_readonly_fields = ('source', 'destination', 'status')
 
-    def formfield_for_foreignkey(self, db_field, request, **kwargs):
-        if db_field.name in ('source_type','destination_type'):
-            kwargs['queryset'] = db_field.related_model.objects.filter(model__in=('vehicle', 'storagelocation'))
-        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+    def get_readonly_fields(self, request, obj=None):
+        # The ledger recorded the movements of a completed transfer, which nothing here would reverse
+        readonly_fields = super().get_readonly_fields(request, obj)
+        if obj is not None and obj.status == Transfer.TransferStatus.COMPLETED:
+            return (*readonly_fields, *self.completed_readonly_fields)
+        return readonly_fields
+
+    def save_model(self, request, obj, form, change):
+        if change and obj.status != Transfer.TransferStatus.COMPLETED and Transfer.objects.filter(
+                pk=obj.pk, status=Transfer.TransferStatus.COMPLETED).exists():
+            raise PermissionDenied(_('A completed transfer cannot be reopened.'))
+        # Completion moves stock, so it is deferred until the transfer lines have been saved
+        obj._complete = obj.status == Transfer.TransferStatus.COMPLETED and 'status' in form.changed_data
+        if obj._complete:
+            obj.status = form.initial.get('status', Transfer.TransferStatus.PENDING)
+        super().save_model(request, obj, form, change)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        if getattr(form.instance, '_complete', False):
+            form.instance._completion_errors = self._complete_transfers(request, [form.instance])
+
+    def response_add(self, request, obj, post_url_continue=None):
+        return self._response_completion_failed(request, obj) or super().response_add(request, obj, post_url_continue)
+
+    def response_change(self, request, obj):
+        return self._response_completion_failed(request, obj) or super().response_change(request, obj)
+
+    def _response_completion_failed(self, request, obj):
+        """Returns to the transfer instead of reporting it saved when its completion was rejected."""
+        if not getattr(obj, '_completion_errors', None):
+            return None
+        self.message_user(request, _('The transfer was saved but not completed.'), messages.WARNING)
+        return HttpResponseRedirect(reverse(f'admin:{obj._meta.app_label}_{obj._meta.model_name}_change',
+                                            args=[obj.pk], current_app=self.admin_site.name))
+
+    @action(description=_('Complete selected transfers'))
+    def complete_transfers(self, request, queryset):
+        self._complete_transfers(request, queryset)
+
+    def _complete_transfers(self, request, transfers) -> list[str]:
+        """Completes the transfers one by one, reporting and returning the errors of those that were rejected."""
+        service = TransferService(user=request.user)
+        errors = []
+        for transfer in transfers:
+            try:
+                service.complete(transfer)
+            except TransactionError as e:
+                errors.append(e.message)
+                self.message_user(request, f'{transfer}: {e.message}', messages.ERROR)
+        return errors
 
 
 
 @register(TransferAcceptance)
 class TransferAcceptanceAdmin(ModelAdmin):
     list_display = ('transfer', 'accepted_by', 'accepted_at')
+    list_select_related = ('transfer__source', 'transfer__destination', 'accepted_by')
     search_fields = (
-        'transfer__item__name', 'transfer__source__name', 'transfer__destination__name', 'accepted_by__first_name',
-        'accepted_by__last_name')
+        'transfer__source__name', 'transfer__destination__name', 'accepted_by__first_name', 'accepted_by__last_name')
     list_filter = ('transfer__status', 'accepted_at')
 
 
 class VehicleMaterialInline(TabularInline):
     model = VehicleMaterial
     extra = 1
+    readonly_fields = ('quantity',)
 
 
 class VehicleEquipmentItemInline(TabularInline):
     model = VehicleEquipmentItem
     extra = 1
+    readonly_fields = ('quantity',)
 
 
 @register(Vehicle)
@@ -421,6 +566,88 @@ class VehicleAdmin(ModelAdmin):
     )
 
 
+@register(StockHolder)
+class StockHolderAdmin(ModelAdmin):
+    list_display = ('name', 'holder_type')
+    list_filter = ('holder_type',)
+    search_fields = ('name',)
+    readonly_fields = ('holder_type', 'name', 'storage_location', 'vehicle', 'technician', 'job_site')
+
+    def has_add_permission(self, request):
+        return False
+
+
+class GenericRelationChangeList(ChangeList):
+    """
+    Loads the generic foreign keys of a page with one query per content type, then the relations their names read,
+    as the model admin's `generic_related` lists them per model, with one query per model and relation.
+    """
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.result_list = list(self.result_list)
+        targets = defaultdict(list)
+        for obj in self.result_list:
+            for field in self.model_admin.generic_fields:
+                target = getattr(obj, field)
+                if target is not None:
+                    targets[type(target)].append(target)
+        for model, model_targets in targets.items():
+            prefetch_related_objects(model_targets, *self.model_admin.generic_related.get(model, ()))
+
+
+class GenericRelationAdmin(ModelAdmin):
+    generic_fields = ()
+    generic_related = {Material: ('brand',), EquipmentItem: ('equipment',)}
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related(*self.generic_fields)
+
+    def get_changelist(self, request, **kwargs):
+        return GenericRelationChangeList
+
+
+@register(StockMovement)
+class StockMovementAdmin(GenericRelationAdmin):
+    list_display = ('created_at', 'reason', 'item', 'quantity', 'source', 'destination', 'created_by')
+    list_filter = ('reason', 'item_type', 'created_at')
+    date_hierarchy = 'created_at'
+    generic_fields = ('item', 'source', 'destination')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('item_type', 'source_type', 'destination_type',
+                                                            'created_by')
+
+    def has_add_permission(self, request):
+        # Movements are recorded through StockLedgerService, which keeps the balances and counters in step
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@register(StockBalance)
+class StockBalanceAdmin(GenericRelationAdmin):
+    list_display = ('item', 'holder', 'quantity', 'updated_at')
+    list_filter = ('item_type', 'holder_type')
+    generic_fields = ('item', 'holder')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('item_type', 'holder_type')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 class PurchaseOrderItemInline(TabularInline):
     extra = 1
     readonly_fields = ('price', 'current_price')
@@ -6,4 +6,5 @@ class InventoryConfig(AppConfig):
     name = 'inventory'
 
     def ready(self):
-        pass
\ No newline at end of file
+        from inventory.utils import fragment_cache  # noqa: F401 connects the generation receivers
+        from inventory.services import search_service  # noqa: F401 connects the search index receivers
\ No newline at end of file
@@ -1,18 +1,50 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Q
 from django_filters import FilterSet, rest_framework as filters
 
-from inventory.models.material import Material
+from customers.models.customer import Customer
+from inventory.models.brand import Brand
+from inventory.models.equipment import Equipment
+from inventory.models.material import Material, MaterialCategory
 from inventory.models.storage_location import StorageLocation
 
 User = get_user_model()
 
 
 class MaterialFilter(FilterSet):
-    name = filters.CharFilter(field_name='name', lookup_expr='contains')
-    status = filters.ChoiceFilter(choices=Material.Status.choices)
-    storage_location = filters.ModelChoiceFilter(queryset=StorageLocation.objects.all())
-    user = filters.ModelChoiceFilter(queryset=User.objects.all())
+    name = filters.CharFilter(field_name='name', lookup_expr='icontains')
+    brand = filters.ModelChoiceFilter(queryset=Brand.objects.all())
+    category = filters.ModelChoiceFilter(queryset=MaterialCategory.objects.all())
 
     class Meta:
         model = Material
-        fields = ('name', 'status',)
+        fields = ('name', 'brand', 'category', 'is_active',)
+
+
+class EquipmentFilter(FilterSet):
+    name = filters.CharFilter(field_name='name', lookup_expr='icontains')
+    brand = filters.ModelChoiceFilter(queryset=Brand.objects.all())
+
+    class Meta:
+        model = Equipment
+        fields = ('name', 'brand', 'asset_type',)
+
+
+class CustomerFilter(FilterSet):
+    name = filters.CharFilter(method='filter_name')
+
+    def filter_name(self, queryset, name, value):
+        return queryset.filter(Q(first_name__icontains=value) | Q(last_name__icontains=value)
+                               | Q(company_name__icontains=value))
+
+    class Meta:
+        model = Customer
+        fields = ('name', 'customer_type',)
+
+
+class StorageLocationFilter(FilterSet):
+    name = filters.CharFilter(field_name='name', lookup_expr='icontains')
+
+    class Meta:
+        model = StorageLocation
+        fields = ('name', 'is_active',)
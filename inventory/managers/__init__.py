@@ -0,0 +1,5 @@
+from .price_history import VendorItemPriceQuerySet
+from .purchase_order import PurchaseOrderItemQuerySet, PurchaseOrderQuerySet
+from .requirement import EquipmentItemRequirementQuerySet, MaterialRequirementQuerySet
+from .stock import StockMovementQuerySet, StockBalanceQuerySet
+from .vendor import VendorItemQuerySet, VendorMaterialQuerySet, VendorEquipmentQuerySet, effective_price
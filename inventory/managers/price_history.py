@@ -0,0 +1,60 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import Q, Subquery
+from django.utils import timezone
+
+from inventory.utils.fragment_cache import bump_generation
+
+
+class VendorItemPriceQuerySet(models.QuerySet):
+
+    def covering(self, date):
+        """Filters the price ranges in effect on the date, which may be an OuterRef()."""
+        return self.filter(Q(effective_to__isnull=True) | Q(effective_to__gte=date), effective_from__lte=date)
+
+    def price_as_of(self, vendor_item, date):
+        """
+        Returns an expression resolving the price of the vendor item on the date, both usually OuterRef()s,
+        so a whole report resolves its prices with one indexed range lookup per row in the same query.
+        """
+        return Subquery(self.covering(date).filter(vendor_item=vendor_item).order_by('-effective_from').values(
+            'price')[:1])
+
+    def record(self, vendor_items, date=None) -> int:
+        """
+        Rewrites the price ranges of the vendor items from the date (today by default) on. The range in effect on
+        the date is extended when the price carries on and closed otherwise, so the history stays compact. Items
+        whose recorded prices already match are left untouched. Returns the number of items whose history changed.
+        """
+        date = date or timezone.now().date()
+        segments = {item.pk: self.model.get_segments(item, date) for item in vendor_items}
+        recorded, in_effect = defaultdict(list), {}
+        for price in self.filter(Q(effective_to__isnull=True) | Q(effective_to__gte=date),
+                                 vendor_item__in=segments).order_by('vendor_item', 'effective_from'):
+            recorded[price.vendor_item_id].append(
+                (max(price.effective_from, date), price.effective_to, price.price, price.is_promotion))
+            if price.effective_from < date:
+                in_effect[price.vendor_item_id] = price
+        changed = [pk for pk, item_segments in segments.items() if recorded[pk] != item_segments]
+        if not changed:
+            return 0
+        created, updated = [], []
+        for pk in changed:
+            item_segments, price = segments[pk], in_effect.get(pk)
+            if price is not None:
+                if (price.price, price.is_promotion) == item_segments[0][2:]:
+                    price.effective_to = item_segments.pop(0)[1]
+                else:
+                    price.effective_to = date - timedelta(days=1)
+                updated.append(price)
+            created.extend(self.model(vendor_item_id=pk, effective_from=effective_from, effective_to=effective_to,
+                                      price=amount, is_promotion=is_promotion)
+                           for effective_from, effective_to, amount, is_promotion in item_segments)
+        with transaction.atomic():
+            self.filter(vendor_item__in=changed, effective_from__gte=date).delete()
+            self.bulk_update(updated, ['effective_to'])
+            self.bulk_create(created)
+        bump_generation(self.model)
+        return len(changed)
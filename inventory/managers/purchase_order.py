@@ -0,0 +1,42 @@
+from django.db import models
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+
+class PurchaseOrderQuerySet(models.QuerySet):
+
+    def _sum_lines(self, related_name: str, expression):
+        lines = self.model._meta.get_field(related_name).related_model.objects.filter(
+            purchase_order=OuterRef('pk')).order_by().values('purchase_order').annotate(total=Sum(expression))
+        return Coalesce(Subquery(lines.values('total')), Value(0), output_field=DecimalField(max_digits=12,
+                                                                                             decimal_places=2))
+
+    def with_totals(self):
+        """
+        Annotates the total price, the requested and received quantities and the fulfillment status of every
+        purchase order in SQL, so a page of purchase orders is summarized by the query that loads it.
+        """
+        return self.annotate(
+            total=self._sum_lines('materials', 'price') + self._sum_lines('equipments', 'price'),
+            requested_quantity=self._sum_lines('materials', 'quantity') + self._sum_lines('equipments', 'quantity'),
+            received_quantity=(self._sum_lines('materials', 'received_quantity')
+                               + self._sum_lines('equipments', 'received_quantity')),
+        ).annotate(fulfillment=Case(
+            When(received_quantity=0, then=Value(self.model.FulfillmentStatus.UNFULFILLED)),
+            When(received_quantity__gte=F('requested_quantity'), then=Value(self.model.FulfillmentStatus.FULFILLED)),
+            default=Value(self.model.FulfillmentStatus.PARTIALLY_FULFILLED),
+        ))
+
+
+class PurchaseOrderItemQuerySet(models.QuerySet):
+
+    def with_catalog_price(self):
+        """
+        Annotates the unit price the vendor item had on the date of the purchase order, from the price history,
+        and the matching line price, so cost reports reconcile past lines in a single query.
+        """
+        vendor_item_model = self.model._meta.get_field(self.model.item_field).related_model
+        price_history = vendor_item_model._meta.get_field('price_history').related_model
+        return self.annotate(catalog_unit_price=price_history.objects.price_as_of(
+            OuterRef(self.model.item_field), OuterRef('purchase_order__date'),
+        )).annotate(catalog_price=F('catalog_unit_price') * F('quantity'))
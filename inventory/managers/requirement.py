@@ -0,0 +1,39 @@
+from django.apps import apps
+from django.db import models
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+
+class RequirementQuerySet(models.QuerySet):
+    """Requirements of asset requirement categories, compared against what the vehicles of each category hold."""
+    # The required item field, and the label of the model holding that item per vehicle
+    item_field = None
+    holding_model = None
+
+    def get_holdings(self):
+        return apps.get_model(self.holding_model).objects.all()
+
+    def for_vehicles(self, vehicles):
+        """
+        Returns one row per vehicle and required item of its category annotated with the quantity on hand, the
+        shortfall below the minimum and the surplus above the maximum, in a single query for the whole fleet.
+        """
+        on_hand = self.get_holdings().filter(
+            vehicle_id=OuterRef('vehicle_id'), **{f'{self.item_field}_id': OuterRef(f'{self.item_field}_id')},
+        ).order_by().values('vehicle_id').annotate(total=Sum('quantity')).values('total')
+        return self.filter(asset_requirement_category__vehicles__in=vehicles).annotate(
+            vehicle_id=F('asset_requirement_category__vehicles'),
+            on_hand=Coalesce(Subquery(on_hand), 0),
+            shortfall=Greatest(F('minimum_amount') - F('on_hand'), 0),
+            surplus=Greatest(F('on_hand') - Greatest(F('maximum_amount'), F('minimum_amount')), 0),
+        ).order_by('vehicle_id', f'{self.item_field}_id')
+
+
+class MaterialRequirementQuerySet(RequirementQuerySet):
+    item_field = 'material'
+    holding_model = 'inventory.VehicleMaterial'
+
+
+class EquipmentItemRequirementQuerySet(RequirementQuerySet):
+    item_field = 'equipment_item'
+    holding_model = 'inventory.VehicleEquipmentItem'
@@ -0,0 +1,33 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+from inventory.exceptions import TransactionError
+
+
+class StockMovementQuerySet(models.QuerySet):
+    """Stock movements form an append-only ledger, so bulk changes are refused."""
+
+    def update(self, **kwargs):
+        raise TransactionError('Stock movements are append-only and cannot be changed.')
+
+    def delete(self):
+        raise TransactionError('Stock movements are append-only and cannot be deleted.')
+
+    def for_item(self, item):
+        return self.filter(item_type=ContentType.objects.get_for_model(item), item_id=item.pk)
+
+
+class StockBalanceQuerySet(models.QuerySet):
+
+    def for_item(self, item):
+        return self.filter(item_type=ContentType.objects.get_for_model(item), item_id=item.pk)
+
+    def for_holder(self, holder):
+        return self.filter(holder_type=ContentType.objects.get_for_model(holder), holder_id=holder.pk)
+
+    def on_hand(self, item, holder) -> int:
+        """Returns the quantity of the item at the holder with a single indexed read."""
+        balance = self.for_item(item).filter(
+            holder_type=ContentType.objects.get_for_model(holder), holder_id=holder.pk
+        ).values_list('quantity', flat=True).first()
+        return balance or 0
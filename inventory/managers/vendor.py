@@ -0,0 +1,54 @@
+from django.db import connection, models
+from django.db.models import Case, DateField, F, OuterRef, Subquery, Value, When
+from django.utils import timezone
+
+
+def effective_price(date=None, prefix: str = ''):
+    """
+    Returns the price of a vendor item on the date (today by default): the promotional price while a promotion runs,
+    else the unit price. The prefix resolves the vendor item through a relation, e.g. 'material__'.
+    """
+    date = date or timezone.now().date()
+    return Case(
+        When(**{f'{prefix}promo_start_date__lte': date, f'{prefix}promo_end_date__gte': date,
+                f'{prefix}promo_unit_price__isnull': False}, then=F(f'{prefix}promo_unit_price')),
+        default=F(f'{prefix}unit_price'),
+    )
+
+
+class VendorItemQuerySet(models.QuerySet):
+    item_field = None
+
+    def with_effective_price(self, date=None):
+        """Annotates the effective price of every vendor item on the date, and the date it was priced on."""
+        date = date or timezone.now().date()
+        return self.annotate(effective_price=effective_price(date),
+                             effective_price_date=Value(date, output_field=DateField()))
+
+    def available(self):
+        return self.filter(is_available=True, vendor__is_active=True)
+
+    def best_offers(self, items=None, date=None):
+        """
+        Returns the cheapest available offer per item on the date, preferring the shortest delivery time on equal
+        prices, in a single query with the effective price annotated. DISTINCT ON is used where the database
+        supports it, a correlated subquery elsewhere.
+        """
+        offers = self.available().with_effective_price(date)
+        if items is not None:
+            offers = offers.filter(**{f'{self.item_field}__in': items})
+        ordering = ('effective_price', 'delivery_time', 'pk')
+        if connection.features.can_distinct_on_fields:
+            return offers.order_by(f'{self.item_field}_id', *ordering).distinct(f'{self.item_field}_id')
+        best = offers.filter(**{f'{self.item_field}_id': OuterRef(f'{self.item_field}_id')}).order_by(
+            *ordering).values('pk')[:1]
+        return offers.filter(pk__in=offers.order_by().values(f'{self.item_field}_id').distinct().annotate(
+            best=Subquery(best)).values('best'))
+
+
+class VendorMaterialQuerySet(VendorItemQuerySet):
+    item_field = 'material'
+
+
+class VendorEquipmentQuerySet(VendorItemQuerySet):
+    item_field = 'equipment'
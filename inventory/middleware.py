@@ -1,15 +1,72 @@
+import logging
+import time
 from typing import Callable
-from urllib.parse import unquote
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.http import HttpRequest, HttpResponse
 
+from inventory.utils.query_inspector import QueryInspector, RepeatedQueriesError
+from inventory.utils.telemetry import QueryTimer, RequestMetrics, aggregator
+
+logger = logging.getLogger(__name__)
 
-class AxiosMiddleware:
-    """Middleware for testing if axios headers are coming in
-    TODO:  Remove This or improve on it.
+
+class TelemetryMiddleware:
+    """
+    Records the latency, the database queries, the template render time and the response size of every request in
+    the telemetry aggregator, per view and per kind: a partial loaded with the X-Axios-Header, or a full page.
+    Template responses are rendered here so their render time is measured apart from the view.
     """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        if not settings.TELEMETRY_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        request.template_ms = 0
+        start = time.perf_counter()
+        with QueryTimer() as queries:
+            response = self.get_response(request)
+        match = request.resolver_match
+        aggregator.add(RequestMetrics(
+            view=match.view_name if match else 'unresolved',
+            kind='partial' if request.headers.get('X-Axios-Header') else 'page',
+            status=response.status_code,
+            latency_ms=(time.perf_counter() - start) * 1000,
+            queries=queries.queries,
+            query_ms=queries.duration * 1000,
+            template_ms=request.template_ms,
+            response_bytes=0 if response.streaming else len(response.content),
+        ))
+        return response
+
+    def process_template_response(self, request: HttpRequest, response):
+        start = time.perf_counter()
+        response.render()
+        request.template_ms += (time.perf_counter() - start) * 1000
+        return response
+
+
+class QueryInspectorMiddleware:
+    """
+    Reports the queries a request repeats from the same line, the way lookups per row of a list do. It is off unless
+    QUERY_INSPECTOR is 'warn', which logs a warning with the stack that ran them, or 'raise', which fails the request.
+    """
+
     def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        if settings.QUERY_INSPECTOR not in ('warn', 'raise'):
+            raise MiddlewareNotUsed
         self.get_response = get_response
 
     def __call__(self, request: HttpRequest) -> HttpResponse:
-        request.headers.get('X-Axios-Header')
-        return self.get_response(request)
+        with QueryInspector() as inspector:
+            response = self.get_response(request)
+        repeated_queries = inspector.get_repeated_queries()
+        if repeated_queries:
+            report = '\n'.join(str(query) for query in repeated_queries)
+            if settings.QUERY_INSPECTOR == 'raise':
+                raise RepeatedQueriesError(f'{request.method} {request.path} repeated queries:\n{report}')
+            logger.warning('%s %s repeated queries:\n%s', request.method, request.path, report)
+        return response
@@ -6,4 +6,8 @@ from .storage_location import StorageLocation
 from .transfer import Transfer, TransferAcceptance
 from .vehicle import Vehicle, VehicleMaterial, VehicleEquipmentItem
 from .vendor import Vendor, VendorMaterial, VendorEquipment, VendorItem
-from .purchase_order import PurchaseOrder, PurchaseOrderMaterialItem, PurchaseOrderEquipmentItem
\ No newline at end of file
+from .purchase_order import PurchaseOrder, PurchaseOrderMaterialItem, PurchaseOrderEquipmentItem
+from .price_history import VendorMaterialPrice, VendorEquipmentPrice
+from .stock_holder import StockHolder
+from .stock_movement import StockMovement, StockBalance
+from .search import SearchDocument, SearchTerm
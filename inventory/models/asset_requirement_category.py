@@ -1,5 +1,7 @@
 from django.db import models
 
+from inventory.managers import EquipmentItemRequirementQuerySet, MaterialRequirementQuerySet
+
 
 class AssetRequirementCategory(models.Model):
     name = models.CharField(max_length=150)
@@ -12,9 +14,13 @@ class MaterialRequirement(models.Model):
     minimum_amount = models.PositiveIntegerField(default=0)
     maximum_amount = models.PositiveIntegerField(default=0)
 
+    objects = MaterialRequirementQuerySet.as_manager()
+
 
 class EquipmentItemRequirement(models.Model):
     equipment_item = models.ForeignKey('inventory.EquipmentItem', on_delete=models.CASCADE)
     asset_requirement_category = models.ForeignKey(AssetRequirementCategory, on_delete=models.CASCADE)
     minimum_amount = models.PositiveIntegerField(default=0)
     maximum_amount = models.PositiveIntegerField(default=0)
+
+    objects = EquipmentItemRequirementQuerySet.as_manager()
@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+from django.db import models
+from django.db.models import F, Min, Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from inventory.managers import VendorItemPriceQuerySet
+from inventory.models.purchase_order import PurchaseOrder
+
+
+class VendorItemPrice(models.Model):
+    """
+    A date range during which a vendor item sold at a price. The ranges of an item do not overlap and the last
+    one is open ended, so the price on any date is a single indexed range lookup.
+    """
+    effective_from = models.DateField(verbose_name=_('effective from'))
+    effective_to = models.DateField(verbose_name=_('effective to'), null=True, blank=True)
+    price = models.DecimalField(max_digits=5, decimal_places=2, verbose_name=_('price'))
+    is_promotion = models.BooleanField(default=False)
+
+    objects = VendorItemPriceQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+        ordering = ['vendor_item', 'effective_from']
+
+    def __str__(self):
+        return f'{self.price} ({self.effective_from} - {self.effective_to or ""})'
+
+    @staticmethod
+    def get_segments(vendor_item, date) -> list[tuple]:
+        """Splits the prices of the vendor item from the date on into (from, to, price, is_promotion) ranges."""
+        start, end, promo_price = vendor_item.promo_start_date, vendor_item.promo_end_date, \
+            vendor_item.promo_unit_price
+        if start is None or end is None or promo_price is None or end < max(start, date):
+            return [(date, None, vendor_item.unit_price, False)]
+        start = max(start, date)
+        segments = [(date, start - timedelta(days=1), vendor_item.unit_price, False)] if start > date else []
+        return segments + [(start, end, promo_price, True), (end + timedelta(days=1), None, vendor_item.unit_price,
+                                                             False)]
+
+
+class VendorMaterialPrice(VendorItemPrice):
+    vendor_item = models.ForeignKey('inventory.VendorMaterial', on_delete=models.CASCADE, related_name='price_history',
+                                    verbose_name=_('vendor material'))
+
+    class Meta(VendorItemPrice.Meta):
+        verbose_name = _('Vendor Material Price')
+        verbose_name_plural = _('Vendor Material Prices')
+        constraints = [
+            models.UniqueConstraint(fields=['vendor_item', 'effective_from'],
+                                    name='vendor_material_price_unique_start'),
+            models.CheckConstraint(check=Q(effective_to__isnull=True) | Q(effective_to__gte=F('effective_from')),
+                                   name='vendor_material_price_valid_range'),
+        ]
+
+
+class VendorEquipmentPrice(VendorItemPrice):
+    vendor_item = models.ForeignKey('inventory.VendorEquipment', on_delete=models.CASCADE,
+                                    related_name='price_history', verbose_name=_('vendor equipment'))
+
+    class Meta(VendorItemPrice.Meta):
+        verbose_name = _('Vendor Equipment Price')
+        verbose_name_plural = _('Vendor Equipment Prices')
+        constraints = [
+            models.UniqueConstraint(fields=['vendor_item', 'effective_from'],
+                                    name='vendor_equipment_price_unique_start'),
+            models.CheckConstraint(check=Q(effective_to__isnull=True) | Q(effective_to__gte=F('effective_from')),
+                                   name='vendor_equipment_price_valid_range'),
+        ]
+
+
+def backfill_price_history() -> int:
+    """
+    Records the current prices of the vendor items without history, e.g. after loading fixtures, as in effect
+    since the first purchase order. Returns the number of items recorded.
+    """
+    since = PurchaseOrder.objects.aggregate(since=Min('date'))['since'] or timezone.now().date()
+    recorded = 0
+    for price_model in (VendorMaterialPrice, VendorEquipmentPrice):
+        vendor_items = price_model._meta.get_field('vendor_item').related_model.objects.filter(
+            price_history__isnull=True)
+        recorded += price_model.objects.record(vendor_items, date=since)
+    return recorded
+
+
+@receiver(post_save, sender='inventory.VendorMaterial')
+@receiver(post_save, sender='inventory.VendorEquipment')
+def record_price_history(sender, instance, raw=False, **kwargs):
+    """Records a new price range whenever the unit or promotional price of a vendor item changes."""
+    if raw:
+        return
+    sender._meta.get_field('price_history').related_model.objects.record([instance])
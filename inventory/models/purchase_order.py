@@ -1,7 +1,8 @@
 from django.db import models
-from django.db.models import Sum
 from django.utils.translation import gettext_lazy as _
 
+from inventory.managers import PurchaseOrderItemQuerySet, PurchaseOrderQuerySet
+
 
 class PurchaseOrder(models.Model):
     class Status(models.TextChoices):
@@ -28,27 +29,43 @@ class PurchaseOrder(models.Model):
                                     null=True, blank=True)
     status = models.CharField(max_length=32, choices=Status.choices, default=Status.NEW)
 
+    objects = PurchaseOrderQuerySet.as_manager()
+
+    # The annotations of PurchaseOrder.objects.with_totals()
+    TOTAL_FIELDS = ('total', 'requested_quantity', 'received_quantity', 'fulfillment')
+
     def __str__(self):
         return f'{self.vendor} - {self.date}'
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.clear_totals()
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using, fields)
+        self.clear_totals()
+
+    def clear_totals(self):
+        """Drops the loaded totals, so that they are read again after the lines changed."""
+        for name in self.TOTAL_FIELDS:
+            self.__dict__.pop(name, None)
+
+    def _get_totals(self):
+        """Loads the totals of a purchase order that was not fetched with PurchaseOrder.objects.with_totals()."""
+        if not hasattr(self, 'fulfillment'):
+            totals = PurchaseOrder.objects.with_totals().filter(pk=self.pk).values(*self.TOTAL_FIELDS).get()
+            for name, value in totals.items():
+                setattr(self, name, value)
+
     @property
     def total_price(self):
-        material_price = self.materials.aggregate(Sum('price'))['price__sum'] or 0
-        equipment_price = self.equipments.aggregate(Sum('price'))['price__sum'] or 0
-        total_price = material_price + equipment_price
-        return total_price
+        self._get_totals()
+        return self.total
 
     @property
     def fulfillment_status(self):
-        total_requested = sum([item.quantity for item in self.materials.all()] + [item.quantity for item in self.equipments.all()])
-        total_received = sum([item.received_quantity for item in self.materials.all()] + [item.checked_in_quantity for item in self.equipments.all()])
-
-        if total_received == 0:
-            return self.FulfillmentStatus.UNFULFILLED
-        elif total_received == total_requested:
-            return self.FulfillmentStatus.FULFILLED
-        else:
-            return self.FulfillmentStatus.PARTIALLY_FULFILLED
+        self._get_totals()
+        return self.fulfillment
 
     class Meta:
         verbose_name = _('Purchase Order')
@@ -61,29 +78,39 @@ class PurchaseOrderItem(models.Model):
     received_quantity = models.DecimalField(max_digits=5, decimal_places=2)
     price = models.DecimalField(max_digits=7, decimal_places=2)
 
+    # The foreign key to the vendor item that prices the line
+    item_field = None
+
+    objects = PurchaseOrderItemQuerySet.as_manager()
+
     class Meta:
         abstract = True
 
+    def save(self, *args, **kwargs):
+        vendor_items = self._meta.get_field(self.item_field).related_model.objects
+        self.price = vendor_items.with_effective_price().values_list('effective_price', flat=True).get(
+            pk=getattr(self, f'{self.item_field}_id')) * self.quantity
+        super().save(*args, **kwargs)
+        if self._meta.get_field('purchase_order').is_cached(self):
+            self.purchase_order.clear_totals()
+
 
 class PurchaseOrderEquipmentItem(PurchaseOrderItem):
     equipment = models.ForeignKey('inventory.VendorEquipment', on_delete=models.CASCADE)
     purchase_order = models.ForeignKey(PurchaseOrder, on_delete=models.CASCADE, related_name='equipments')
 
+    item_field = 'equipment'
+
     def __str__(self):
         return f'{self.equipment} ({self.quantity})'
 
-    def save(self, *args, **kwargs):
-        self.price = self.equipment.current_price * self.quantity
-        super().save(*args, **kwargs)
-
 
 class PurchaseOrderMaterialItem(PurchaseOrderItem):
     material = models.ForeignKey('inventory.VendorMaterial', on_delete=models.CASCADE)
     purchase_order = models.ForeignKey(PurchaseOrder, on_delete=models.CASCADE, related_name='materials')
 
+    item_field = 'material'
+
     def __str__(self):
         return f'{self.material} ({self.quantity})'
 
-    def save(self, *args, **kwargs):
-        self.price = self.material.current_price * self.quantity
-        super().save(*args, **kwargs)
@@ -0,0 +1,43 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class SearchDocument(models.Model):
+    """The searchable text of a material, equipment item, customer or target, kept current by the search service."""
+
+    class DocumentType(models.TextChoices):
+        MATERIAL = 'material', _('Material')
+        EQUIPMENT_ITEM = 'equipment_item', _('Equipment Item')
+        CUSTOMER = 'customer', _('Customer')
+        TARGET = 'target', _('Target')
+
+    document_type = models.CharField(max_length=32, choices=DocumentType.choices)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+
+    def __str__(self):
+        return f'{self.get_document_type_display()} {self.title}'
+
+    class Meta:
+        verbose_name = _('Search Document')
+        verbose_name_plural = _('Search Documents')
+        unique_together = ('document_type', 'object_id',)
+
+
+class SearchTerm(models.Model):
+    """
+    An entry of the inverted index the search service falls back to where SQLite FTS5 is not available: how often a
+    term occurs in a document, terms of the title weighing more.
+    """
+    term = models.CharField(max_length=64)
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='terms')
+    weight = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f'{self.term} | {self.document}'
+
+    class Meta:
+        verbose_name = _('Search Term')
+        verbose_name_plural = _('Search Terms')
+        unique_together = ('term', 'document',)
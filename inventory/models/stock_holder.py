@@ -0,0 +1,143 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+
+from inventory.utils.fragment_cache import bump_generation
+
+
+class StockHolderQuerySet(models.QuerySet):
+
+    def for_object(self, obj):
+        """Returns the holders of a storage location, vehicle, technician or job site."""
+        return self.filter(**{StockHolder.get_holder_field(type(obj)): obj})
+
+    def sync(self) -> int:
+        """Creates the missing holders and refreshes the denormalized names in bulk, returning the number created."""
+        created = 0
+        for holder_type, field_name in StockHolder.HOLDER_FIELDS.items():
+            model = StockHolder._meta.get_field(field_name).related_model
+            holders = {getattr(holder, f'{field_name}_id'): holder for holder in self.filter(holder_type=holder_type)}
+            missing = []
+            for obj in model._default_manager.all():
+                name = StockHolder.get_holder_name(obj)
+                if obj.pk not in holders:
+                    missing.append(StockHolder(holder_type=holder_type, name=name, **{field_name: obj}))
+                elif holders[obj.pk].name != name:
+                    holders[obj.pk].name = name
+            self.bulk_create(missing)
+            self.bulk_update(holders.values(), ['name'])
+            created += len(missing)
+        bump_generation(StockHolder)
+        return created
+
+
+class StockHolder(models.Model):
+    """
+    Represents anything that can hold stock and take part in a transfer: a storage location, a vehicle, a technician
+    or a job site. The name is denormalized so holders can be listed, searched and ordered without joins.
+    """
+
+    class HolderType(models.TextChoices):
+        STORAGE_LOCATION = 'Storage Location', _('Storage Location')
+        VEHICLE = 'Vehicle', _('Vehicle')
+        TECHNICIAN = 'Technician', _('Technician')
+        JOB_SITE = 'Job Site', _('Job Site')
+
+    HOLDER_FIELDS = {
+        HolderType.STORAGE_LOCATION: 'storage_location',
+        HolderType.VEHICLE: 'vehicle',
+        HolderType.TECHNICIAN: 'technician',
+        HolderType.JOB_SITE: 'job_site',
+    }
+
+    holder_type = models.CharField(verbose_name=_('Holder Type'), max_length=32, choices=HolderType.choices)
+    name = models.CharField(max_length=150, db_index=True)
+    storage_location = models.OneToOneField('inventory.StorageLocation', on_delete=models.CASCADE, null=True,
+                                            blank=True, related_name='stock_holder')
+    vehicle = models.OneToOneField('inventory.Vehicle', on_delete=models.CASCADE, null=True, blank=True,
+                                   related_name='stock_holder')
+    technician = models.OneToOneField('users.User', on_delete=models.CASCADE, null=True, blank=True,
+                                      related_name='stock_holder')
+    job_site = models.OneToOneField('customers.ServiceLocation', on_delete=models.CASCADE, null=True, blank=True,
+                                    related_name='stock_holder')
+
+    objects = StockHolderQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('Stock Holder')
+        verbose_name_plural = _('Stock Holders')
+        ordering = ('holder_type', 'name')
+        indexes = [
+            models.Index(fields=['holder_type', 'name']),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                name='stock_holder_references_one_object',
+                check=(
+                    Q(holder_type='Storage Location', storage_location__isnull=False, vehicle__isnull=True,
+                      technician__isnull=True, job_site__isnull=True)
+                    | Q(holder_type='Vehicle', storage_location__isnull=True, vehicle__isnull=False,
+                        technician__isnull=True, job_site__isnull=True)
+                    | Q(holder_type='Technician', storage_location__isnull=True, vehicle__isnull=True,
+                        technician__isnull=False, job_site__isnull=True)
+                    | Q(holder_type='Job Site', storage_location__isnull=True, vehicle__isnull=True,
+                        technician__isnull=True, job_site__isnull=False)
+                ),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name}'
+
+    @property
+    def holder(self):
+        """The storage location, vehicle, technician or job site this holder stands for."""
+        return getattr(self, self.HOLDER_FIELDS[self.holder_type])
+
+    @property
+    def content_type(self) -> ContentType:
+        field = self._meta.get_field(self.HOLDER_FIELDS[self.holder_type])
+        return ContentType.objects.get_for_model(field.related_model)
+
+    @property
+    def object_id(self) -> int:
+        return getattr(self, f'{self.HOLDER_FIELDS[self.holder_type]}_id')
+
+    @classmethod
+    def get_holder_field(cls, model) -> str:
+        for field_name in cls.HOLDER_FIELDS.values():
+            if issubclass(model, cls._meta.get_field(field_name).related_model):
+                return field_name
+        raise LookupError(f'{model.__name__} cannot hold stock.')
+
+    @classmethod
+    def get_holder_type(cls, model) -> str:
+        field_name = cls.get_holder_field(model)
+        return next(holder_type for holder_type, name in cls.HOLDER_FIELDS.items() if name == field_name)
+
+    @staticmethod
+    def get_holder_name(obj) -> str:
+        if hasattr(obj, 'get_name_or_username'):
+            return obj.get_name_or_username()
+        return f'{obj}'
+
+
+@receiver(post_save, sender='inventory.StorageLocation')
+@receiver(post_save, sender='inventory.Vehicle')
+@receiver(post_save, sender='users.User')
+@receiver(post_save, sender='customers.ServiceLocation')
+def sync_stock_holder(sender, instance, raw=False, **kwargs):
+    """Creates the holder of a new storage location, vehicle, technician or job site and keeps its name current."""
+    if raw:
+        return
+    field_name = StockHolder.get_holder_field(sender)
+    name = StockHolder.get_holder_name(instance)[:150]
+    if StockHolder.objects.filter(**{field_name: instance}).update(name=name):
+        bump_generation(StockHolder)
+    else:
+        StockHolder.objects.create(holder_type=StockHolder.get_holder_type(sender), name=name,
+                                   **{field_name: instance})
+
@@ -0,0 +1,102 @@
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from inventory.exceptions import TransactionError
+from inventory.managers import StockBalanceQuerySet, StockMovementQuerySet
+
+
+class StockMovement(models.Model):
+    """
+        Model for a Stock Movement
+        A stock movement is an append-only ledger entry recording a quantity of an item (either equipment or material)
+        leaving a source holder and/or arriving at a destination holder (e.g. a storage location or a vehicle).
+        Receipts have no source, consumptions have no destination and adjustments have only one of the two.
+    """
+
+    class Reason(models.TextChoices):
+        TRANSFER = 'Transfer', _('Transfer')
+        JOB_CONSUMPTION = 'Job Consumption', _('Job Consumption')
+        PURCHASE_ORDER_RECEIPT = 'Purchase Order Receipt', _('Purchase Order Receipt')
+        ADJUSTMENT = 'Adjustment', _('Adjustment')
+
+    item_type = models.ForeignKey(ContentType, on_delete=models.PROTECT, related_name='stock_movement_items')
+    item_id = models.PositiveIntegerField()
+    item = GenericForeignKey('item_type', 'item_id')
+
+    source_type = models.ForeignKey(ContentType, on_delete=models.PROTECT, related_name='source_stock_movements',
+                                    null=True, blank=True)
+    source_id = models.PositiveIntegerField(null=True, blank=True)
+    source = GenericForeignKey('source_type', 'source_id')
+
+    destination_type = models.ForeignKey(ContentType, on_delete=models.PROTECT,
+                                         related_name='destination_stock_movements', null=True, blank=True)
+    destination_id = models.PositiveIntegerField(null=True, blank=True)
+    destination = GenericForeignKey('destination_type', 'destination_id')
+
+    quantity = models.PositiveIntegerField()
+    reason = models.CharField(verbose_name=_('Reason'), max_length=32, choices=Reason.choices)
+    transfer = models.ForeignKey('inventory.Transfer', on_delete=models.PROTECT, null=True, blank=True,
+                                 related_name='stock_movements')
+    job = models.ForeignKey('orders.Job', on_delete=models.PROTECT, null=True, blank=True,
+                            related_name='stock_movements')
+    purchase_order = models.ForeignKey('inventory.PurchaseOrder', on_delete=models.PROTECT, null=True, blank=True,
+                                       related_name='stock_movements')
+    created_by = models.ForeignKey('users.User', on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='stock_movements')
+    created_at = models.DateTimeField(auto_now_add=True)
+    notes = models.TextField(blank=True)
+
+    objects = StockMovementQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('Stock Movement')
+        verbose_name_plural = _('Stock Movements')
+        ordering = ('-created_at', '-pk')
+        indexes = [
+            models.Index(fields=['item_type', 'item_id']),
+            models.Index(fields=['source_type', 'source_id']),
+            models.Index(fields=['destination_type', 'destination_id']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.reason}: {self.item} ({self.quantity}) from {self.source or "-"} to {self.destination or "-"}'
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise TransactionError(_('Stock movements are append-only and cannot be changed.'))
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise TransactionError(_('Stock movements are append-only and cannot be deleted.'))
+
+
+class StockBalance(models.Model):
+    """
+    Represents the on hand quantity of an item at a holder, materialized from the stock movement ledger.
+    """
+    item_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='stock_balance_items')
+    item_id = models.PositiveIntegerField()
+    item = GenericForeignKey('item_type', 'item_id')
+
+    holder_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='stock_balance_holders')
+    holder_id = models.PositiveIntegerField()
+    holder = GenericForeignKey('holder_type', 'holder_id')
+
+    quantity = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = StockBalanceQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('Stock Balance')
+        verbose_name_plural = _('Stock Balances')
+        unique_together = ['item_type', 'item_id', 'holder_type', 'holder_id']
+        indexes = [
+            models.Index(fields=['holder_type', 'holder_id']),
+        ]
+
+    def __str__(self):
+        return f'{self.item} @ {self.holder} ({self.quantity})'
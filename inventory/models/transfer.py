@@ -1,16 +1,28 @@
-from django.contrib.contenttypes.fields import GenericForeignKey
-from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
+from inventory.models.stock_holder import StockHolder
+
+
+class TransferQuerySet(models.QuerySet):
+
+    def prefetch_holders(self):
+        """
+        Joins the source and destination holders and prefetches the storage locations, vehicles, technicians and job
+        sites behind them, with one query per side and holder type that actually occurs.
+        """
+        return self.select_related('source', 'destination').prefetch_related(*[
+            f'{side}__{field_name}' for side in ('source', 'destination')
+            for field_name in StockHolder.HOLDER_FIELDS.values()])
+
 
 class Transfer(models.Model):
     """
         Model for a Transfer
         A transfer represents the movement of a quantity of an item (either equipment or material)
-        from a source location (e.g. a technician, a vehicle, or a stock location) to a destination location.
+        from a source holder (e.g. a technician, a vehicle, or a stock location) to a destination holder.
     """
 
     class TransferStatus(models.TextChoices):
@@ -19,13 +31,10 @@ class Transfer(models.Model):
         IN_TRANSIT = 'In Transit', _('In Transit')
         COMPLETED = 'Completed', _('Completed')
 
-    source_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='source_transfers')
-    source_id = models.PositiveIntegerField()
-    source = GenericForeignKey('source_type', 'source_id')
-
-    destination_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name='destination_transfers')
-    destination_id = models.PositiveIntegerField()
-    destination = GenericForeignKey('destination_type', 'destination_id')
+    source = models.ForeignKey('inventory.StockHolder', verbose_name=_('Source'), on_delete=models.PROTECT,
+                               related_name='outgoing_transfers')
+    destination = models.ForeignKey('inventory.StockHolder', verbose_name=_('Destination'), on_delete=models.PROTECT,
+                                    related_name='incoming_transfers')
     release_agent = models.ForeignKey('users.User', verbose_name=_('Release Agent'), on_delete=models.CASCADE, related_name='release_agent')
     transfer_agent = models.ForeignKey('users.User', verbose_name=_('Transfer Agent'), on_delete=models.CASCADE, related_name='transfer_agent')
     status = models.CharField(verbose_name=_('Transfer Status'), max_length=16, choices=TransferStatus.choices,
@@ -35,6 +44,8 @@ class Transfer(models.Model):
     notes = models.TextField(verbose_name=_('Transfer Notes'), blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = TransferQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('Transfer')
         verbose_name_plural = _('Transfers')
@@ -79,7 +90,7 @@ class TransferMaterialItem(models.Model):
 
 class TransferAcceptance(models.Model):
     transfer = models.ForeignKey(Transfer, on_delete=models.CASCADE)
-    accepted_by = models.ForeignKey('users.User', on_delete=models.CASCADE)
+    accepted_by = models.ForeignKey('users.User', on_delete=models.CASCADE, null=True, blank=True)
     accepted_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -99,7 +110,12 @@ class TransferItemAcceptance(models.Model):
         verbose_name_plural = _('Transfer Item Acceptances')
 
 
+def create_transfer_acceptances(transfers) -> list[TransferAcceptance]:
+    """Creates the pending acceptance of every transfer with a single INSERT."""
+    return TransferAcceptance.objects.bulk_create(TransferAcceptance(transfer=transfer) for transfer in transfers)
+
+
 @receiver(post_save, sender=Transfer)
 def create_transfer_acceptance(sender, instance, created, **kwargs):
     if created:
-        TransferAcceptance.objects.create(transfer=instance)
+        create_transfer_acceptances([instance])
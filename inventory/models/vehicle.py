@@ -2,6 +2,8 @@ from django.db import models
 from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
 
+from inventory.models.asset_requirement_category import EquipmentItemRequirement, MaterialRequirement
+
 
 class Vehicle(models.Model):
     """A vehicle that can hold equipment and materials"""
@@ -32,12 +34,12 @@ class Vehicle(models.Model):
         return f'{self.name} ({self.license_plate})'
 
     def get_vehicle_materials_with_requirements(self):
-        # TODO Define this method
-        ...
+        """Returns the material requirements of the vehicle annotated with on_hand, shortfall and surplus."""
+        return MaterialRequirement.objects.for_vehicles([self]).select_related('material')
 
     def get_vehicle_equipment_items_with_requirements(self):
-        # TODO Define this method
-        ...
+        """Returns the equipment item requirements of the vehicle annotated with on_hand, shortfall and surplus."""
+        return EquipmentItemRequirement.objects.for_vehicles([self]).select_related('equipment_item__equipment')
 
     class Meta:
         verbose_name = _('Vehicle')
@@ -2,6 +2,8 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 
+from inventory.managers import VendorEquipmentQuerySet, VendorMaterialQuerySet
+
 
 class Vendor(models.Model):
     """A person, company, or organization that sells goods."""
@@ -33,8 +35,12 @@ class VendorItem(models.Model):
 
     @property
     def current_price(self):
+        """Returns today's price, reusing the effective_price annotation of with_effective_price() made for today."""
         current_date = timezone.now().date()
-        if self.promo_start_date and self.promo_end_date and self.promo_start_date <= current_date <= self.promo_end_date:
+        if getattr(self, 'effective_price_date', None) == current_date:
+            return self.effective_price
+        if (self.promo_start_date and self.promo_end_date and self.promo_unit_price is not None
+                and self.promo_start_date <= current_date <= self.promo_end_date):
             return self.promo_unit_price
         else:
             return self.unit_price
@@ -49,6 +55,8 @@ class VendorMaterial(VendorItem):
 
     material = models.ForeignKey('inventory.Material', on_delete=models.CASCADE, verbose_name=_('material'))
 
+    objects = VendorMaterialQuerySet.as_manager()
+
     def __str__(self):
         return f'{self.material.name} ({self.sku})'
 
@@ -63,6 +71,8 @@ class VendorEquipment(VendorItem):
 
     equipment = models.ForeignKey('inventory.Equipment', on_delete=models.CASCADE, verbose_name=_('equipment'))
 
+    objects = VendorEquipmentQuerySet.as_manager()
+
     def __str__(self):
         return f'{self.equipment.name} ({self.sku})'
 
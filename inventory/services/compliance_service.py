@@ -0,0 +1,32 @@
+from inventory.models.asset_requirement_category import EquipmentItemRequirement, MaterialRequirement
+from inventory.models.vehicle import Vehicle
+
+
+class VehicleComplianceService:
+    """
+    Compares what every vehicle of a fleet holds against the requirements of its asset requirement category.
+    The report takes three queries whatever the number of vehicles.
+    """
+
+    @staticmethod
+    def get_report(vehicles=None) -> list[dict]:
+        """Returns per vehicle the shortfall and surplus of every required material and equipment item."""
+        vehicles = Vehicle.objects.all() if vehicles is None else vehicles
+        report = {
+            vehicle['id']: {**vehicle, 'compliant': True, 'materials': [], 'equipment_items': []}
+            for vehicle in vehicles.order_by('pk').values('id', 'name', 'license_plate', 'asset_requirement_category')
+        }
+        requirements = (
+            ('materials', MaterialRequirement.objects.for_vehicles(vehicles).values(
+                'vehicle_id', 'material_id', 'material__name', 'minimum_amount', 'maximum_amount', 'on_hand',
+                'shortfall', 'surplus')),
+            ('equipment_items', EquipmentItemRequirement.objects.for_vehicles(vehicles).values(
+                'vehicle_id', 'equipment_item_id', 'equipment_item__serial_number', 'minimum_amount',
+                'maximum_amount', 'on_hand', 'shortfall', 'surplus')),
+        )
+        for key, rows in requirements:
+            for row in rows:
+                vehicle = report[row.pop('vehicle_id')]
+                vehicle[key].append(row)
+                vehicle['compliant'] = vehicle['compliant'] and not (row['shortfall'] or row['surplus'])
+        return list(report.values())
@@ -0,0 +1,132 @@
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Greatest
+
+from inventory.models.purchase_order import PurchaseOrder, PurchaseOrderMaterialItem
+from inventory.models.stock_holder import StockHolder
+from inventory.models.storage_location import MaterialStock
+from inventory.models.vehicle import VehicleMaterial
+from inventory.models.vendor import VendorMaterial
+from inventory.services.stock_ledger_service import BATCH_SIZE
+from inventory.utils.fragment_cache import bump_generation
+
+OPEN_STATUSES = (
+    PurchaseOrder.Status.NEW,
+    PurchaseOrder.Status.AWAITING_INTERNAL_APPROVAL,
+    PurchaseOrder.Status.AWAITING_VENDOR_APPROVAL,
+    PurchaseOrder.Status.INTERNALLY_APPROVED,
+    PurchaseOrder.Status.VENDOR_ACCEPTED,
+)
+
+# The largest quantity and price (7 digits, 2 of them decimals) a purchase order line can hold, larger orders are
+# split over several lines
+MAX_LINE_QUANTITY = 999
+MAX_LINE_PRICE = Decimal('99999.99')
+
+
+@dataclass
+class ReplenishmentPlan:
+    """The quantity to order per vendor offer, and the materials no available vendor offers."""
+    orders: dict[int, list[tuple[VendorMaterial, int]]] = field(default_factory=lambda: defaultdict(list))
+    unsourced: dict[int, int] = field(default_factory=dict)
+
+
+class ReplenishmentService:
+    """
+    Drafts purchase orders for the materials held below their minimum quantity by storage locations and vehicles.
+    Every step runs as a handful of aggregate queries over all holders, whatever the number of materials.
+    """
+
+    def __init__(self, user=None):
+        self.user = user
+
+    @staticmethod
+    def get_shortages():
+        """
+        Returns the material stocks and vehicle materials below their minimum quantity, with the quantity that brings
+        them back to their maximum, as one union query.
+        """
+        fields = ('holder_type', 'holder_id', 'material_id', 'quantity', 'minimum', 'maximum', 'suggested')
+        storage_locations = MaterialStock.objects.filter(quantity__lt=F('min_quantity')).annotate(
+            holder_type=Value(StockHolder.HolderType.STORAGE_LOCATION), holder_id=F('storage_location_id'),
+            minimum=F('min_quantity'), maximum=F('max_quantity'),
+            suggested=Greatest(F('max_quantity'), F('min_quantity')) - F('quantity'),
+        ).values_list(*fields)
+        vehicles = VehicleMaterial.objects.filter(quantity__lt=F('minimum_quantity')).annotate(
+            holder_type=Value(StockHolder.HolderType.VEHICLE), holder_id=F('vehicle_id'),
+            minimum=F('minimum_quantity'), maximum=F('maximum_quantity'),
+            suggested=Greatest(F('maximum_quantity'), F('minimum_quantity')) - F('quantity'),
+        ).values_list(*fields)
+        return storage_locations.union(vehicles, all=True)
+
+    @staticmethod
+    def get_requirements() -> dict[int, int]:
+        """Sums the suggested quantities per material over all holders, less what is already on open orders."""
+        requirements = defaultdict(int)
+        for queryset, minimum, maximum in ((MaterialStock.objects, 'min_quantity', 'max_quantity'),
+                                           (VehicleMaterial.objects, 'minimum_quantity', 'maximum_quantity')):
+            for material_id, suggested in queryset.filter(quantity__lt=F(minimum)).values('material_id').annotate(
+                    suggested=Sum(Greatest(F(maximum), F(minimum)) - F('quantity'))).values_list(
+                    'material_id', 'suggested'):
+                requirements[material_id] += suggested
+        if not requirements:
+            return {}
+        on_order = PurchaseOrderMaterialItem.objects.filter(
+            purchase_order__status__in=OPEN_STATUSES, received_quantity__lt=F('quantity'),
+            material__material_id__in=requirements,
+        ).values('material__material_id').annotate(
+            outstanding=Sum(F('quantity') - F('received_quantity'))).values_list('material__material_id', 'outstanding')
+        for material_id, outstanding in on_order:
+            requirements[material_id] -= outstanding
+        return {material_id: math.ceil(quantity) for material_id, quantity in requirements.items() if quantity > 0}
+
+    def plan(self, date=None) -> ReplenishmentPlan:
+        """Assigns each required material to its cheapest available offer, then its shortest delivery time."""
+        plan = ReplenishmentPlan()
+        requirements = self.get_requirements()
+        if not requirements:
+            return plan
+        offers = {offer.material_id: offer for offer in VendorMaterial.objects.best_offers(
+            items=list(requirements), date=date)}
+        for material_id, quantity in requirements.items():
+            if material_id in offers:
+                plan.orders[offers[material_id].vendor_id].append((offers[material_id], quantity))
+            else:
+                plan.unsourced[material_id] = quantity
+        return plan
+
+    def draft_purchase_orders(self, date=None) -> tuple[list[PurchaseOrder], ReplenishmentPlan]:
+        """Creates one new purchase order per vendor of the plan with all of its lines in bulk."""
+        plan = self.plan(date)
+        if not plan.orders:
+            return [], plan
+        with transaction.atomic():
+            purchase_orders = PurchaseOrder.objects.bulk_create([
+                PurchaseOrder(vendor_id=vendor_id, created_by=self.user) for vendor_id in plan.orders
+            ], batch_size=BATCH_SIZE)
+            PurchaseOrderMaterialItem.objects.bulk_create([
+                PurchaseOrderMaterialItem(purchase_order=purchase_order, material=offer, quantity=line_quantity,
+                                          received_quantity=0, price=offer.effective_price * line_quantity)
+                for purchase_order, lines in zip(purchase_orders, plan.orders.values())
+                for offer, quantity in lines
+                for line_quantity in self._split(quantity, self.get_max_line_quantity(offer))
+            ], batch_size=BATCH_SIZE)
+        bump_generation(PurchaseOrder, PurchaseOrderMaterialItem)
+        return purchase_orders, plan
+
+    @staticmethod
+    def get_max_line_quantity(offer: VendorMaterial) -> int:
+        """The largest quantity of the offer a line holds without its price overflowing the price column."""
+        if offer.effective_price <= 0:
+            return MAX_LINE_QUANTITY
+        return max(min(MAX_LINE_QUANTITY, int(MAX_LINE_PRICE // offer.effective_price)), 1)
+
+    @staticmethod
+    def _split(quantity: int, line_quantity: int) -> list[int]:
+        full, rest = divmod(quantity, line_quantity)
+        return [line_quantity] * full + ([rest] if rest else [])
@@ -0,0 +1,278 @@
+import functools
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from common.models.target import Target
+from customers.models.customer import Customer
+from inventory.models.equipment import Equipment, EquipmentItem
+from inventory.models.material import Material, MaterialField
+from inventory.models.search import SearchDocument, SearchTerm
+
+DocumentType = SearchDocument.DocumentType
+
+FTS_TABLE = 'inventory_searchdocument_fts'
+TITLE_WEIGHT = 10
+BATCH_SIZE = 500
+WORD = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> list[str]:
+    """Splits text into lower case words without diacritics, the way the FTS5 unicode61 tokenizer does."""
+    text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return [word[:64] for word in WORD.findall(text.lower())]
+
+
+def get_phone_text(phone_number) -> str:
+    """Returns a phone number as dialed internationally and nationally, so either form finds it."""
+    if not phone_number:
+        return ''
+    if not phone_number.is_valid():
+        return str(phone_number)
+    return f'{phone_number.as_e164} {phone_number.national_number}'
+
+
+def get_material_documents(pks):
+    values = defaultdict(list)
+    for material_id, value in MaterialField.objects.filter(material__in=pks).values_list('material', 'value'):
+        values[material_id].append(value)
+    for material in Material.objects.filter(pk__in=pks).only('name', 'description'):
+        yield material.pk, material.name, ' '.join([material.description, *values[material.pk]])
+
+
+def get_equipment_item_documents(pks):
+    for item in EquipmentItem.objects.filter(pk__in=pks).select_related('equipment').only(
+            'serial_number', 'notes', 'equipment__name'):
+        yield item.pk, item.serial_number, ' '.join([item.equipment.name or '', item.notes])
+
+
+def get_customer_documents(pks):
+    for customer in Customer.objects.filter(pk__in=pks).only(
+            'first_name', 'last_name', 'company_name', 'email', 'phone_number'):
+        yield customer.pk, customer.name, ' '.join([
+            customer.first_name, customer.last_name, customer.company_name, customer.email,
+            get_phone_text(customer.phone_number)])
+
+
+def get_target_documents(pks):
+    for target in Target.objects.filter(pk__in=pks).only('name', 'description'):
+        yield target.pk, target.name, target.description
+
+
+SOURCES = {
+    DocumentType.MATERIAL: (Material, get_material_documents),
+    DocumentType.EQUIPMENT_ITEM: (EquipmentItem, get_equipment_item_documents),
+    DocumentType.CUSTOMER: (Customer, get_customer_documents),
+    DocumentType.TARGET: (Target, get_target_documents),
+}
+
+
+@functools.cache
+def has_fts5(using: str = DEFAULT_DB_ALIAS) -> bool:
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+class Fts5Index:
+    """Keeps the documents in an SQLite FTS5 table whose rowids are those of the documents, ranked by BM25."""
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS):
+        self.using = using
+
+    def create(self):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                           f"title, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3')")
+
+    def add(self, documents: list[SearchDocument]):
+        with connections[self.using].cursor() as cursor:
+            cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+                               [(document.pk, document.title, document.body) for document in documents])
+
+    def remove(self, document_ids: list[int]):
+        with connections[self.using].cursor() as cursor:
+            for start in range(0, len(document_ids), BATCH_SIZE):
+                batch = document_ids[start:start + BATCH_SIZE]
+                cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({", ".join(["%s"] * len(batch))})', batch)
+
+    def clear(self):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    def search(self, tokens: list[str], document_types: list[str], limit: int) -> list[tuple[int, float]]:
+        # Every word must match, as a prefix so that partial words typed in a search box find their documents
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        type_filter = f'AND d.document_type IN ({", ".join(["%s"] * len(document_types))})' if document_types else ''
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f'SELECT f.rowid, -bm25({FTS_TABLE}, {TITLE_WEIGHT}, 1) AS score FROM {FTS_TABLE} f '
+                f'JOIN {SearchDocument._meta.db_table} d ON d.id = f.rowid '
+                f'WHERE {FTS_TABLE} MATCH %s {type_filter} ORDER BY score DESC LIMIT %s',
+                [match, *document_types, limit])
+            return cursor.fetchall()
+
+
+class TermIndex:
+    """
+    Keeps an inverted index of the documents in the SearchTerm table, tokenized and ranked in Python by the weight of
+    the matching terms and their rarity among the documents.
+    """
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS):
+        self.using = using
+
+    def create(self):
+        pass
+
+    def add(self, documents: list[SearchDocument]):
+        terms = []
+        for document in documents:
+            weights = Counter(tokenize(document.body))
+            for token in tokenize(document.title):
+                weights[token] += TITLE_WEIGHT
+            terms.extend(SearchTerm(term=term, document_id=document.pk, weight=weight)
+                         for term, weight in weights.items())
+        SearchTerm.objects.using(self.using).bulk_create(terms, batch_size=BATCH_SIZE)
+
+    def remove(self, document_ids: list[int]):
+        SearchTerm.objects.using(self.using).filter(document__in=document_ids).delete()
+
+    def clear(self):
+        SearchTerm.objects.using(self.using).all().delete()
+
+    def search(self, tokens: list[str], document_types: list[str], limit: int) -> list[tuple[int, float]]:
+        terms = SearchTerm.objects.using(self.using)
+        if document_types:
+            terms = terms.filter(document__document_type__in=document_types)
+        total = SearchDocument.objects.using(self.using).count() or 1
+        scores = None
+        for token in tokens:
+            # A range instead of startswith, so the prefix is looked up in the index of the terms
+            weights = defaultdict(int)
+            for document_id, weight in terms.filter(term__gte=token, term__lt=token + '\uffff').values_list(
+                    'document', 'weight'):
+                weights[document_id] += weight
+            rarity = math.log(1 + total / (len(weights) or 1))
+            token_scores = {document_id: weight * rarity for document_id, weight in weights.items()}
+            scores = token_scores if scores is None else {
+                document_id: score + token_scores[document_id]
+                for document_id, score in scores.items() if document_id in token_scores}
+        return sorted((scores or {}).items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+class SearchService:
+    """
+    Maintains the search documents of materials with their field values, equipment items, customers and targets,
+    and ranks them against a query. The index is an SQLite FTS5 table where the database has FTS5, and an inverted
+    index built in Python otherwise, or as SEARCH_BACKEND chooses.
+    """
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS):
+        self.using = using
+        backend = settings.SEARCH_BACKEND
+        if backend == 'auto':
+            backend = 'fts5' if has_fts5(using) else 'terms'
+        self.index = Fts5Index(using) if backend == 'fts5' else TermIndex(using)
+
+    def update(self, document_type: str, pks):
+        """Indexes the objects of the type again, dropping those that no longer exist."""
+        pks = list(pks)
+        _, get_documents = SOURCES[document_type]
+        with transaction.atomic(using=self.using, savepoint=False):
+            existing = list(SearchDocument.objects.using(self.using).filter(
+                document_type=document_type, object_id__in=pks).values_list('pk', flat=True))
+            if existing:
+                self.index.remove(existing)
+                SearchDocument.objects.using(self.using).filter(pk__in=existing).delete()
+            documents = SearchDocument.objects.using(self.using).bulk_create([
+                SearchDocument(document_type=document_type, object_id=pk, title=title[:255], body=body)
+                for pk, title, body in get_documents(pks)
+            ], batch_size=BATCH_SIZE)
+            if documents and not all(document.pk for document in documents):
+                # Databases that cannot return the inserted ids need them read back
+                documents = list(SearchDocument.objects.using(self.using).filter(
+                    document_type=document_type, object_id__in=pks))
+            self.index.add(documents)
+
+    def rebuild(self) -> int:
+        """Indexes every object of every type from scratch, returning the number of documents."""
+        with transaction.atomic(using=self.using):
+            self.index.create()
+            self.index.clear()
+            SearchDocument.objects.using(self.using).all().delete()
+            for document_type, (model, _) in SOURCES.items():
+                pks = list(model._default_manager.using(self.using).values_list('pk', flat=True))
+                for start in range(0, len(pks), BATCH_SIZE):
+                    self.update(document_type, pks[start:start + BATCH_SIZE])
+        return SearchDocument.objects.using(self.using).count()
+
+    def search(self, query: str, document_types: list[str] | None = None, limit: int = 20) -> list[dict]:
+        """Returns the documents matching every word of the query as typed hits, the best ranked first."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        ranked = self.index.search(tokens, document_types or [], limit)
+        documents = SearchDocument.objects.using(self.using).in_bulk([document_id for document_id, _ in ranked])
+        return [{
+            'type': documents[document_id].document_type,
+            'id': documents[document_id].object_id,
+            'title': documents[document_id].title,
+            'score': round(score, 6),
+        } for document_id, score in ranked if document_id in documents]
+
+
+def update_search_documents(document_type: str, pks):
+    def update():
+        SearchService().update(document_type, pks)
+
+    transaction.on_commit(update)
+
+
+@receiver(post_save, sender=Material)
+@receiver(post_delete, sender=Material)
+@receiver(post_save, sender=EquipmentItem)
+@receiver(post_delete, sender=EquipmentItem)
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+@receiver(post_save, sender=Target)
+@receiver(post_delete, sender=Target)
+def update_object_search_document(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    document_type = next(document_type for document_type, (model, _) in SOURCES.items() if model is sender)
+    update_search_documents(document_type, [instance.pk])
+
+
+@receiver(post_save, sender=MaterialField)
+@receiver(post_delete, sender=MaterialField)
+def update_material_search_document(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_documents(DocumentType.MATERIAL, [instance.material_id])
+
+
+@receiver(post_save, sender=Equipment)
+def update_equipment_item_search_documents(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        update_search_documents(DocumentType.EQUIPMENT_ITEM, instance.equipmentitem_set.values_list('pk', flat=True))
+
+
+@receiver(post_migrate)
+def create_search_index(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Creates the index and fills it the first time objects exist without documents, as after a restored dump."""
+    if sender.name != 'inventory':
+        return
+    service = SearchService(using)
+    service.index.create()
+    if not SearchDocument.objects.using(using).exists() and any(
+            model._default_manager.using(using).exists() for model, _ in SOURCES.values()):
+        service.rebuild()
@@ -0,0 +1,261 @@
+import operator
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import reduce
+from itertools import islice
+from typing import NamedTuple
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from inventory.exceptions import TransactionError
+from inventory.models.equipment import EquipmentItem
+from inventory.models.material import Material
+from inventory.models.stock_movement import StockBalance, StockMovement
+from inventory.models.storage_location import MaterialStock, StorageLocation
+from inventory.models.vehicle import Vehicle, VehicleEquipmentItem, VehicleMaterial
+from inventory.utils.fragment_cache import bump_generation
+
+
+BATCH_SIZE = 500
+
+
+class BalanceKey(NamedTuple):
+    """Identifies a balance row. The field order is the order in which balance rows are locked."""
+    holder_type_id: int
+    holder_id: int
+    item_type_id: int
+    item_id: int
+
+
+@dataclass(frozen=True)
+class LegacyCounter:
+    """A per holder quantity column that predates the ledger and is kept in sync with the stock balances."""
+    model: type
+    item_field: str
+    holder_field: str
+
+
+LEGACY_COUNTERS = {
+    (Material, StorageLocation): LegacyCounter(MaterialStock, 'material', 'storage_location'),
+    (Material, Vehicle): LegacyCounter(VehicleMaterial, 'material', 'vehicle'),
+    (EquipmentItem, Vehicle): LegacyCounter(VehicleEquipmentItem, 'equipment_item', 'vehicle'),
+}
+
+
+def batched(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def balance_filter(keys: list[BalanceKey]) -> Q:
+    """Builds a filter matching the given balance rows, grouped by holder and item type to keep the SQL compact."""
+    grouped = defaultdict(list)
+    for key in keys:
+        grouped[(key.holder_type_id, key.holder_id, key.item_type_id)].append(key.item_id)
+    return reduce(operator.or_, (
+        Q(holder_type_id=holder_type_id, holder_id=holder_id, item_type_id=item_type_id, item_id__in=item_ids)
+        for (holder_type_id, holder_id, item_type_id), item_ids in grouped.items()
+    ))
+
+
+class StockLedgerService:
+    """
+    Records stock movements and keeps the materialized stock balances up to date in the same transaction.
+    Recording a movement costs a constant number of indexed statements regardless of the size of the ledger.
+    """
+
+    def __init__(self, user=None):
+        self.user = user
+
+    def record(self, item, quantity: int, reason: str, source=None, destination=None, **references) -> StockMovement:
+        """Appends a movement of the item from the source to the destination and applies it to the balances."""
+        movement = StockMovement(item=item, quantity=quantity, reason=reason, source=source,
+                                 destination=destination, **references)
+        return self.record_many([movement])[0]
+
+    def receive(self, item, quantity: int, destination, **references) -> StockMovement:
+        return self.record(item, quantity, StockMovement.Reason.PURCHASE_ORDER_RECEIPT, destination=destination,
+                           **references)
+
+    def consume(self, item, quantity: int, source, **references) -> StockMovement:
+        return self.record(item, quantity, StockMovement.Reason.JOB_CONSUMPTION, source=source, **references)
+
+    def adjust(self, item, holder, quantity: int, **references) -> StockMovement | None:
+        """Records the adjustment needed to bring the balance of the item at the holder to the given quantity."""
+        difference = quantity - StockBalance.objects.on_hand(item, holder)
+        if difference > 0:
+            return self.record(item, difference, StockMovement.Reason.ADJUSTMENT, destination=holder, **references)
+        if difference < 0:
+            return self.record(item, -difference, StockMovement.Reason.ADJUSTMENT, source=holder, **references)
+        return None
+
+    def record_many(self, movements: list[StockMovement]) -> list[StockMovement]:
+        """
+        Appends the movements to the ledger and applies their net effect to the balances in one transaction.
+        The number of statements depends on the number of distinct holders, not on the number of movements.
+        """
+        deltas = defaultdict(int)
+        for movement in movements:
+            if movement.quantity <= 0:
+                raise TransactionError(_('The quantity of a stock movement must be positive.'))
+            if movement.source_type_id is None and movement.destination_type_id is None:
+                raise TransactionError(_('A stock movement requires a source or a destination.'))
+            if movement.created_by_id is None:
+                movement.created_by = self.user
+            if movement.source_type_id is not None:
+                deltas[BalanceKey(movement.source_type_id, movement.source_id, movement.item_type_id,
+                                  movement.item_id)] -= movement.quantity
+            if movement.destination_type_id is not None:
+                deltas[BalanceKey(movement.destination_type_id, movement.destination_id, movement.item_type_id,
+                                  movement.item_id)] += movement.quantity
+        with transaction.atomic():
+            self.apply_deltas(deltas)
+            StockMovement.objects.bulk_create(movements, batch_size=BATCH_SIZE)
+        bump_generation(StockMovement)
+        return movements
+
+    def apply_deltas(self, deltas: dict['BalanceKey', int]) -> None:
+        """
+        Locks the affected balance rows in a deterministic order (holder content type, holder id, item content type,
+        item id) so that concurrent transfers touching the same holders cannot deadlock, then applies every delta
+        with a single UPDATE ... SET quantity = quantity + CASE ... statement per batch. Missing rows are inserted
+        empty, ignoring those a concurrent transaction inserted first, and locked before the deltas are applied.
+        """
+        deltas = {key: delta for key, delta in sorted(deltas.items()) if delta}
+        if not deltas:
+            return
+        balances = self._lock_balances(list(deltas))
+
+        shortages = [key for key, delta in deltas.items() if delta < 0 and balances.get(key, (None, 0))[1] < -delta]
+        if shortages:
+            raise TransactionError(_('Insufficient stock for %(count)s item(s) at their source.') % {
+                'count': len(shortages)})
+
+        missing = [key for key in deltas if key not in balances]
+        if missing:
+            StockBalance.objects.bulk_create(
+                [StockBalance(item_type_id=key.item_type_id, item_id=key.item_id, holder_type_id=key.holder_type_id,
+                              holder_id=key.holder_id, quantity=0) for key in missing],
+                batch_size=BATCH_SIZE, ignore_conflicts=True,
+            )
+            balances.update(self._lock_balances(missing))
+
+        existing = {balances[key][0]: delta for key, delta in deltas.items()}
+        for batch in batched(list(existing.items()), BATCH_SIZE):
+            StockBalance.objects.filter(pk__in=[pk for pk, _delta in batch]).update(
+                quantity=F('quantity') + Case(*[When(pk=pk, then=Value(delta)) for pk, delta in batch],
+                                              output_field=IntegerField()),
+                updated_at=timezone.now(),
+            )
+        bump_generation(StockBalance)
+        self._apply_legacy_deltas(deltas)
+
+    @staticmethod
+    def _lock_balances(keys: list[BalanceKey]) -> dict[BalanceKey, tuple[int, int]]:
+        """Locks the existing balance rows of the keys in key order and returns their pk and quantity."""
+        balances = {}
+        for batch in batched(keys, BATCH_SIZE):
+            locked = StockBalance.objects.select_for_update().filter(balance_filter(batch)).order_by(
+                'holder_type_id', 'holder_id', 'item_type_id', 'item_id')
+            for pk, holder_type_id, holder_id, item_type_id, item_id, quantity in locked.values_list(
+                    'pk', 'holder_type_id', 'holder_id', 'item_type_id', 'item_id', 'quantity'):
+                balances[BalanceKey(holder_type_id, holder_id, item_type_id, item_id)] = (pk, quantity)
+        return balances
+
+    @staticmethod
+    def _get_legacy_counter(item_type_id: int, holder_type_id: int) -> LegacyCounter | None:
+        item_model = ContentType.objects.get_for_id(item_type_id).model_class()
+        holder_model = ContentType.objects.get_for_id(holder_type_id).model_class()
+        return LEGACY_COUNTERS.get((item_model, holder_model))
+
+    def _apply_legacy_deltas(self, deltas: dict['BalanceKey', int]) -> None:
+        """Mirrors the deltas onto the legacy counters with one UPDATE per counter table and batch."""
+        grouped = defaultdict(list)
+        for key, delta in deltas.items():
+            counter = self._get_legacy_counter(key.item_type_id, key.holder_type_id)
+            if counter is not None:
+                grouped[counter].append((key, delta))
+        for counter, counter_deltas in grouped.items():
+            item_field, holder_field = f'{counter.item_field}_id', f'{counter.holder_field}_id'
+            for batch in batched(counter_deltas, BATCH_SIZE):
+                conditions = [Q(**{item_field: key.item_id, holder_field: key.holder_id}) for key, _delta in batch]
+                counter.model.objects.filter(reduce(operator.or_, conditions)).update(
+                    quantity=F('quantity') + Case(*[When(condition, then=Value(delta))
+                                                    for condition, (_key, delta) in zip(conditions, batch)],
+                                                  output_field=IntegerField())
+                )
+            bump_generation(counter.model)
+
+    @staticmethod
+    def get_ledger_totals() -> dict[tuple[int, int, int, int], int]:
+        """Sums the ledger per (item type, item, holder type, holder) with one aggregate query per side."""
+        totals = defaultdict(int)
+        for side, sign in (('destination', 1), ('source', -1)):
+            rows = StockMovement.objects.filter(**{f'{side}_type__isnull': False}).order_by().values(
+                'item_type_id', 'item_id', f'{side}_type_id', f'{side}_id').annotate(total=Sum('quantity'))
+            for row in rows.values_list('item_type_id', 'item_id', f'{side}_type_id', f'{side}_id', 'total'):
+                totals[row[:4]] += sign * row[4]
+        return totals
+
+    @transaction.atomic
+    def seed_from_legacy_counters(self, batch_size: int = 1000) -> int:
+        """
+        Records the adjustments that bring the ledger to the quantities of the legacy counters, then rebuilds the
+        balances from it. Run once on a database that held stock before the ledger, it keeps that stock from being
+        zeroed by the first rebuild and rejected as insufficient by the first transfer. Counters that already
+        agree with the ledger are skipped, so running it again records nothing. Returns the number of adjustments.
+        """
+        totals = self.get_ledger_totals()
+        movements = []
+        for (item_model, holder_model), counter in LEGACY_COUNTERS.items():
+            item_type = ContentType.objects.get_for_model(item_model)
+            holder_type = ContentType.objects.get_for_model(holder_model)
+            rows = counter.model.objects.values_list(f'{counter.item_field}_id', f'{counter.holder_field}_id',
+                                                     'quantity')
+            for item_id, holder_id, quantity in rows:
+                difference = quantity - totals.get((item_type.pk, item_id, holder_type.pk, holder_id), 0)
+                if not difference:
+                    continue
+                holder = {'destination_type': holder_type, 'destination_id': holder_id} if difference > 0 else {
+                    'source_type': holder_type, 'source_id': holder_id}
+                movements.append(StockMovement(
+                    item_type=item_type, item_id=item_id, quantity=abs(difference),
+                    reason=StockMovement.Reason.ADJUSTMENT, created_by=self.user,
+                    notes='Opening balance from the stock counters that predate the ledger', **holder))
+        StockMovement.objects.bulk_create(movements, batch_size=batch_size)
+        bump_generation(StockMovement)
+        self.rebuild_balances(batch_size)
+        return len(movements)
+
+    @transaction.atomic
+    def rebuild_balances(self, batch_size: int = 1000) -> int:
+        """Recomputes every stock balance from the ledger in one bulk pass and returns the number of balances."""
+        totals = self.get_ledger_totals()
+        StockBalance.objects.all().delete()
+        StockBalance.objects.bulk_create(
+            [StockBalance(item_type_id=item_type_id, item_id=item_id, holder_type_id=holder_type_id,
+                          holder_id=holder_id, quantity=quantity)
+             for (item_type_id, item_id, holder_type_id, holder_id), quantity in totals.items() if quantity > 0],
+            batch_size=batch_size,
+        )
+        bump_generation(StockBalance)
+        self.sync_legacy_counters()
+        return StockBalance.objects.count()
+
+    @staticmethod
+    def sync_legacy_counters() -> None:
+        """Overwrites the legacy per holder counters with the materialized balances, one UPDATE per table."""
+        for (item_model, holder_model), counter in LEGACY_COUNTERS.items():
+            balance = StockBalance.objects.filter(
+                item_type=ContentType.objects.get_for_model(item_model), item_id=OuterRef(f'{counter.item_field}_id'),
+                holder_type=ContentType.objects.get_for_model(holder_model),
+                holder_id=OuterRef(f'{counter.holder_field}_id'),
+            ).values('quantity')[:1]
+            counter.model.objects.update(quantity=Coalesce(Subquery(balance), Value(0)))
+            bump_generation(counter.model)
@@ -0,0 +1,198 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from inventory.exceptions import TransactionError
+from inventory.models.equipment import EquipmentItem
+from inventory.models.material import Material
+from inventory.models.stock_holder import StockHolder
+from inventory.models.stock_movement import StockBalance, StockMovement
+from inventory.models.transfer import Transfer, TransferAcceptance, TransferEquipmentItem, TransferMaterialItem, \
+    create_transfer_acceptances
+from inventory.services.stock_ledger_service import BalanceKey, StockLedgerService, balance_filter, batched, \
+    BATCH_SIZE
+from inventory.utils.fragment_cache import bump_generation
+
+User = get_user_model()
+
+
+class TransferService:
+    """
+    Executes transfers by moving the quantities of their material and equipment lines from the source holder to the
+    destination holder. All lines of a transfer are applied in one transaction or not at all.
+    """
+
+    def __init__(self, user=None):
+        self.user = user
+        self.ledger = StockLedgerService(user=user)
+
+    def get_movements(self, transfer: Transfer) -> list[StockMovement]:
+        """Builds one ledger movement per transfer line without loading the transferred items."""
+        material_type_id = ContentType.objects.get_for_model(Material).pk
+        equipment_item_type_id = ContentType.objects.get_for_model(EquipmentItem).pk
+        lines = [
+            *((material_type_id, item_id, quantity) for item_id, quantity in
+              TransferMaterialItem.objects.filter(transfer=transfer).values_list('material_item_id', 'quantity')),
+            *((equipment_item_type_id, item_id, quantity) for item_id, quantity in
+              TransferEquipmentItem.objects.filter(transfer=transfer).values_list('equipment_item_id', 'quantity')),
+        ]
+        source, destination = transfer.source, transfer.destination
+        return [
+            StockMovement(item_type_id=item_type_id, item_id=item_id, quantity=quantity,
+                          reason=StockMovement.Reason.TRANSFER, transfer=transfer,
+                          source_type=source.content_type, source_id=source.object_id,
+                          destination_type=destination.content_type, destination_id=destination.object_id)
+            for item_type_id, item_id, quantity in lines if quantity
+        ]
+
+    def complete(self, transfer: Transfer | int) -> Transfer:
+        """Completes the transfer, raising a TransactionError when it is already completed or stock is missing."""
+        pk = transfer.pk if isinstance(transfer, Transfer) else transfer
+        with transaction.atomic():
+            transfer = Transfer.objects.select_for_update().select_related('source', 'destination').get(pk=pk)
+            if transfer.status == Transfer.TransferStatus.COMPLETED:
+                raise TransactionError(_('Transfer %(pk)s has already been completed.') % {'pk': transfer.pk})
+            movements = self.get_movements(transfer)
+            self.ledger.record_many(movements)
+            equipment_item_type_id = ContentType.objects.get_for_model(EquipmentItem).pk
+            self._update_equipment_items(transfer, [movement.item_id for movement in movements
+                                                    if movement.item_type_id == equipment_item_type_id])
+            transfer.status = Transfer.TransferStatus.COMPLETED
+            transfer.end_date = timezone.now()
+            transfer.start_date = transfer.start_date or transfer.end_date
+            transfer.save(update_fields=['status', 'start_date', 'end_date'])
+        return transfer
+
+    @staticmethod
+    def _update_equipment_items(transfer: Transfer, equipment_item_ids: list[int]) -> None:
+        """Moves the transferred equipment items to the destination with a single UPDATE."""
+        if not equipment_item_ids:
+            return
+        equipment_items = EquipmentItem.objects.filter(pk__in=equipment_item_ids)
+        if transfer.destination.holder_type == StockHolder.HolderType.STORAGE_LOCATION:
+            equipment_items.update(status=EquipmentItem.Status.STORED,
+                                   storage_location_id=transfer.destination.storage_location_id)
+        else:
+            equipment_items.update(status=EquipmentItem.Status.PICKED_UP)
+        bump_generation(EquipmentItem)
+
+    def create_many(self, transfers: list[dict]) -> tuple[list[dict], bool]:
+        """
+        Validates and creates a batch of pending transfers with their material and equipment lines.
+        Each transfer is a dict with source and destination (stock holder ids), release_agent, transfer_agent, notes,
+        materials ([{material, quantity, notes}]) and equipment_items ([{equipment_item, notes}]). Nothing is created
+        unless every transfer and line is valid.
+        Returns the per transfer and per line results and whether the batch was created.
+        """
+        results = self.validate_many(transfers)
+        if any(self._has_errors(result) for result in results):
+            return results, False
+        with transaction.atomic():
+            created = Transfer.objects.bulk_create([
+                Transfer(source_id=data['source'], destination_id=data['destination'],
+                         release_agent_id=data['release_agent'], transfer_agent_id=data['transfer_agent'],
+                         notes=data.get('notes', ''))
+                for data in transfers
+            ], batch_size=BATCH_SIZE)
+            material_items = TransferMaterialItem.objects.bulk_create([
+                TransferMaterialItem(transfer=transfer, material_item_id=line['material'],
+                                     quantity=line['quantity'], notes=line.get('notes', ''))
+                for transfer, data in zip(created, transfers) for line in data.get('materials', [])
+            ], batch_size=BATCH_SIZE)
+            equipment_items = TransferEquipmentItem.objects.bulk_create([
+                TransferEquipmentItem(transfer=transfer, equipment_item_id=line['equipment_item'],
+                                      notes=line.get('notes', ''))
+                for transfer, data in zip(created, transfers) for line in data.get('equipment_items', [])
+            ], batch_size=BATCH_SIZE)
+            create_transfer_acceptances(created)
+        # Bulk inserts send no signals, so the cached partials and validators of the models are invalidated here
+        bump_generation(Transfer, TransferMaterialItem, TransferEquipmentItem, TransferAcceptance)
+        material_items, equipment_items = iter(material_items), iter(equipment_items)
+        for transfer, result in zip(created, results):
+            result['id'] = transfer.pk
+            for line in result['materials']:
+                line['id'] = next(material_items).pk
+            for line in result['equipment_items']:
+                line['id'] = next(equipment_items).pk
+        return results, True
+
+    def validate_many(self, transfers: list[dict]) -> list[dict]:
+        """
+        Checks every transfer of the batch against the database with one query per referenced model plus one
+        for the source stock balances, whatever the size of the batch.
+        """
+        holders = StockHolder.objects.in_bulk({data[side] for data in transfers for side in ('source', 'destination')})
+        existing_users = set(User.objects.filter(
+            pk__in={data[agent] for data in transfers for agent in ('release_agent', 'transfer_agent')}
+        ).values_list('pk', flat=True))
+        existing_materials = set(Material.objects.filter(
+            pk__in={line['material'] for data in transfers for line in data.get('materials', [])}
+        ).values_list('pk', flat=True))
+        existing_equipment_items = set(EquipmentItem.objects.filter(
+            pk__in={line['equipment_item'] for data in transfers for line in data.get('equipment_items', [])}
+        ).values_list('pk', flat=True))
+
+        results = []
+        for data in transfers:
+            result = {'id': None, 'errors': [], 'materials': [], 'equipment_items': []}
+            for side in ('source', 'destination'):
+                if data[side] not in holders:
+                    result['errors'].append(_('The %(side)s stock holder %(pk)s does not exist.') % {
+                        'side': side, 'pk': data[side]})
+            if data['source'] == data['destination']:
+                result['errors'].append(_('The source and destination must be different.'))
+            for agent in ('release_agent', 'transfer_agent'):
+                if data[agent] not in existing_users:
+                    result['errors'].append(_('The user %(pk)s does not exist.') % {'pk': data[agent]})
+            for line in data.get('materials', []):
+                result['materials'].append({'id': None, 'material': line['material'], 'quantity': line['quantity'],
+                                            'errors': [] if line['material'] in existing_materials else [
+                                                _('The material %(pk)s does not exist.') % {'pk': line['material']}]})
+            for line in data.get('equipment_items', []):
+                result['equipment_items'].append({
+                    'id': None, 'equipment_item': line['equipment_item'],
+                    'errors': [] if line['equipment_item'] in existing_equipment_items else [
+                        _('The equipment item %(pk)s does not exist.') % {'pk': line['equipment_item']}]})
+            results.append(result)
+        self._validate_stock(transfers, results, holders)
+        return results
+
+    def _validate_stock(self, transfers: list[dict], results: list[dict], holders: dict[int, StockHolder]) -> None:
+        """Flags every valid line whose source does not hold enough stock for the whole batch."""
+        material_type_id = ContentType.objects.get_for_model(Material).pk
+        equipment_item_type_id = ContentType.objects.get_for_model(EquipmentItem).pk
+        requested = defaultdict(int)
+        lines = []
+        for data, result in zip(transfers, results):
+            source = holders.get(data['source'])
+            if source is None:
+                continue
+            for line_result in (line for line in result['materials'] if not line['errors']):
+                key = BalanceKey(source.content_type.pk, source.object_id, material_type_id, line_result['material'])
+                requested[key] += line_result['quantity']
+                lines.append((key, line_result))
+            for line_result in (line for line in result['equipment_items'] if not line['errors']):
+                key = BalanceKey(source.content_type.pk, source.object_id, equipment_item_type_id,
+                                 line_result['equipment_item'])
+                requested[key] += 1
+                lines.append((key, line_result))
+        if not requested:
+            return
+        on_hand = {}
+        for batch in batched(list(requested), BATCH_SIZE):
+            for *key, quantity in StockBalance.objects.filter(balance_filter(batch)).values_list(
+                    'holder_type_id', 'holder_id', 'item_type_id', 'item_id', 'quantity'):
+                on_hand[BalanceKey(*key)] = quantity
+        for key, line_result in lines:
+            if requested[key] > on_hand.get(key, 0):
+                line_result['errors'].append(_('Insufficient stock: %(requested)s requested, %(on_hand)s on hand.') % {
+                    'requested': requested[key], 'on_hand': on_hand.get(key, 0)})
+
+    @staticmethod
+    def _has_errors(result: dict) -> bool:
+        return bool(result['errors'] or any(line['errors'] for line in result['materials'])
+                    or any(line['errors'] for line in result['equipment_items']))
@@ -0,0 +1,158 @@
+import threading
+from collections import defaultdict
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from selenium.common import NoSuchElementException
+
+from inventory.utils.epa_scraper import Pesticide
+
+LABEL_PDF = b'%PDF-1.4\n%stand-in label\n%%EOF\n'
+
+
+def create_pesticide(registration_number: str, documentation_url: str = '') -> Pesticide:
+    return Pesticide(registration_number=registration_number, label=f'Label {registration_number}',
+                     restricted_use=False, active_ingredients={}, sites=['LUMBER'], pests=['TERMITES'],
+                     documentation_url=documentation_url)
+
+
+class Sessions:
+    """Hands out scrapers that answer from a dict of pesticides and fail lookups as often as asked."""
+
+    def __init__(self, pesticides: list[Pesticide], failures: dict[str, list[type[Exception]]] | None = None):
+        self.pesticides = {pesticide.registration_number: pesticide for pesticide in pesticides}
+        self.failures = failures or {}
+        self.lock = threading.Lock()
+        self.started = 0
+        self.open = 0
+        self.most_open = 0
+
+    def __call__(self):
+        with self.lock:
+            self.started += 1
+            self.open += 1
+            self.most_open = max(self.most_open, self.open)
+        return Scraper(self)
+
+
+class Scraper:
+    def __init__(self, sessions: Sessions):
+        self.sessions = sessions
+
+    def parse_pesticide(self, epa_number: str) -> Pesticide:
+        with self.sessions.lock:
+            failures = self.sessions.failures.get(epa_number)
+            if failures:
+                raise failures.pop(0)()
+        if epa_number not in self.sessions.pesticides:
+            raise NoSuchElementException()
+        return self.sessions.pesticides[epa_number]
+
+    def close(self):
+        with self.sessions.lock:
+            self.sessions.open -= 1
+
+
+def render_pesticide(pesticide: Pesticide) -> str:
+    """Renders the parts of the PPLS product report the scraper reads, with the element ids and headers it uses."""
+    city = f'{pesticide.city.upper()}, {pesticide.state} {pesticide.zipcode}'
+    registered = pesticide.current_registered_date.strftime('%B %d, %Y') if pesticide.current_registered_date else ''
+    first_registered = pesticide.first_registered_date.strftime('%B %d, %Y') if pesticide.first_registered_date else ''
+    chemicals = ''.join(
+        f'<tr><td headers="CHEM_LINK"><a href="{escape(chemical["url"])}">{escape(name)}</a></td>'
+        f'<td headers="RII_PERCENT_WT_WT_VAL">{chemical["concentration"]}</td></tr>'
+        for name, chemical in pesticide.active_ingredients.items()
+    )
+    sites = ''.join(f'<tr><td headers="SITE_DESC">{escape(site)}</td></tr>' for site in pesticide.sites)
+    pests = ''.join(f'<tr><td headers="PEST_DESC">{escape(pest)}</td></tr>' for pest in pesticide.pests)
+    return f'''<html><body>
+<span id="P8_RI_NUM">{escape(pesticide.registration_number)}</span>
+<span id="P8_CO_NAME">{escape(pesticide.company_name)}</span>
+<span id="P8_CO_ADDRESS">{escape(pesticide.address)}</span>
+<span id="P8_CO_PO_BOX">{escape(pesticide.po_box)}</span>
+<span id="P8_CO_FULL_CITY">{escape(city)}</span>
+<span id="P8_FIRST_REGISTERED">{first_registered}</span>
+<span id="P8_CNT_STATUS">{'Registered' if pesticide.registered else 'Cancelled'} ({registered})</span>
+<span id="P8_RUP_YN">{'YES' if pesticide.restricted_use else 'NO'}</span>
+<a href="#labels">Labels</a> <a href="#chemical">Chemical</a> <a href="#site">Site</a> <a href="#pest">Pest</a>
+<table id="labels"><tr><td headers="RIN_NAME">{escape(pesticide.label)}</td>
+<td headers="LABEL_DATE"><a href="{escape(pesticide.documentation_url)}">Label</a></td></tr></table>
+<table id="chemical">{chemicals}</table>
+<table id="site">{sites}</table>
+<table id="pest">{pests}</table>
+</body></html>'''
+
+
+class EPASite:
+    """
+    Serves a stand-in for the EPA Pesticide Product Label System on a local port: the search form, a product report
+    per pesticide and their label PDFs. Lookups listed in `failures` answer 503 that many times before succeeding.
+    `requests` counts the lookups per registration number and the downloads per label path.
+    """
+
+    def __init__(self, pesticides: list[Pesticide], failures: dict[str, int] | None = None):
+        self.pesticides = {pesticide.registration_number: pesticide for pesticide in pesticides}
+        self.failures = defaultdict(int, failures or {})
+        self.requests = defaultdict(int)
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.get_handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server.server_port}'
+
+    @property
+    def search_url(self) -> str:
+        return f'{self.url}/search'
+
+    def label_url(self, registration_number: str) -> str:
+        return f'{self.url}/labels/{registration_number}.pdf'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == '/search':
+                    return self.respond(200, '<html><body><form action="/product" method="get">'
+                                             '<input id="P1_EPA_REG_NO" name="P1_EPA_REG_NO"></form></body></html>')
+                if url.path == '/product':
+                    registration_number = parse_qs(url.query).get('P1_EPA_REG_NO', [''])[0]
+                    with site.lock:
+                        site.requests[registration_number] += 1
+                        failing = site.failures[registration_number] > 0
+                        site.failures[registration_number] -= 1
+                    if failing:
+                        return self.respond(503, '<html><body>Service Unavailable</body></html>')
+                    if registration_number not in site.pesticides:
+                        return self.respond(200, '<html><body>No results found.</body></html>')
+                    return self.respond(200, render_pesticide(site.pesticides[registration_number]))
+                if url.path.startswith('/labels/'):
+                    with site.lock:
+                        site.requests[url.path] += 1
+                    return self.respond(200, LABEL_PDF, 'application/pdf')
+                return self.respond(404, '')
+
+            def respond(self, status: int, body: str | bytes, content_type: str = 'text/html'):
+                body = body.encode() if isinstance(body, str) else body
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
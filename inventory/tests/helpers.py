@@ -0,0 +1,74 @@
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+
+from common.models.address import Address
+from common.models.unit import Unit, UnitCategory
+from inventory.models.brand import Brand
+from inventory.models.equipment import Condition, Equipment, EquipmentItem
+from inventory.models.material import Material, MaterialCategory, MaterialClass
+from inventory.models.storage_location import StorageLocation
+from inventory.models.transfer import Transfer, TransferEquipmentItem, TransferMaterialItem
+from inventory.models.vehicle import Vehicle
+from inventory.utils.query_inspector import QueryInspector
+
+User = get_user_model()
+
+
+def create_user(username: str = 'user') -> User:
+    return User.objects.create(username=username, password=username)
+
+
+def create_material(name: str = 'Material 1') -> Material:
+    unit_category, _ = UnitCategory.objects.get_or_create(name='Unspecified', defaults={'description': ''})
+    unit, _ = Unit.objects.get_or_create(name='Unspecified', defaults={'abbreviation': '', 'category': unit_category})
+    brand, _ = Brand.objects.get_or_create(name='Brand 1')
+    material_class, _ = MaterialClass.objects.get_or_create(name='Material Class 1', defaults={'description': ''})
+    category = MaterialCategory.objects.filter(name='Category 1').first() or MaterialCategory.objects.create(
+        name='Category 1', description='')
+    return Material.objects.create(name=name, description=name, brand=brand, material_class=material_class,
+                                   category=category, usage_unit=unit, retail_unit=unit)
+
+
+def create_storage_location(name: str = 'Storage Location 1') -> StorageLocation:
+    address = Address.objects.create(name=name, street_address=name, city='City', state='State', postal_code='00000')
+    return StorageLocation.objects.create(name=name, address=address, description=name)
+
+
+def create_vehicle(name: str = 'Vehicle 1', **kwargs) -> Vehicle:
+    return Vehicle.objects.create(name=name, vin_number=name, license_plate=name, make='Make', model='Model',
+                                  model_year=2020, **kwargs)
+
+
+def create_equipment_item(serial_number: str, purchased_by: User) -> EquipmentItem:
+    brand, _ = Brand.objects.get_or_create(name='Brand 1')
+    equipment, _ = Equipment.objects.get_or_create(name='Equipment 1', defaults={'brand': brand})
+    condition, _ = Condition.objects.get_or_create(pk=1, defaults={'name': 'Working', 'description': 'Working'})
+    return EquipmentItem.objects.create(equipment=equipment, serial_number=serial_number, purchased_by=purchased_by,
+                                        condition=condition)
+
+
+def create_transfer(source, destination, agent: User, materials: dict = None, equipment_items: list = None):
+    """Creates a pending transfer with a line per material quantity and per equipment item."""
+    transfer = Transfer.objects.bulk_create([Transfer(
+        source=source.stock_holder, destination=destination.stock_holder, release_agent=agent, transfer_agent=agent,
+    )])[0]
+    TransferMaterialItem.objects.bulk_create(
+        TransferMaterialItem(transfer=transfer, material_item=material, quantity=quantity)
+        for material, quantity in (materials or {}).items())
+    TransferEquipmentItem.objects.bulk_create(
+        TransferEquipmentItem(transfer=transfer, equipment_item=equipment_item)
+        for equipment_item in equipment_items or [])
+    return transfer
+
+
+class QueryInspectorMixin:
+    """Test case mixin failing a test on the queries a block repeats from the same line."""
+
+    @contextmanager
+    def assertNoRepeatedQueries(self, threshold: int | None = None):
+        with QueryInspector(threshold) as inspector:
+            yield inspector
+        repeated_queries = inspector.get_repeated_queries()
+        if repeated_queries:
+            self.fail('Repeated queries:\n' + '\n'.join(str(query) for query in repeated_queries))
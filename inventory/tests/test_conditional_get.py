@@ -0,0 +1,35 @@
+from django.test import TestCase
+
+from inventory.tests.helpers import create_material, create_user
+from inventory.utils.fragment_cache import get_cache
+
+
+class TestConditionalGet(TestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.material = create_material()
+        admin = create_user('admin')
+        admin.is_staff = admin.is_superuser = True
+        admin.save()
+        self.client.force_login(admin)
+
+    def test_answers_unchanged_pages_with_not_modified(self):
+        for url in ['/materials/', f'/materials/{self.material.pk}']:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(200, response.status_code)
+                etag = response.headers['ETag']
+                # Only the session and the user are read
+                with self.assertNumQueries(2):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(304, response.status_code)
+                self.assertEqual(b'', response.content)
+                self.assertNotEqual(etag, self.client.get(url, HTTP_X_AXIOS_HEADER='1').headers['ETag'])
+
+                self.material.brand.save()
+                self.assertEqual(200, self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code)
+
+    def test_answers_if_modified_since(self):
+        last_modified = self.client.get('/materials/').headers['Last-Modified']
+        self.assertEqual(304, self.client.get('/materials/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code)
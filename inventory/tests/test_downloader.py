@@ -0,0 +1,35 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase
+
+from inventory.tests.epa_site import EPASite, LABEL_PDF
+from inventory.utils.epa_scraper.downloader import DocumentationDownloader
+
+
+class TestDocumentationDownloader(SimpleTestCase):
+
+    def setUp(self):
+        self.downloader = DocumentationDownloader(workers=3)
+        self.addCleanup(self.downloader.close)
+
+    def test_downloads_concurrently_into_movable_temporary_files(self):
+        with EPASite([]) as site:
+            futures = [self.downloader.submit(site.label_url(f'100-{i}')) for i in range(6)]
+            downloads = [future.result() for future in futures]
+
+        self.assertEqual(6, len({download.file.temporary_file_path() for download in downloads}))
+        for download in downloads:
+            self.assertEqual(len(LABEL_PDF), download.size)
+            self.assertEqual(hashlib.sha256(LABEL_PDF).hexdigest(), download.sha256)
+
+        with tempfile.TemporaryDirectory() as directory, downloads[0].file as f:
+            path = f.temporary_file_path()
+            name = FileSystemStorage(location=directory).save('label.pdf', f)
+            self.assertFalse(os.path.exists(path))
+            with open(os.path.join(directory, name), 'rb') as saved:
+                self.assertEqual(LABEL_PDF, saved.read())
+        for download in downloads[1:]:
+            download.file.close()
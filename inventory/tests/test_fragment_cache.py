@@ -0,0 +1,72 @@
+from django.db import connection
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from common.models.target import Target
+from inventory.models.material import Material
+from inventory.tests.helpers import create_material, create_user
+from inventory.utils.fragment_cache import bump_generation, check_shared_caches, get_cache
+
+
+class TestFragmentCache(TestCase):
+    url = '/materials/'
+
+    def setUp(self):
+        get_cache().clear()
+        self.materials = [create_material(f'Material {i}') for i in range(3)]
+        admin = create_user('admin')
+        admin.is_staff = admin.is_superuser = True
+        admin.save()
+        self.client.force_login(admin)
+
+    def get_partial(self, url: str | None = None, **params) -> str:
+        response = self.client.get(url or self.url, params, HTTP_X_AXIOS_HEADER='1')
+        self.assertEqual(200, response.status_code)
+        return response.content.decode()
+
+    def count_queries(self, url: str | None = None, **params) -> int:
+        with CaptureQueriesContext(connection) as context:
+            self.get_partial(url, **params)
+        return len(context)
+
+    def test_serves_repeated_loads_without_rendering(self):
+        content = self.get_partial()
+        # Only the session and the user are read
+        with self.assertNumQueries(2):
+            self.assertEqual(content, self.get_partial())
+        self.assertGreater(self.count_queries(page=1), 2)
+        self.assertIn('<html', self.client.get(self.url).content.decode())
+
+    def test_changes_of_the_model_and_its_relations_invalidate(self):
+        self.assertIn('Brand 1', self.get_partial())
+        self.materials[0].brand.name = 'Renamed Brand'
+        self.materials[0].brand.save()
+        self.assertIn('Renamed Brand', self.get_partial())
+
+        create_material('Material 4')
+        self.assertIn('Material 4', self.get_partial())
+
+        detail_url = f'/materials/{self.materials[0].pk}'
+        self.get_partial(detail_url)
+        self.assertEqual(2, self.count_queries(detail_url))
+        self.materials[0].targets.add(Target.objects.create(name='Target 1', description=''))
+        self.assertGreater(self.count_queries(detail_url), 2)
+
+        self.get_partial()
+        Material.objects.filter(pk=self.materials[1].pk).update(name='Updated Material')
+        self.assertNotIn('Updated Material', self.get_partial())
+        bump_generation(Material)
+        self.assertIn('Updated Material', self.get_partial())
+
+    def test_checks_permissions_before_the_cache(self):
+        self.get_partial()
+        user = create_user('viewer')
+        self.client.force_login(user)
+        self.assertEqual(403, self.client.get(self.url, HTTP_X_AXIOS_HEADER='1').status_code)
+
+    def test_warns_about_caches_kept_per_process(self):
+        self.assertEqual([], check_shared_caches())
+        local = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        with override_settings(CACHES={**settings.CACHES, 'permissions': local}):
+            self.assertEqual(['inventory.W002'], [warning.id for warning in check_shared_caches()])
@@ -0,0 +1,116 @@
+import dataclasses
+import datetime
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from django.test import SimpleTestCase
+from selenium.common import NoSuchElementException
+
+from inventory.tests.epa_site import EPASite, create_pesticide
+from inventory.utils.epa_scraper import HttpScraper, Pesticide, ScraperPool
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'ppls'
+
+PESTICIDE = Pesticide(
+    registration_number='54471-10',
+    label='BORAX-COPPER HYDROXIDE WOOD PRESERVATIVE PASTE',
+    company_name='COPPER CARE WOOD PRESERVATIVES, INC,',
+    po_box='707',
+    city='Columbus',
+    state='NE',
+    zipcode='686020707',
+    first_registered_date=datetime.date(1997, 6, 25),
+    current_registered_date=datetime.date(1997, 6, 25),
+    documentation_url='https://www3.epa.gov/pesticides/chem_search/ppls/054471-00010-20100521.pdf',
+    restricted_use=False,
+    active_ingredients={
+        'Borax (B4Na2O7.10H2O)': {
+            'name': 'Borax (B4Na2O7.10H2O)',
+            'concentration': 43.5,
+            'url': 'https://iaspub.epa.gov/apex/pesticides/f?p=CHEMICALSEARCH:3:::NO::P3_XCHEMICAL_ID:1572'
+        },
+        'Copper hydroxide': {
+            'name': 'Copper hydroxide',
+            'concentration': 3.1,
+            'url': 'https://iaspub.epa.gov/apex/pesticides/f?p=CHEMICALSEARCH:3:::NO::P3_XCHEMICAL_ID:1895'
+        },
+    },
+    sites=[
+        'LUMBER',
+        'TIMBERS',
+        'WOOD PILINGS (SOIL CONTACT NONFUMIGATION TREATMENT)',
+        'WOOD POLES/POSTS (SOIL CONTACT NONFUMIGATION TREATMENT)',
+        'WOOD PRODUCTS (UNSEASONED)',
+        'WOOD PROTECTION TRT TO FOREST PRODUCTS BY PRESSURE',
+        'WOOD PROTECTION TRT TO SEASONED FOREST PRODUCTS',
+        'WOOD STRUCTURES (SOIL CONTACT NONFUMIGATION TREATMENT)',
+        'WOOD UTILITY POLES (SOIL CONTACT NONFUMIGATION TREATMENT)',
+    ],
+    pests=[
+        'CARPENTER ANTS',
+        'ROT FUNGI',
+        'SOFT ROT/DECAY',
+        'TERMITES',
+        'WOOD BORING BEETLES',
+        'WOOD BORING INSECTS',
+        'WOOD ROT/DECAY FUNGI',
+    ],
+)
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Answers every request with the saved page of its path, recording the submitted form fields."""
+    submitted = []
+
+    def do_GET(self):
+        path = FIXTURES / Path(urlparse(self.path).path).name
+        if not path.is_file():
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = path.read_bytes()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.submitted.append(parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode()))
+        self.do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpScraper(SimpleTestCase):
+
+    def test_parses_saved_pages(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        scraper = HttpScraper(search_url=f'http://127.0.0.1:{server.server_port}/search.html')
+        self.addCleanup(scraper.close)
+
+        self.assertEqual(PESTICIDE, scraper.parse_pesticide('54471-10'))
+        self.assertEqual(['54471-10'], FixtureHandler.submitted[-1]['P1_EPA_REG_NO'])
+        self.assertEqual(['1234567890'], FixtureHandler.submitted[-1]['p_page_submission_id'])
+
+    def test_scrapes_the_stand_in_site_with_a_pool(self):
+        pesticides = [dataclasses.replace(
+            create_pesticide(f'300-{i}', f'https://example.com/{i}.pdf'), company_name='Company', city='Columbus',
+            state='NE', zipcode='68602', current_registered_date=datetime.date(2020, 1, i + 1),
+            first_registered_date=datetime.date(1990, 1, 1), active_ingredients={
+                'Borax': {'name': 'Borax', 'url': 'https://example.com/borax', 'concentration': 4.5}},
+        ) for i in range(4)]
+        with EPASite(pesticides, failures={'300-1': 1}) as site:
+            pool = ScraperPool(workers=2, backoff=0, scraper_factory=lambda: HttpScraper(search_url=site.search_url))
+            results = {result.registration_number: result for result in pool.scrape(
+                [(pesticide.registration_number, '') for pesticide in pesticides] + [('missing', '')])}
+
+        self.assertEqual(2, site.requests['300-1'])
+        self.assertEqual(pesticides, [results[pesticide.registration_number].pesticide for pesticide in pesticides])
+        self.assertIsInstance(results['missing'].error, NoSuchElementException)
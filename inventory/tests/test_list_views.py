@@ -0,0 +1,68 @@
+from django.test import TestCase
+
+from common.models.address import Address
+from customers.models.customer import Customer
+from inventory.models.material import Material
+from inventory.models.storage_location import StorageLocation
+from inventory.tests.helpers import create_user
+from inventory.utils.fragment_cache import get_cache
+from inventory.views.mixins import get_index_fields, get_select_related, get_template_lookups
+
+
+class TestListViews(TestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        admin = create_user('admin')
+        admin.is_staff = admin.is_superuser = True
+        admin.save()
+        self.client.force_login(admin)
+        parent = Customer.objects.create(customer_type=Customer.CustomerType.COMMERCIAL, first_name='Parent',
+                                         last_name='Customer', company_name='Parent Company')
+        for i in range(11):
+            Customer.objects.create(customer_type=Customer.CustomerType.RESIDENTIAL, first_name=f'First {i:02}',
+                                    last_name=f'Last {10 - i:02}', parent=parent)
+
+    def get_names(self, url: str, params: dict) -> tuple[list[str], str | None]:
+        response = self.client.get(url, params)
+        self.assertEqual(200, response.status_code)
+        page = response.context['page_obj']
+        return [customer.first_name for customer in page.object_list], page.next_query if page.has_next else None
+
+    def test_pages_through_a_sorted_and_filtered_list(self):
+        names, url, params = [], '/customers/', {'sort': '-last_name', 'page_size': 4, 'customer_type': 'Residential'}
+        while params is not None:
+            page_names, next_query = self.get_names(url, params)
+            names += page_names
+            params = next_query and dict(part.split('=') for part in next_query.split('&'))
+        self.assertEqual([f'First {i:02}' for i in range(11)], names)
+
+    def test_loads_the_displayed_foreign_keys_with_the_list(self):
+        self.get_names('/customers/', {})
+        with self.assertNumQueries(3):
+            self.assertEqual(12, len(self.get_names('/customers/', {'page': 2})[0]))
+        response = self.client.get('/customers/', {'page_size': 3})
+        # The parent lists its own name twice and each child once
+        self.assertContains(response, 'Parent Company', count=4)
+
+    def test_lists_storage_locations_with_their_addresses(self):
+        for i in range(3):
+            address = Address.objects.create(street_address=f'{i} Depot Road', city='Springfield', state='IL',
+                                             postal_code='62701')
+            StorageLocation.objects.create(name=f'Depot {i}', address=address, description='')
+        self.client.get('/stock_location/')
+        with self.assertNumQueries(3):
+            response = self.client.get('/stock_location/', {'page_size': 2})
+        self.assertContains(response, 'Depot Road', count=2)
+        self.assertContains(response, 'More')
+
+    def test_ignores_unindexed_sorts_and_rejects_bad_cursors(self):
+        self.assertEqual(['Parent', 'First 00'], self.get_names('/customers/', {'sort': 'email', 'page_size': 2})[0])
+        self.assertEqual(404, self.client.get('/customers/', {'after': 'not a cursor'}).status_code)
+
+    def test_derives_lookups_and_sort_fields(self):
+        lookups = get_template_lookups('{{ object.brand.name }} {% url "detail" pk=object.id %} {{ forloop.counter }}')
+        self.assertEqual({'brand.name', 'id', 'counter'}, lookups)
+        self.assertEqual(['brand'], get_select_related(Material, lookups))
+        self.assertEqual(['name'], get_index_fields(Material))
+        self.assertEqual(['company_name', 'last_name'], sorted(get_index_fields(Customer)))
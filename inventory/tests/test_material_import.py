@@ -0,0 +1,64 @@
+import dataclasses
+
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+
+from common.models.field import Field
+from common.models.target import Target
+from common.models.unit import Unit, UnitCategory
+from inventory.models.brand import Brand
+from inventory.models.material import Material, MaterialCategory, MaterialClass, MaterialField
+from inventory.tests.epa_site import create_pesticide
+from inventory.utils.epa_scraper import MaterialUpdater
+
+FIELD_NAMES = ['epa_registration_number', 'pests', 'sites', 'restricted_use', 'active_ingredients']
+
+
+class TestMaterialImport(TestCase):
+
+    def setUp(self):
+        category = UnitCategory.objects.create(name='Unspecified', description='')
+        Unit.objects.create(name='Unspecified', abbreviation='', category=category)
+        Brand.objects.create(name='Unspecified')
+        MaterialClass.objects.create(name='Unspecified', description='')
+        pesticide_category = MaterialCategory.objects.create(name='Pesticide', description='')
+        Field.objects.bulk_create(
+            Field(name=name, label=name, description=name, object_id=pesticide_category.pk,
+                  content_type=ContentType.objects.get_for_model(MaterialCategory)) for name in FIELD_NAMES)
+        Target.objects.create(name='Termite', description='Termite')
+        self.updater = MaterialUpdater()
+
+    def import_batch(self, count: int, pests: list[str], changed: bool = True):
+        pesticides = [dataclasses.replace(create_pesticide(f'100-{i}'), pests=pests + [f'PEST {i}'])
+                      for i in range(count)]
+        return self.updater.save_pesticides(
+            [(pesticide, f'pesticide {i}', pesticide.registration_number, changed)
+             for i, pesticide in enumerate(pesticides)])
+
+    def test_batch_queries_do_not_grow_with_its_size(self):
+        self.updater.update_documentation = lambda *args: None
+        with self.assertNumQueries(19):
+            self.import_batch(2, ['TERMITES', 'ANTS'])
+        # The search documents of the first batch are replaced
+        with self.assertNumQueries(27):
+            materials = self.import_batch(20, ['TERMITES', 'ANTS', 'BEETLES'])
+
+        self.assertEqual(20, len(materials))
+        self.assertEqual(20 * len(FIELD_NAMES), MaterialField.objects.count())
+        self.assertEqual('100-7', materials[7].materialfield_set.get(field__name='epa_registration_number').value)
+        self.assertEqual({'Termite', 'Ant', 'Beetle', 'Pest 7'}, set(materials[7].targets.values_list(
+            'name', flat=True)))
+        self.assertEqual({'Ant', 'Beetle', 'Termite'} | {f'Pest {i}' for i in range(20)},
+                         set(Target.objects.values_list('name', flat=True)))
+        # New targets are separate trees, which the tree manager can keep inserting into
+        self.assertEqual(Target.objects.count(), Target.objects.values('tree_id').distinct().count())
+        child = Target.objects.create(name='Drywood Termite', description='', parent=Target.objects.get(name='Ant'))
+        self.assertEqual(1, child.level)
+        self.assertEqual([child], list(Target.objects.get(name='Ant').get_descendants()))
+
+    def test_unchanged_existing_materials_are_not_written(self):
+        self.updater.update_documentation = lambda *args: None
+        self.import_batch(5, ['TERMITES'])
+        with self.assertNumQueries(3):
+            self.import_batch(5, ['TERMITES', 'ANTS'], changed=False)
+        self.assertFalse(Target.objects.filter(name='Ant').exists())
@@ -0,0 +1,94 @@
+import dataclasses
+import datetime
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from common.models.unit import Unit, UnitCategory
+from inventory.models.brand import Brand
+from inventory.models.material import Material, MaterialCategory, MaterialClass
+from inventory.tests.epa_site import EPASite, Sessions, create_pesticide
+from inventory.utils.epa_scraper import MaterialUpdater, PesticideCache
+
+
+class TestPesticideCache(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        media = override_settings(MEDIA_ROOT=self.directory.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        category = UnitCategory.objects.create(name='Unspecified', description='')
+        Unit.objects.create(name='Unspecified', abbreviation='', category=category)
+        Brand.objects.create(name='Unspecified')
+        MaterialClass.objects.create(name='Unspecified', description='')
+        MaterialCategory.objects.create(name='Pesticide', description='')
+
+    def get_cache(self, **kwargs) -> PesticideCache:
+        return PesticideCache(path=f'{self.directory.name}/cache', **kwargs)
+
+    def test_entries_round_trip_and_expire(self):
+        pesticide = dataclasses.replace(create_pesticide('100-1'), current_registered_date=datetime.date(2020, 1, 2))
+        self.get_cache().set('100-1', pesticide, documentation_hash='abc')
+
+        entry = self.get_cache().get_fresh('100-1')
+        self.assertEqual(pesticide, entry.pesticide)
+        self.assertEqual('abc', entry.documentation_hash)
+        self.assertIsNone(self.get_cache(ttl=datetime.timedelta(0)).get_fresh('100-1'))
+        self.assertFalse(self.get_cache().has_changed('100-1', pesticide))
+        self.assertTrue(self.get_cache().has_changed('100-1', dataclasses.replace(
+            pesticide, current_registered_date=datetime.date(2021, 1, 2))))
+
+    def test_rerun_skips_scraping_and_unchanged_documentation(self):
+        with EPASite([]) as site:
+            pesticides = [create_pesticide(f'200-{i}', site.label_url(f'200-{i}')) for i in range(3)]
+            items = [(pesticide.registration_number, f'pesticide {i}') for i, pesticide in enumerate(pesticides)]
+            label = '/labels/200-0.pdf'
+
+            MaterialUpdater(scraper_factory=Sessions(pesticides), cache=self.get_cache()).\
+                get_or_update_materials_and_targets_from_list(items)
+            self.assertEqual(1, site.requests[label])
+            documentation = Material.objects.get(name='Pesticide 0').documentation.name
+
+            # Fresh entries are neither scraped nor downloaded again
+            sessions = Sessions(pesticides)
+            updater = MaterialUpdater(scraper_factory=sessions, cache=self.get_cache())
+            with self.assertNumQueries(3):
+                materials, failed = updater.get_or_update_materials_and_targets_from_list(items)
+            self.assertEqual((3, 0, 0), (len(materials), len(failed), sessions.started))
+            self.assertEqual(1, site.requests[label])
+
+            # Expired entries are scraped, but the documentation is only downloaded for a new registration
+            pesticides[0].current_registered_date = datetime.date(2023, 5, 1)
+            sessions = Sessions(pesticides)
+            MaterialUpdater(scraper_factory=sessions, cache=self.get_cache(ttl=datetime.timedelta(0))).\
+                get_or_update_materials_and_targets_from_list(items)
+            self.assertEqual(1, sessions.started)
+            self.assertEqual(2, site.requests[label])
+            self.assertEqual(1, site.requests['/labels/200-1.pdf'])
+            # The downloaded label had the hash of the attached one, so it was not written again
+            self.assertEqual(documentation, Material.objects.get(name='Pesticide 0').documentation.name)
+
+    def test_materials_without_their_file_get_the_label(self):
+        with EPASite([]) as site:
+            pesticide = create_pesticide('300-1', site.label_url('300-1'))
+            items = [(pesticide.registration_number, 'new pesticide')]
+            MaterialUpdater(scraper_factory=Sessions([pesticide]), cache=self.get_cache()).\
+                get_or_update_materials_and_targets_from_list(items)
+            material = Material.objects.get(name='New Pesticide')
+            self.assertTrue(self.get_cache().get('300-1').documentation_hash)
+
+            # The cache still holds the hash of the label, but the material is new or lost its file
+            material.documentation.storage.delete(material.documentation.name)
+            Material.objects.all().delete()
+            MaterialUpdater(scraper_factory=Sessions([pesticide]), cache=self.get_cache()).\
+                get_or_update_materials_and_targets_from_list(items)
+            material = Material.objects.get(name='New Pesticide')
+            self.assertTrue(material.documentation.storage.exists(material.documentation.name))
+
+            material.documentation.storage.delete(material.documentation.name)
+            MaterialUpdater(scraper_factory=Sessions([pesticide]), cache=self.get_cache()).\
+                get_or_update_materials_and_targets_from_list(items)
+            self.assertTrue(material.documentation.storage.exists(material.documentation.name))
+            self.assertEqual(3, site.requests['/labels/300-1.pdf'])
@@ -0,0 +1,64 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from inventory.models.price_history import VendorMaterialPrice, backfill_price_history
+from inventory.models.purchase_order import PurchaseOrder, PurchaseOrderMaterialItem
+from inventory.models.vendor import Vendor, VendorMaterial
+from inventory.tests.helpers import create_material, create_user
+
+
+class TestPriceHistory(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.vendor = Vendor.objects.create(name='Vendor 1')
+        self.today = timezone.now().date()
+        self.vendor_material = VendorMaterial.objects.create(vendor=self.vendor, material=create_material(),
+                                                             sku='SKU 1', unit_price=Decimal('10.00'))
+
+    def save_on(self, date, **changes):
+        for name, value in changes.items():
+            setattr(self.vendor_material, name, value)
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + (date - self.today)):
+            self.vendor_material.save()
+
+    def get_ranges(self):
+        return list(VendorMaterialPrice.objects.filter(vendor_item=self.vendor_material).values_list(
+            'effective_from', 'effective_to', 'price', 'is_promotion'))
+
+    def test_price_changes_close_the_open_range(self):
+        day = timedelta(days=1)
+        self.save_on(self.today)
+        self.save_on(self.today + 10 * day, unit_price=Decimal('12.00'))
+        self.save_on(self.today + 20 * day, promo_unit_price=Decimal('9.00'), promo_start_date=self.today + 25 * day,
+                     promo_end_date=self.today + 30 * day)
+        self.assertEqual([
+            (self.today, self.today + 9 * day, Decimal('10.00'), False),
+            (self.today + 10 * day, self.today + 24 * day, Decimal('12.00'), False),
+            (self.today + 25 * day, self.today + 30 * day, Decimal('9.00'), True),
+            (self.today + 31 * day, None, Decimal('12.00'), False),
+        ], self.get_ranges())
+
+    def test_purchase_order_lines_resolve_their_catalog_price(self):
+        purchase_orders = [PurchaseOrder.objects.create(vendor=self.vendor, created_by=self.user) for _ in range(2)]
+        for purchase_order in purchase_orders:
+            PurchaseOrderMaterialItem.objects.create(purchase_order=purchase_order, material=self.vendor_material,
+                                                     quantity=2, received_quantity=0)
+        PurchaseOrder.objects.filter(pk=purchase_orders[1].pk).update(date=self.today + timedelta(days=10))
+        self.save_on(self.today + timedelta(days=10), unit_price=Decimal('12.00'))
+        with self.assertNumQueries(1):
+            prices = list(PurchaseOrderMaterialItem.objects.with_catalog_price().order_by(
+                'purchase_order__date').values_list('price', 'catalog_price'))
+        self.assertEqual([(Decimal('20.00'), Decimal('20.00')), (Decimal('20.00'), Decimal('24.00'))], prices)
+
+    def test_backfill_starts_at_the_first_purchase_order(self):
+        VendorMaterialPrice.objects.all().delete()
+        purchase_order = PurchaseOrder.objects.create(vendor=self.vendor, created_by=self.user)
+        PurchaseOrder.objects.filter(pk=purchase_order.pk).update(date=self.today - timedelta(days=100))
+        self.assertEqual(1, backfill_price_history())
+        self.assertEqual([(self.today - timedelta(days=100), None, Decimal('10.00'), False)], self.get_ranges())
+        self.assertEqual(0, backfill_price_history())
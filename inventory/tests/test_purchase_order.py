@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from inventory.models.purchase_order import PurchaseOrder, PurchaseOrderMaterialItem
+from inventory.models.vendor import Vendor, VendorMaterial
+from inventory.tests.helpers import create_material, create_user
+
+
+class TestPurchaseOrder(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.vendor = Vendor.objects.create(name='Vendor 1')
+        self.vendor_material = VendorMaterial.objects.create(vendor=self.vendor, material=create_material(),
+                                                             sku='SKU 1', unit_price=Decimal('2.50'))
+
+    def create_purchase_order(self, *lines):
+        purchase_order = PurchaseOrder.objects.create(vendor=self.vendor, created_by=self.user)
+        for quantity, received_quantity in lines:
+            PurchaseOrderMaterialItem.objects.create(purchase_order=purchase_order, material=self.vendor_material,
+                                                     quantity=quantity, received_quantity=received_quantity)
+        return purchase_order
+
+    def test_totals_and_fulfillment_status(self):
+        unfulfilled = self.create_purchase_order((2, 0), (4, 0))
+        partial = self.create_purchase_order((2, 2), (4, 0))
+        fulfilled = self.create_purchase_order((2, 2))
+        purchase_orders = PurchaseOrder.objects.with_totals().in_bulk()
+        with self.assertNumQueries(0):
+            self.assertEqual(Decimal('15.00'), purchase_orders[unfulfilled.pk].total_price)
+            self.assertEqual(PurchaseOrder.FulfillmentStatus.UNFULFILLED,
+                             purchase_orders[unfulfilled.pk].fulfillment_status)
+            self.assertEqual(PurchaseOrder.FulfillmentStatus.PARTIALLY_FULFILLED,
+                             purchase_orders[partial.pk].fulfillment_status)
+            self.assertEqual(PurchaseOrder.FulfillmentStatus.FULFILLED,
+                             purchase_orders[fulfilled.pk].fulfillment_status)
+        with self.assertNumQueries(1):
+            self.assertEqual(Decimal('5.00'), fulfilled.total_price)
+            self.assertEqual(PurchaseOrder.FulfillmentStatus.FULFILLED, fulfilled.fulfillment_status)
+
+    def test_totals_follow_changed_lines(self):
+        purchase_order = self.create_purchase_order((2, 0))
+        self.assertEqual(Decimal('5.00'), purchase_order.total_price)
+        line = PurchaseOrderMaterialItem.objects.create(purchase_order=purchase_order, material=self.vendor_material,
+                                                        quantity=2, received_quantity=2)
+        self.assertEqual(Decimal('10.00'), purchase_order.total_price)
+        self.assertEqual(PurchaseOrder.FulfillmentStatus.PARTIALLY_FULFILLED, purchase_order.fulfillment_status)
+
+        PurchaseOrderMaterialItem.objects.exclude(pk=line.pk).update(received_quantity=2)
+        purchase_order.refresh_from_db()
+        self.assertEqual(PurchaseOrder.FulfillmentStatus.FULFILLED, purchase_order.fulfillment_status)
+
+    def test_admin_changelist_query_count_is_constant(self):
+        admin = create_user('admin')
+        admin.is_staff = admin.is_superuser = True
+        admin.save()
+        self.client.force_login(admin)
+        self.create_purchase_order((1, 0))
+        with self.assertNumQueries(7):
+            self.client.get('/admin/inventory/purchaseorder/')
+        for _ in range(20):
+            self.create_purchase_order((1, 0), (2, 1))
+        with self.assertNumQueries(7):
+            self.client.get('/admin/inventory/purchaseorder/')
@@ -0,0 +1,60 @@
+from django.test import TestCase, override_settings
+
+from common.models.target import Target
+from inventory.models.material import Material
+from inventory.tests.helpers import QueryInspectorMixin, create_material, create_user
+from inventory.utils.query_inspector import QueryInspector, RepeatedQueriesError, get_query_shape
+
+
+class TestQueryInspector(QueryInspectorMixin, TestCase):
+
+    def setUp(self):
+        for i in range(4):
+            create_material(f'Material {i}').targets.add(Target.objects.create(name=f'Target {i}', description=''))
+
+    def test_reports_a_query_per_row_with_its_call_site(self):
+        with QueryInspector(threshold=3) as inspector:
+            for material in Material.objects.all():
+                material.brand.name
+
+        [repeated] = inspector.get_repeated_queries()
+        self.assertEqual(4, repeated.count)
+        self.assertEqual(__file__, repeated.call_site.filename)
+        self.assertEqual('material.brand.name', repeated.call_site.line)
+
+    def test_passes_related_lookups(self):
+        with self.assertNoRepeatedQueries(threshold=2):
+            [material.brand.name for material in Material.objects.select_related('brand')]
+            [list(material.targets.all()) for material in Material.objects.prefetch_related('targets')]
+
+    def test_shapes_ignore_parameter_counts(self):
+        self.assertEqual(get_query_shape('SELECT 1 WHERE id IN (%s, %s)'),
+                         get_query_shape('SELECT 1\n WHERE id IN (%s,%s, %s)'))
+
+
+class TestQueryInspectorMiddleware(TestCase):
+
+    def setUp(self):
+        for i in range(4):
+            create_material(f'Material {i}').targets.add(Target.objects.create(name=f'Target {i}', description=''))
+        admin = create_user('admin')
+        admin.is_staff = admin.is_superuser = True
+        admin.save()
+        self.client.force_login(admin)
+
+    @override_settings(QUERY_INSPECTOR='raise')
+    def test_fails_the_admin_changelist_targets(self):
+        with self.assertRaisesMessage(RepeatedQueriesError, 'in get_targets'):
+            self.client.get('/admin/inventory/material/')
+
+    @override_settings(QUERY_INSPECTOR='warn')
+    def test_logs_the_admin_changelist_targets(self):
+        with self.assertLogs('inventory.middleware', 'WARNING') as logs:
+            response = self.client.get('/admin/inventory/material/')
+
+        self.assertEqual(200, response.status_code)
+        self.assertIn('in get_targets', logs.output[0])
+
+    def test_is_off_by_default(self):
+        with self.assertNoLogs('inventory.middleware'):
+            self.client.get('/admin/inventory/material/')
@@ -0,0 +1,82 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from inventory.models.purchase_order import PurchaseOrder, PurchaseOrderMaterialItem
+from inventory.models.storage_location import MaterialStock
+from inventory.models.vehicle import VehicleMaterial
+from inventory.models.vendor import Vendor, VendorMaterial
+from inventory.services.replenishment_service import ReplenishmentService
+from inventory.tests.helpers import create_material, create_storage_location, create_user, create_vehicle
+
+
+class TestReplenishmentService(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.materials = [create_material(f'Material {i}') for i in range(3)]
+        self.storage_location = create_storage_location()
+        self.vehicles = [create_vehicle(f'Vehicle {i}') for i in range(2)]
+        self.cheap, self.fast = Vendor.objects.create(name='Cheap'), Vendor.objects.create(name='Fast')
+        self.service = ReplenishmentService(user=self.user)
+
+    def create_offer(self, vendor, material, unit_price, delivery_time=7, **kwargs):
+        return VendorMaterial.objects.create(vendor=vendor, material=material, sku=f'{vendor}-{material.pk}',
+                                             unit_price=unit_price, delivery_time=delivery_time, **kwargs)
+
+    def test_shortages_cover_storage_locations_and_vehicles(self):
+        MaterialStock.objects.create(material=self.materials[0], storage_location=self.storage_location, quantity=2,
+                                     min_quantity=5, max_quantity=10)
+        MaterialStock.objects.create(material=self.materials[1], storage_location=self.storage_location, quantity=5,
+                                     min_quantity=5, max_quantity=10)
+        VehicleMaterial.objects.create(material=self.materials[0], vehicle=self.vehicles[0], quantity=0,
+                                       minimum_quantity=2, maximum_quantity=0)
+        with self.assertNumQueries(1):
+            shortages = sorted(self.service.get_shortages())
+        self.assertEqual([('Storage Location', self.storage_location.pk, self.materials[0].pk, 2, 5, 10, 8),
+                          ('Vehicle', self.vehicles[0].pk, self.materials[0].pk, 0, 2, 0, 2)], shortages)
+
+    def test_best_offer_prefers_price_then_delivery_time(self):
+        today = timezone.now().date()
+        self.create_offer(self.cheap, self.materials[0], '5.00', delivery_time=10)
+        best = self.create_offer(self.fast, self.materials[0], '5.00', delivery_time=2)
+        self.create_offer(self.cheap, self.materials[1], '5.00')
+        promotion = self.create_offer(self.fast, self.materials[1], '9.00', promo_unit_price='4.00',
+                                      promo_start_date=today, promo_end_date=today + timedelta(days=1))
+        offers = VendorMaterial.objects.best_offers()
+        self.assertEqual({best, promotion}, set(offers))
+        self.assertEqual(Decimal('4.00'), VendorMaterial.objects.best_offers(
+            items=[self.materials[1]]).get().effective_price)
+
+    def test_draft_purchase_orders_per_vendor(self):
+        for material in self.materials:
+            for vehicle in self.vehicles:
+                VehicleMaterial.objects.create(material=material, vehicle=vehicle, quantity=1, minimum_quantity=2,
+                                               maximum_quantity=4)
+        self.create_offer(self.cheap, self.materials[0], '1.00')
+        self.create_offer(self.cheap, self.materials[1], '1.00')
+        self.create_offer(self.fast, self.materials[1], '2.00')
+        with self.assertNumQueries(8):
+            purchase_orders, plan = self.service.draft_purchase_orders()
+        self.assertEqual(1, len(purchase_orders))
+        self.assertEqual({self.materials[2].pk: 6}, plan.unsourced)
+        lines = PurchaseOrderMaterialItem.objects.filter(purchase_order=purchase_orders[0])
+        self.assertEqual({6}, {line.quantity for line in lines})
+        self.assertEqual({Decimal('6.00')}, {line.price for line in lines})
+
+        # The open purchase order covers the shortages, so running again drafts nothing new
+        purchase_orders, plan = self.service.draft_purchase_orders()
+        self.assertEqual([], purchase_orders)
+        self.assertEqual(1, PurchaseOrder.objects.count())
+
+    def test_lines_are_split_to_fit_the_price_column(self):
+        MaterialStock.objects.create(material=self.materials[0], storage_location=self.storage_location, quantity=0,
+                                     min_quantity=450, max_quantity=450)
+        self.create_offer(self.cheap, self.materials[0], '500.00')
+        purchase_orders, plan = self.service.draft_purchase_orders()
+
+        lines = PurchaseOrderMaterialItem.objects.filter(purchase_order=purchase_orders[0]).order_by('pk')
+        self.assertEqual([199, 199, 52], [int(line.quantity) for line in lines])
+        self.assertEqual(Decimal('99500.00'), max(line.price for line in lines))
@@ -0,0 +1,113 @@
+import functools
+import shutil
+import tempfile
+from unittest import skipUnless
+
+import requests
+from django.test import SimpleTestCase, TestCase, override_settings
+from selenium.common import NoSuchElementException, WebDriverException
+
+from common.models.unit import Unit, UnitCategory
+from inventory.models.brand import Brand
+from inventory.models.material import Material, MaterialCategory, MaterialClass
+from inventory.tests.epa_site import EPASite, LABEL_PDF, Sessions, create_pesticide
+from inventory.utils.epa_scraper import MaterialUpdater, ScraperPool, SeleniumScraper
+
+
+class TestScraperPool(SimpleTestCase):
+
+    def test_scrapes_concurrently_with_retries(self):
+        pesticides = [create_pesticide(f'100-{i}') for i in range(20)]
+        sessions = Sessions(pesticides, failures={'100-3': [WebDriverException, requests.ConnectionError]})
+        pool = ScraperPool(workers=3, scraper_factory=sessions, retries=2, backoff=0)
+        results = {result.registration_number: result for result in pool.scrape(
+            [(pesticide.registration_number, f'Name {i}') for i, pesticide in enumerate(pesticides + [
+                create_pesticide('missing')])])}
+
+        self.assertEqual(21, len(results))
+        self.assertEqual(pesticides[3], results['100-3'].pesticide)
+        self.assertEqual(3, results['100-3'].attempts)
+        self.assertIsNone(results['100-3'].error)
+        self.assertIsInstance(results['missing'].error, NoSuchElementException)
+        self.assertEqual(1, results['missing'].attempts)
+        # Both failures replaced the session, the missing page was not retried
+        self.assertEqual(5, sessions.started)
+        self.assertEqual(3, sessions.most_open)
+        self.assertEqual(0, sessions.open)
+
+
+@override_settings(MEDIA_ROOT=tempfile.gettempdir())
+class TestMaterialUpdaterPool(TestCase):
+
+    def setUp(self):
+        category = UnitCategory.objects.create(name='Unspecified', description='')
+        Unit.objects.create(name='Unspecified', abbreviation='', category=category)
+        Brand.objects.create(name='Unspecified')
+        MaterialClass.objects.create(name='Unspecified', description='')
+        MaterialCategory.objects.create(name='Pesticide', description='')
+
+    def test_saves_results_from_the_calling_thread(self):
+        with EPASite([]) as site:
+            pesticides = [create_pesticide(f'200-{i}', site.label_url(f'200-{i}')) for i in range(5)]
+            updater = MaterialUpdater(workers=2, scraper_factory=Sessions(pesticides), backoff=0)
+            materials, failed = updater.get_or_update_materials_and_targets_from_list(
+                [(pesticide.registration_number, f'pesticide {i}') for i, pesticide in enumerate(pesticides)]
+                + [('missing', 'missing')])
+
+        self.assertEqual([('missing', 'missing')], failed)
+        self.assertEqual(5, Material.objects.filter(category__name='Pesticide').count())
+        for material in materials:
+            with material.documentation.open('rb') as f:
+                self.assertEqual(LABEL_PDF, f.read())
+            material.documentation.delete()
+
+    def test_unparsable_pages_do_not_stop_the_others(self):
+        with EPASite([]) as site:
+            pesticides = [create_pesticide(f'200-{i}', site.label_url(f'200-{i}')) for i in range(5)]
+            sessions = Sessions(pesticides, failures={'200-2': [ValueError]})
+            updater = MaterialUpdater(workers=2, scraper_factory=sessions, backoff=0)
+            with self.assertLogs('inventory.utils.epa_scraper', 'ERROR') as logs:
+                materials, failed = updater.get_or_update_materials_and_targets_from_list(
+                    [(pesticide.registration_number, f'pesticide {i}') for i, pesticide in enumerate(pesticides)])
+
+        self.assertIn('200-2', logs.output[0])
+        self.assertEqual([('200-2', 'pesticide 2')], failed)
+        self.assertEqual(4, len(materials))
+        self.assertEqual(4, Material.objects.filter(category__name='Pesticide').count())
+        for material in materials:
+            material.documentation.delete()
+
+    def test_failed_downloads_do_not_stop_the_others(self):
+        with EPASite([]) as site:
+            pesticides = [create_pesticide(f'200-{i}', site.label_url(f'200-{i}')) for i in range(3)]
+            pesticides[1].documentation_url = f'{site.url}/missing.pdf'
+            updater = MaterialUpdater(workers=2, scraper_factory=Sessions(pesticides), backoff=0)
+            with self.assertLogs('inventory.utils.epa_scraper', 'ERROR') as logs:
+                materials, failed = updater.get_or_update_materials_and_targets_from_list(
+                    [(pesticide.registration_number, f'pesticide {i}') for i, pesticide in enumerate(pesticides)])
+
+        self.assertIn('Pesticide 1', logs.output[0])
+        self.assertEqual(3, len(materials))
+        self.assertEqual([('200-1', 'Pesticide 1')], failed)
+        for material in materials:
+            material.refresh_from_db()
+            self.assertEqual(material.name != 'Pesticide 1', bool(material.documentation))
+            if material.documentation:
+                material.documentation.delete()
+
+
+@skipUnless(shutil.which('chromedriver'), 'Requires Chrome and chromedriver')
+class TestSeleniumScraperPool(SimpleTestCase):
+
+    def test_scrapes_the_stand_in_site(self):
+        pesticides = [create_pesticide(f'300-{i}') for i in range(4)]
+        with EPASite(pesticides, failures={'300-1': 1}) as site:
+            pool = ScraperPool(workers=2, backoff=0, scraper_factory=functools.partial(
+                SeleniumScraper, search_url=site.search_url, headless=True))
+            results = {result.registration_number: result for result in pool.scrape(
+                [(pesticide.registration_number, '') for pesticide in pesticides])}
+
+        self.assertEqual(2, site.requests['300-1'])
+        for pesticide in pesticides:
+            self.assertEqual(pesticide.label, results[pesticide.registration_number].pesticide.label)
+            self.assertEqual(pesticide.pests, results[pesticide.registration_number].pesticide.pests)
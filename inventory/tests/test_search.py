@@ -0,0 +1,97 @@
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase, override_settings
+
+from common.models.field import Field
+from common.models.target import Target
+from customers.models.customer import Customer
+from inventory.models.material import MaterialCategory, MaterialField
+from inventory.models.search import SearchDocument
+from inventory.services.search_service import Fts5Index, SearchService, TermIndex, create_search_index, has_fts5, \
+    tokenize
+from inventory.tests.helpers import create_equipment_item, create_material, create_user
+
+DocumentType = SearchDocument.DocumentType
+
+
+class SearchTests:
+    """Runs against the backend the subclass selects."""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.material = create_material('Termidor SC')
+            field = Field.objects.create(name='Active Ingredient', label='Active Ingredient', description='',
+                                         object_id=self.material.category_id,
+                                         content_type=ContentType.objects.get_for_model(MaterialCategory))
+            MaterialField.objects.create(material=self.material, field=field, value='Fipronil')
+            create_material('Fipro Foaming Aerosol')
+            self.item = create_equipment_item('SN-4471', create_user())
+            self.customer = Customer.objects.create(customer_type=Customer.CustomerType.RESIDENTIAL,
+                                                    first_name='José', last_name='Termite',
+                                                    phone_number='+12025550143')
+            self.target = Target.objects.create(name='Subterranean Termites', description='Reticulitermes')
+
+    def search(self, query, *document_types):
+        return [(hit['type'], hit['id']) for hit in SearchService().search(query, list(document_types))]
+
+    def test_ranks_typed_hits(self):
+        hits = self.search('termi')
+        self.assertCountEqual([
+            (DocumentType.MATERIAL, self.material.pk), (DocumentType.CUSTOMER, self.customer.pk),
+            (DocumentType.TARGET, self.target.pk)], hits)
+        self.assertEqual([(DocumentType.TARGET, self.target.pk)], self.search('termi', DocumentType.TARGET))
+        # Every word has to match, field values and phone numbers included
+        self.assertEqual([(DocumentType.MATERIAL, self.material.pk)], self.search('fipronil termidor'))
+        self.assertEqual([(DocumentType.CUSTOMER, self.customer.pk)], self.search('2025550143'))
+        self.assertEqual([(DocumentType.CUSTOMER, self.customer.pk)], self.search('jose'))
+        self.assertEqual([(DocumentType.EQUIPMENT_ITEM, self.item.pk)], self.search('sn 4471'))
+        self.assertEqual([], self.search('  '))
+
+    def test_ranks_title_matches_first(self):
+        self.assertEqual((DocumentType.MATERIAL, self.material.pk), self.search('fipronil')[0])
+        hits = self.search('fipro')
+        self.assertEqual(2, len(hits))
+        self.assertNotEqual((DocumentType.MATERIAL, self.material.pk), hits[0])
+
+    def test_updates_incrementally(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.material.name = self.material.description = 'Taurus SC'
+            self.material.save()
+            self.item.equipment.name = 'Backpack Sprayer'
+            self.item.equipment.save()
+            self.target.delete()
+        self.assertEqual([(DocumentType.MATERIAL, self.material.pk)], self.search('taurus fipronil'))
+        self.assertEqual([], self.search('termidor'))
+        self.assertEqual([(DocumentType.EQUIPMENT_ITEM, self.item.pk)], self.search('sprayer'))
+        self.assertEqual([], self.search('subterranean'))
+
+    def test_rebuilds(self):
+        SearchDocument.objects.all().delete()
+        self.assertEqual(5, SearchService().rebuild())
+        self.assertEqual([(DocumentType.MATERIAL, self.material.pk)], self.search('termidor'))
+
+    def test_migrate_fills_an_empty_index(self):
+        SearchService().index.clear()
+        SearchDocument.objects.all().delete()
+        create_search_index(apps.get_app_config('inventory'))
+        self.assertEqual(5, SearchDocument.objects.count())
+        self.assertEqual([(DocumentType.MATERIAL, self.material.pk)], self.search('termidor'))
+
+
+class TestFts5Search(SearchTests, TestCase):
+
+    def setUp(self):
+        if not has_fts5():
+            self.skipTest('Requires SQLite with FTS5')
+        super().setUp()
+
+    def test_uses_fts5(self):
+        self.assertIsInstance(SearchService().index, Fts5Index)
+
+
+@override_settings(SEARCH_BACKEND='terms')
+class TestTermSearch(SearchTests, TestCase):
+
+    def test_uses_terms(self):
+        self.assertIsInstance(SearchService().index, TermIndex)
+        self.assertEqual(['jose', 'termite', 'sc'], tokenize('José Termite, SC'))
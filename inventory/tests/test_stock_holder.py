@@ -0,0 +1,55 @@
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+
+from inventory.models.stock_holder import StockHolder
+from inventory.models.storage_location import StorageLocation
+from inventory.models.transfer import Transfer
+from inventory.models.vehicle import Vehicle
+from inventory.tests.helpers import create_storage_location, create_transfer, create_user, create_vehicle
+
+
+class TestStockHolder(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.storage_location = create_storage_location()
+        self.vehicles = [create_vehicle(f'Vehicle {i}') for i in range(10)]
+
+    def test_holders_follow_their_objects(self):
+        holder = StockHolder.objects.get(vehicle=self.vehicles[0])
+        self.assertEqual(StockHolder.HolderType.VEHICLE, holder.holder_type)
+        self.assertEqual(ContentType.objects.get_for_model(Vehicle), holder.content_type)
+        self.assertEqual(self.vehicles[0].pk, holder.object_id)
+        self.vehicles[0].name = 'Renamed'
+        self.vehicles[0].save()
+        holder.refresh_from_db()
+        self.assertEqual(str(self.vehicles[0]), holder.name)
+        self.assertTrue(StockHolder.objects.filter(technician=self.user).exists())
+
+    def test_sync_creates_missing_holders(self):
+        Vehicle.objects.bulk_create([Vehicle(name='Bulk', vin_number='Bulk', license_plate='Bulk', make='', model='',
+                                             model_year=2020)])
+        self.assertEqual(1, StockHolder.objects.sync())
+        self.assertEqual(str(Vehicle.objects.get(name='Bulk')), StockHolder.objects.get(vehicle__name='Bulk').name)
+
+    def test_prefetch_holders_queries_once_per_holder_type(self):
+        for vehicle in self.vehicles:
+            create_transfer(self.storage_location, vehicle, self.user)
+        with self.assertNumQueries(3):
+            transfers = list(Transfer.objects.prefetch_holders())
+            holders = [(transfer.source.holder, transfer.destination.holder) for transfer in transfers]
+        self.assertTrue(all(isinstance(source, StorageLocation) for source, _ in holders))
+        self.assertEqual({vehicle.pk for vehicle in self.vehicles}, {destination.pk for _, destination in holders})
+
+    def test_admin_changelist_query_count_is_constant(self):
+        admin = create_user('admin')
+        admin.is_staff = admin.is_superuser = True
+        admin.save()
+        self.client.force_login(admin)
+        create_transfer(self.storage_location, self.vehicles[0], self.user)
+        with self.assertNumQueries(5):
+            self.client.get('/admin/inventory/transfer/')
+        for vehicle in self.vehicles[1:]:
+            create_transfer(self.storage_location, vehicle, self.user)
+        with self.assertNumQueries(5):
+            self.client.get('/admin/inventory/transfer/')
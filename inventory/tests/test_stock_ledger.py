@@ -0,0 +1,136 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from inventory.exceptions import TransactionError
+from inventory.models.stock_movement import StockBalance, StockMovement
+from inventory.models.storage_location import MaterialStock
+from inventory.models.vehicle import VehicleMaterial
+from inventory.services.stock_ledger_service import StockLedgerService
+from inventory.tests.helpers import create_material, create_storage_location, create_user, create_vehicle
+
+
+class TestStockLedgerService(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.material = create_material()
+        self.storage_location = create_storage_location()
+        self.vehicle = create_vehicle()
+        self.ledger = StockLedgerService(user=self.user)
+
+    def test_receive_creates_balance(self):
+        self.ledger.receive(self.material, 10, destination=self.storage_location)
+        self.assertEqual(10, StockBalance.objects.on_hand(self.material, self.storage_location))
+
+    def test_transfer_moves_balance(self):
+        self.ledger.receive(self.material, 10, destination=self.storage_location)
+        self.ledger.record(self.material, 4, StockMovement.Reason.TRANSFER, source=self.storage_location,
+                           destination=self.vehicle)
+        self.assertEqual(6, StockBalance.objects.on_hand(self.material, self.storage_location))
+        self.assertEqual(4, StockBalance.objects.on_hand(self.material, self.vehicle))
+
+    def test_insufficient_stock_is_rejected(self):
+        self.ledger.receive(self.material, 2, destination=self.storage_location)
+        with self.assertRaises(TransactionError):
+            self.ledger.consume(self.material, 3, source=self.storage_location)
+        self.assertEqual(2, StockBalance.objects.on_hand(self.material, self.storage_location))
+        self.assertEqual(1, StockMovement.objects.count())
+
+    def test_admin_lists_the_ledger_read_only_without_queries_per_row(self):
+        self.user.is_staff = self.user.is_superuser = True
+        self.user.save()
+        self.client.force_login(self.user)
+        self.ledger.receive(self.material, 10, destination=self.storage_location)
+        self.ledger.record(self.material, 1, StockMovement.Reason.TRANSFER, source=self.storage_location,
+                           destination=self.vehicle)
+        for url in ['/admin/inventory/stockmovement/', '/admin/inventory/stockbalance/']:
+            with self.subTest(url=url):
+                self.client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(url)
+                for i in range(5):
+                    self.ledger.receive(create_material(f'{url} {i}'), 1, destination=self.vehicle)
+                with self.assertNumQueries(len(queries)):
+                    self.assertContains(self.client.get(url), f'{url} 4')
+        self.assertEqual(403, self.client.get('/admin/inventory/stockmovement/add/').status_code)
+
+    def test_balance_inserted_concurrently_is_added_to(self):
+        lock_balances = StockLedgerService._lock_balances
+        calls = []
+
+        def lock_after_concurrent_insert(keys):
+            # The first lock misses the row a concurrent transaction inserts right after it
+            if not calls:
+                calls.append(keys)
+                StockBalance.objects.create(item=self.material, holder=self.storage_location, quantity=3)
+                return {}
+            return lock_balances(keys)
+
+        with mock.patch.object(StockLedgerService, '_lock_balances', side_effect=lock_after_concurrent_insert):
+            self.ledger.receive(self.material, 10, destination=self.storage_location)
+        self.assertEqual(13, StockBalance.objects.on_hand(self.material, self.storage_location))
+        self.assertEqual(1, StockBalance.objects.count())
+
+    def test_movement_is_append_only(self):
+        movement = self.ledger.receive(self.material, 1, destination=self.storage_location)
+        with self.assertRaises(TransactionError):
+            movement.save()
+        with self.assertRaises(TransactionError):
+            StockMovement.objects.all().delete()
+
+    def test_record_is_constant_queries(self):
+        self.ledger.receive(self.material, 10, destination=self.storage_location)
+        self.ledger.receive(self.material, 10, destination=self.vehicle)
+        with self.assertNumQueries(7):
+            self.ledger.record(self.material, 1, StockMovement.Reason.TRANSFER, source=self.storage_location,
+                               destination=self.vehicle)
+
+    def test_adjust(self):
+        self.ledger.adjust(self.material, self.storage_location, 5)
+        self.ledger.adjust(self.material, self.storage_location, 3)
+        self.assertEqual(3, StockBalance.objects.on_hand(self.material, self.storage_location))
+        self.assertIsNone(self.ledger.adjust(self.material, self.storage_location, 3))
+
+    def test_legacy_counters_follow_ledger(self):
+        material_stock = MaterialStock.objects.create(material=self.material, storage_location=self.storage_location)
+        vehicle_material = VehicleMaterial.objects.create(material=self.material, vehicle=self.vehicle)
+        self.ledger.receive(self.material, 10, destination=self.storage_location)
+        self.ledger.record(self.material, 4, StockMovement.Reason.TRANSFER, source=self.storage_location,
+                           destination=self.vehicle)
+        material_stock.refresh_from_db()
+        vehicle_material.refresh_from_db()
+        self.assertEqual(6, material_stock.quantity)
+        self.assertEqual(4, vehicle_material.quantity)
+
+    def test_rebuild_balances(self):
+        self.ledger.receive(self.material, 10, destination=self.storage_location)
+        self.ledger.record(self.material, 10, StockMovement.Reason.TRANSFER, source=self.storage_location,
+                           destination=self.vehicle)
+        self.ledger.consume(self.material, 3, source=self.vehicle)
+        StockBalance.objects.all().update(quantity=100)
+        self.assertEqual(1, self.ledger.rebuild_balances())
+        self.assertEqual(0, StockBalance.objects.on_hand(self.material, self.storage_location))
+        self.assertEqual(7, StockBalance.objects.on_hand(self.material, self.vehicle))
+
+    def test_seed_from_legacy_counters(self):
+        material_stock = MaterialStock.objects.create(material=self.material, storage_location=self.storage_location,
+                                                      quantity=12)
+        vehicle_material = VehicleMaterial.objects.create(material=self.material, vehicle=self.vehicle, quantity=3)
+        self.ledger.receive(self.material, 5, destination=self.vehicle)
+        vehicle_material.refresh_from_db()
+        self.assertEqual(8, vehicle_material.quantity)
+        VehicleMaterial.objects.update(quantity=2)
+
+        self.assertEqual(2, self.ledger.seed_from_legacy_counters())
+        self.assertEqual(0, self.ledger.seed_from_legacy_counters())
+        material_stock.refresh_from_db()
+        vehicle_material.refresh_from_db()
+        self.assertEqual((12, 2), (material_stock.quantity, vehicle_material.quantity))
+        self.assertEqual(12, StockBalance.objects.on_hand(self.material, self.storage_location))
+        self.assertEqual(2, StockBalance.objects.on_hand(self.material, self.vehicle))
+        self.ledger.record(self.material, 12, StockMovement.Reason.TRANSFER, source=self.storage_location,
+                           destination=self.vehicle)
+        self.assertEqual(14, StockBalance.objects.on_hand(self.material, self.vehicle))
@@ -0,0 +1,122 @@
+from django.contrib.admin.sites import site
+from django.core.exceptions import PermissionDenied
+from django.test import RequestFactory, TestCase
+
+from inventory.exceptions import TransactionError
+from inventory.models.equipment import EquipmentItem
+from inventory.models.stock_movement import StockBalance, StockMovement
+from inventory.models.transfer import Transfer
+from inventory.services.stock_ledger_service import StockLedgerService
+from inventory.services.transfer_service import TransferService
+from inventory.tests.helpers import create_equipment_item, create_material, create_storage_location, \
+    create_transfer, create_user, create_vehicle
+
+
+class TestTransferService(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.materials = [create_material(f'Material {i}') for i in range(20)]
+        self.storage_location = create_storage_location()
+        self.vehicle = create_vehicle()
+        ledger = StockLedgerService(user=self.user)
+        for material in self.materials:
+            ledger.receive(material, 5, destination=self.storage_location)
+        self.service = TransferService(user=self.user)
+
+    def test_complete_moves_stock(self):
+        transfer = create_transfer(self.storage_location, self.vehicle, self.user, {self.materials[0]: 2})
+        self.service.complete(transfer)
+        transfer.refresh_from_db()
+        self.assertEqual(Transfer.TransferStatus.COMPLETED, transfer.status)
+        self.assertIsNotNone(transfer.end_date)
+        self.assertEqual(3, StockBalance.objects.on_hand(self.materials[0], self.storage_location))
+        self.assertEqual(2, StockBalance.objects.on_hand(self.materials[0], self.vehicle))
+        self.assertEqual(1, transfer.stock_movements.count())
+
+    def test_complete_twice_is_rejected(self):
+        transfer = create_transfer(self.storage_location, self.vehicle, self.user, {self.materials[0]: 1})
+        self.service.complete(transfer)
+        with self.assertRaises(TransactionError):
+            self.service.complete(transfer)
+        self.assertEqual(4, StockBalance.objects.on_hand(self.materials[0], self.storage_location))
+
+    def test_insufficient_stock_rolls_back_every_line(self):
+        transfer = create_transfer(self.storage_location, self.vehicle, self.user,
+                                   {self.materials[0]: 1, self.materials[1]: 6})
+        with self.assertRaises(TransactionError):
+            self.service.complete(transfer)
+        transfer.refresh_from_db()
+        self.assertEqual(Transfer.TransferStatus.PENDING, transfer.status)
+        self.assertEqual(5, StockBalance.objects.on_hand(self.materials[0], self.storage_location))
+        self.assertFalse(StockMovement.objects.filter(transfer=transfer).exists())
+
+    def test_equipment_items_are_moved(self):
+        equipment_item = create_equipment_item('SN-1', self.user)
+        StockLedgerService().receive(equipment_item, 1, destination=self.vehicle)
+        transfer = create_transfer(self.vehicle, self.storage_location, self.user, equipment_items=[equipment_item])
+        self.service.complete(transfer)
+        equipment_item.refresh_from_db()
+        self.assertEqual(EquipmentItem.Status.STORED, equipment_item.status)
+        self.assertEqual(self.storage_location, equipment_item.storage_location)
+        self.assertEqual(1, StockBalance.objects.on_hand(equipment_item, self.storage_location))
+
+    def test_query_count_does_not_depend_on_line_count(self):
+        small = create_transfer(self.storage_location, self.vehicle, self.user, {self.materials[0]: 1})
+        large = create_transfer(self.storage_location, self.vehicle, self.user,
+                                {material: 1 for material in self.materials[1:]})
+        # The balances at the vehicle are new, so they are inserted and locked as well
+        with self.assertNumQueries(15):
+            self.service.complete(small)
+        with self.assertNumQueries(15):
+            self.service.complete(large)
+
+    def test_admin_reports_rejected_completion(self):
+        self.user.is_staff = self.user.is_superuser = True
+        self.user.save()
+        self.client.force_login(self.user)
+        transfer = create_transfer(self.storage_location, self.vehicle, self.user, {self.materials[0]: 10})
+        line = transfer.transfermaterialitem_set.get()
+        response = self.client.post(f'/admin/inventory/transfer/{transfer.pk}/change/', {
+            'source': transfer.source_id, 'destination': transfer.destination_id, 'release_agent': self.user.pk,
+            'transfer_agent': self.user.pk, 'status': Transfer.TransferStatus.COMPLETED, 'notes': '',
+            'transferequipmentitem_set-TOTAL_FORMS': 0, 'transferequipmentitem_set-INITIAL_FORMS': 0,
+            'transfermaterialitem_set-TOTAL_FORMS': 1, 'transfermaterialitem_set-INITIAL_FORMS': 1,
+            'transfermaterialitem_set-0-id': line.pk, 'transfermaterialitem_set-0-transfer': transfer.pk,
+            'transfermaterialitem_set-0-material_item': line.material_item_id,
+            'transfermaterialitem_set-0-quantity': 10,
+        }, follow=True)
+
+        self.assertRedirects(response, f'/admin/inventory/transfer/{transfer.pk}/change/')
+        levels = [message.level_tag for message in response.context['messages']]
+        self.assertEqual(['error', 'warning'], levels)
+        transfer.refresh_from_db()
+        self.assertEqual(Transfer.TransferStatus.PENDING, transfer.status)
+
+    def test_admin_freezes_completed_transfers(self):
+        self.user.is_staff = self.user.is_superuser = True
+        self.user.save()
+        self.client.force_login(self.user)
+        transfer = create_transfer(self.storage_location, self.vehicle, self.user, {self.materials[0]: 2})
+        self.service.complete(transfer)
+        line = transfer.transfermaterialitem_set.get()
+        response = self.client.post(f'/admin/inventory/transfer/{transfer.pk}/change/', {
+            'release_agent': self.user.pk, 'transfer_agent': self.user.pk, 'notes': 'Reopened',
+            'status': Transfer.TransferStatus.PENDING,
+            'transferequipmentitem_set-TOTAL_FORMS': 0, 'transferequipmentitem_set-INITIAL_FORMS': 0,
+            'transfermaterialitem_set-TOTAL_FORMS': 1, 'transfermaterialitem_set-INITIAL_FORMS': 1,
+            'transfermaterialitem_set-0-id': line.pk, 'transfermaterialitem_set-0-transfer': transfer.pk,
+            'transfermaterialitem_set-0-material_item': line.material_item_id,
+            'transfermaterialitem_set-0-quantity': 5,
+        })
+
+        self.assertEqual(302, response.status_code)
+        transfer.refresh_from_db()
+        line.refresh_from_db()
+        self.assertEqual((Transfer.TransferStatus.COMPLETED, 'Reopened'), (transfer.status, transfer.notes))
+        self.assertEqual(2, line.quantity)
+        transfer.status = Transfer.TransferStatus.PENDING
+        request = RequestFactory().post('/')
+        request.user = self.user
+        with self.assertRaises(PermissionDenied):
+            site._registry[Transfer].save_model(request, transfer, None, True)
@@ -0,0 +1,57 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from inventory.models.asset_requirement_category import AssetRequirementCategory, EquipmentItemRequirement, \
+    MaterialRequirement
+from inventory.models.vehicle import VehicleEquipmentItem, VehicleMaterial
+from inventory.tests.helpers import create_equipment_item, create_material, create_user, create_vehicle
+
+
+class TestVehicleCompliance(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.category = AssetRequirementCategory.objects.create(name='Service Truck')
+        self.materials = [create_material(f'Material {i}') for i in range(2)]
+        self.equipment_item = create_equipment_item('Serial 1', self.user)
+        MaterialRequirement.objects.create(material=self.materials[0], asset_requirement_category=self.category,
+                                           minimum_amount=5, maximum_amount=10)
+        MaterialRequirement.objects.create(material=self.materials[1], asset_requirement_category=self.category,
+                                           minimum_amount=1, maximum_amount=2)
+        EquipmentItemRequirement.objects.create(equipment_item=self.equipment_item,
+                                                asset_requirement_category=self.category, minimum_amount=1,
+                                                maximum_amount=1)
+        self.vehicle = create_vehicle(asset_requirement_category=self.category)
+
+    def test_materials_with_requirements(self):
+        VehicleMaterial.objects.create(vehicle=self.vehicle, material=self.materials[0], quantity=3)
+        VehicleMaterial.objects.create(vehicle=self.vehicle, material=self.materials[1], quantity=4)
+        VehicleMaterial.objects.create(vehicle=create_vehicle('Vehicle 2'), material=self.materials[0], quantity=9)
+        requirements = {requirement.material: requirement for requirement in
+                        self.vehicle.get_vehicle_materials_with_requirements()}
+        self.assertEqual((3, 2, 0), (requirements[self.materials[0]].on_hand, requirements[self.materials[0]].shortfall,
+                                     requirements[self.materials[0]].surplus))
+        self.assertEqual((4, 0, 2), (requirements[self.materials[1]].on_hand, requirements[self.materials[1]].shortfall,
+                                     requirements[self.materials[1]].surplus))
+
+    def test_equipment_items_with_requirements(self):
+        requirement = self.vehicle.get_vehicle_equipment_items_with_requirements().get()
+        self.assertEqual((0, 1), (requirement.on_hand, requirement.shortfall))
+        VehicleEquipmentItem.objects.create(vehicle=self.vehicle, equipment_item=self.equipment_item, quantity=1)
+        self.assertEqual(0, self.vehicle.get_vehicle_equipment_items_with_requirements().get().shortfall)
+
+    def test_compliance_report_query_count_does_not_depend_on_fleet_size(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with self.assertNumQueries(3):
+            response = client.get('/api/vehicles/compliance/')
+        self.assertEqual(200, response.status_code)
+        self.assertFalse(response.data[0]['compliant'])
+        self.assertEqual(2, len(response.data[0]['materials']))
+        for i in range(2, 12):
+            create_vehicle(f'Vehicle {i}', asset_requirement_category=self.category)
+        create_vehicle('Unassigned')
+        with self.assertNumQueries(3):
+            response = client.get('/api/vehicles/compliance/')
+        self.assertEqual(12, len(response.data))
+        self.assertTrue(response.data[-1]['compliant'])
@@ -0,0 +1,57 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from inventory.models.purchase_order import PurchaseOrder, PurchaseOrderEquipmentItem
+from inventory.models.vendor import Vendor, VendorEquipment
+from inventory.tests.helpers import create_equipment_item, create_user
+
+
+class TestVendorItem(TestCase):
+
+    def setUp(self):
+        self.user = create_user()
+        self.equipment = create_equipment_item('Serial 1', self.user).equipment
+        self.today = timezone.now().date()
+        self.vendors = [Vendor.objects.create(name=f'Vendor {i}') for i in range(3)]
+        self.regular = VendorEquipment.objects.create(vendor=self.vendors[0], equipment=self.equipment, sku='1',
+                                                      unit_price=Decimal('10.00'))
+        self.promotion = VendorEquipment.objects.create(
+            vendor=self.vendors[1], equipment=self.equipment, sku='2', unit_price=Decimal('12.00'),
+            promo_unit_price=Decimal('8.00'), promo_start_date=self.today,
+            promo_end_date=self.today + timedelta(days=7))
+
+    def test_effective_price_depends_on_the_date(self):
+        prices = dict(VendorEquipment.objects.with_effective_price().values_list('pk', 'effective_price'))
+        self.assertEqual({self.regular.pk: Decimal('10.00'), self.promotion.pk: Decimal('8.00')}, prices)
+        later = self.today + timedelta(days=30)
+        self.assertEqual(Decimal('12.00'), VendorEquipment.objects.with_effective_price(later).get(
+            pk=self.promotion.pk).effective_price)
+        with self.assertNumQueries(0):
+            self.assertEqual(Decimal('8.00'), self.promotion.current_price)
+
+    def test_current_price_only_reuses_an_annotation_made_for_today(self):
+        today = VendorEquipment.objects.with_effective_price().get(pk=self.promotion.pk)
+        today.promo_unit_price = Decimal('9.00')
+        self.assertEqual(Decimal('8.00'), today.current_price)
+        later = VendorEquipment.objects.with_effective_price(self.today + timedelta(days=30)).get(
+            pk=self.promotion.pk)
+        self.assertEqual(Decimal('12.00'), later.effective_price)
+        self.assertEqual(Decimal('8.00'), later.current_price)
+
+    def test_best_offers_per_item(self):
+        self.assertEqual([self.promotion], list(VendorEquipment.objects.best_offers()))
+        self.assertEqual([self.regular], list(VendorEquipment.objects.best_offers(
+            date=self.today + timedelta(days=30))))
+        self.vendors[0].is_active = False
+        self.vendors[0].save()
+        self.assertEqual([self.promotion], list(VendorEquipment.objects.best_offers(
+            date=self.today + timedelta(days=30))))
+
+    def test_purchase_order_line_is_priced_with_the_effective_price(self):
+        purchase_order = PurchaseOrder.objects.create(vendor=self.vendors[1], created_by=self.user)
+        line = PurchaseOrderEquipmentItem.objects.create(purchase_order=purchase_order, equipment=self.promotion,
+                                                         quantity=2, received_quantity=0)
+        self.assertEqual(Decimal('16.00'), line.price)
@@ -1,2 +1,5 @@
 from .epa_scraper import SeleniumScraper, Pesticide
+from .http_scraper import HttpScraper
+from .scraper_pool import ScraperPool, ScrapeResult
+from .pesticide_cache import PesticideCache
 from .material_updater import MaterialUpdater
\ No newline at end of file
@@ -0,0 +1,76 @@
+import hashlib
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+import requests
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from requests.adapters import HTTPAdapter
+
+CHUNK_SIZE = 1 << 16
+
+
+class DownloadError(Exception):
+    pass
+
+
+@dataclass
+class Download:
+    url: str
+    file: TemporaryUploadedFile
+    sha256: str
+    size: int
+
+
+class DocumentationDownloader:
+    """
+    Streams documents into uniquely named temporary upload files, hashing them on the way, so that saving one to
+    a FileField on the file system storage moves it into place instead of copying it. Downloads share the
+    connection pool of one session and run concurrently through `submit`.
+    """
+
+    def __init__(self, workers: int = 1, session: requests.Session | None = None, chunk_size: int = CHUNK_SIZE,
+                 timeout: float = 60):
+        self.workers = max(workers, 1)
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = None
+
+    def download(self, url: str) -> Download:
+        """Downloads the document at the url, checking its size against the Content-Length the server sent."""
+        with self.session.get(url, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            # The length of an encoded response is that of the compressed body
+            expected_size = None if 'Content-Encoding' in response.headers else response.headers.get('Content-Length')
+            name = os.path.basename(urlparse(url).path) or 'documentation.pdf'
+            file = TemporaryUploadedFile(name, response.headers.get('Content-Type'), 0, None)
+            digest, size = hashlib.sha256(), 0
+            try:
+                for chunk in response.iter_content(self.chunk_size):
+                    file.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+                if expected_size is not None and size != int(expected_size):
+                    raise DownloadError(f'Downloaded {size} of {expected_size} bytes from {url}')
+            except BaseException:
+                file.close()
+                raise
+        file.size = size
+        file.seek(0)
+        return Download(url=url, file=file, sha256=digest.hexdigest(), size=size)
+
+    def submit(self, url: str) -> Future:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='documentation')
+        return self.executor.submit(self.download, url)
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+        self.session.close()
@@ -35,8 +35,15 @@ class Pesticide:
 
 class SeleniumScraper:
 
-    def __init__(self):
-        self.driver = webdriver.Chrome()
+    def __init__(self, search_url: str = SEARCH_URL, headless: bool = False):
+        self.search_url = search_url
+        options = webdriver.ChromeOptions()
+        if headless:
+            options.add_argument('--headless=new')
+        self.driver = webdriver.Chrome(options=options)
+
+    def close(self):
+        self.driver.quit()
 
     def parse_pesticide(self, epa_number: str | int):
         self._lookup_epa_number(epa_number=epa_number)
@@ -44,7 +51,7 @@ class SeleniumScraper:
 
     def _lookup_epa_number(self, epa_number: str | int):
 
-        self.driver.get(SEARCH_URL)
+        self.driver.get(self.search_url)
         search_input = self.driver.find_element(By.ID, SEARCH_INPUT_ID)
         search_input.send_keys(epa_number)
         search_input.send_keys(Keys.RETURN)
@@ -172,6 +179,15 @@ class SeleniumScraper:
         return Pesticide(
             label=self._get_pesticide_label(),
             registration_number=self._get_pesticide_registration_number(),
+            company_name=self._get_pesticide_company_name(),
+            address=self._get_pesticide_address(),
+            po_box=self._get_pesticide_po_box(),
+            city=self._get_pesticide_city(),
+            state=self._get_pesticide_state(),
+            zipcode=self._get_pesticide_zipcode(),
+            first_registered_date=self._get_pesticide_first_registered_date() or None,
+            current_registered_date=self._get_pesticide_current_registered_date() or None,
+            registered=self._get_pesticide_registered(),
             restricted_use=self._get_pesticide_restricted_use(),
             active_ingredients=self._get_pesticide_active_ingredients(),
             sites=self._get_pesticide_sites(),
@@ -0,0 +1,180 @@
+from html.parser import HTMLParser
+from urllib.parse import urldefrag, urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+from selenium.common import NoSuchElementException
+
+from inventory.utils.datetime_utils import date_from_string
+from .epa_scraper import SEARCH_INPUT_ID, SEARCH_URL, Pesticide
+
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+BLOCK_ELEMENTS = {'br', 'div', 'li', 'p', 'td', 'th', 'tr'}
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace the way a browser renders the text of an element."""
+    return ' '.join(text.split())
+
+
+class Page(HTMLParser):
+    """
+    Collects what the scraper reads from a PPLS page in one pass: the text of elements by id, the cells of tables by
+    their headers attribute with the link they contain, the links by their text, and the forms with their fields.
+    """
+
+    def __init__(self, url: str, html: str):
+        super().__init__(convert_charrefs=True)
+        self.url = url
+        self.ids = {}
+        self.cells = {}
+        self.links = {}
+        self.forms = []
+        self.open = []
+        self.feed(html)
+        self.close()
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'form':
+            self.forms.append({'action': urljoin(self.url, attrs.get('action') or ''),
+                               'method': (attrs.get('method') or 'get').lower(), 'fields': {}, 'ids': {}})
+        elif tag == 'input' and self.forms and attrs.get('name'):
+            self.forms[-1]['fields'][attrs['name']] = attrs.get('value') or ''
+            if attrs.get('id'):
+                self.forms[-1]['ids'][attrs['id']] = attrs['name']
+        if tag in BLOCK_ELEMENTS:
+            self.handle_data(' ')
+        if tag in VOID_ELEMENTS:
+            return
+        href = urljoin(self.url, attrs['href']) if tag == 'a' and attrs.get('href') else None
+        if href is not None:
+            for element in self.open:
+                element['href'] = element['href'] or href
+        self.open.append({'tag': tag, 'id': attrs.get('id'), 'headers': attrs.get('headers') if tag == 'td' else None,
+                          'href': href, 'text': []})
+
+    def handle_endtag(self, tag):
+        if tag in VOID_ELEMENTS or not any(element['tag'] == tag for element in self.open):
+            return
+        # Unclosed elements inside the closed one end with it, as browsers do
+        while self.open:
+            element = self.open.pop()
+            text = normalize_text(''.join(element['text']))
+            if self.open:
+                separator = ' ' if element['tag'] in BLOCK_ELEMENTS else ''
+                self.open[-1]['text'].append(separator + ''.join(element['text']) + separator)
+            if element['id']:
+                self.ids[element['id']] = text
+            if element['headers']:
+                self.cells.setdefault(element['headers'], []).append((text, element['href']))
+            if element['tag'] == 'a' and element['href'] is not None:
+                self.links.setdefault(text, element['href'])
+            if element['tag'] == tag:
+                return
+
+    def handle_data(self, data):
+        if self.open:
+            self.open[-1]['text'].append(data)
+
+    def get_text(self, element_id: str) -> str:
+        if element_id not in self.ids:
+            raise NoSuchElementException(f'No element with id {element_id} on {self.url}')
+        return self.ids[element_id]
+
+    def get_cells(self, headers: str) -> list[tuple[str, str | None]]:
+        return self.cells.get(headers, [])
+
+    def get_link(self, text: str) -> str:
+        if text not in self.links:
+            raise NoSuchElementException(f'No link {text} on {self.url}')
+        return self.links[text]
+
+
+class HttpScraper:
+    """
+    Reads the same PPLS pages as SeleniumScraper over plain HTTP: the search form is submitted with its fields and
+    the report tabs are followed as links, reusing the connections of one session. It produces the same Pesticide
+    without starting a browser, and raises NoSuchElementException where the browser would not find an element.
+    """
+
+    def __init__(self, search_url: str = SEARCH_URL, session: requests.Session | None = None, timeout: float = 30,
+                 pool_size: int = 4):
+        self.search_url = search_url
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def close(self):
+        self.session.close()
+
+    def parse_pesticide(self, epa_number: str | int) -> Pesticide:
+        return self._parse_pesticide(self._lookup_epa_number(epa_number))
+
+    def _get_page(self, url: str, method: str = 'get', data: dict | None = None) -> Page:
+        if method == 'post':
+            response = self.session.post(url, data=data, timeout=self.timeout)
+        else:
+            response = self.session.get(url, params=data, timeout=self.timeout)
+        response.raise_for_status()
+        return Page(response.url, response.text)
+
+    def _lookup_epa_number(self, epa_number: str | int) -> Page:
+        search = self._get_page(self.search_url)
+        form = next((form for form in search.forms if SEARCH_INPUT_ID in form['ids']), None)
+        if form is None:
+            raise NoSuchElementException(f'No search form on {search.url}')
+        data = dict(form['fields'], **{form['ids'][SEARCH_INPUT_ID]: str(epa_number)})
+        return self._get_page(form['action'], form['method'], data)
+
+    def _get_tab(self, report: Page, text: str) -> Page:
+        """Returns the page a report tab shows, which is the report itself for in page anchors."""
+        url, _ = urldefrag(report.get_link(text))
+        if url == urldefrag(report.url)[0]:
+            return report
+        return self._get_page(url)
+
+    @staticmethod
+    def _get_text(page: Page, element_id: str) -> str:
+        try:
+            return page.get_text(element_id)
+        except NoSuchElementException:
+            return ''
+
+    def _parse_pesticide(self, report: Page) -> Pesticide:
+        labels = self._get_tab(report, 'Labels')
+        chemicals = self._get_tab(report, 'Chemical')
+        sites = self._get_tab(report, 'Site')
+        pests = self._get_tab(report, 'Pest')
+        city, _, state_zipcode = self._get_text(report, 'P8_CO_FULL_CITY').partition(', ')
+        state, _, zipcode = state_zipcode.partition(' ')
+        status = self._get_text(report, 'P8_CNT_STATUS')
+        first_registered = self._get_text(report, 'P8_FIRST_REGISTERED')
+        label = labels.get_cells('RIN_NAME')
+        documentation = labels.get_cells('LABEL_DATE') or pests.get_cells('LABEL_DATE')
+        if not documentation or not documentation[0][1]:
+            raise NoSuchElementException(f'No label document on {labels.url}')
+        return Pesticide(
+            label=label[0][0] if label else '',
+            registration_number=self._get_text(report, 'P8_RI_NUM'),
+            company_name=self._get_text(report, 'P8_CO_NAME'),
+            address=self._get_text(report, 'P8_CO_ADDRESS'),
+            po_box=self._get_text(report, 'P8_CO_PO_BOX'),
+            city=city.title(),
+            state=state,
+            zipcode=zipcode,
+            first_registered_date=date_from_string(first_registered) if first_registered else None,
+            current_registered_date=date_from_string(status.split('(')[1][:-1]) if '(' in status else None,
+            registered='Registered' in status,
+            restricted_use=self._get_text(report, 'P8_RUP_YN') == 'YES',
+            active_ingredients={
+                name: {'name': name, 'url': url, 'concentration': float(concentration)}
+                for (name, url), (concentration, _) in zip(chemicals.get_cells('CHEM_LINK'),
+                                                           chemicals.get_cells('RII_PERCENT_WT_WT_VAL'))
+            },
+            sites=[site for site, _ in sites.get_cells('SITE_DESC')],
+            pests=[pest for pest, _ in pests.get_cells('PEST_DESC')],
+            documentation_url=documentation[0][1],
+        )
@@ -1,52 +1,96 @@
-import requests
-import os
+import logging
+from concurrent.futures import Future
+from functools import cached_property
 
-from django.core.files import File
+from django.db import transaction
+from django.db.models import Max
 from django.utils.text import slugify
-from selenium.common import NoSuchElementException
 
-from core import settings
-from inventory.utils.epa_scraper import SeleniumScraper
+from inventory.utils.epa_scraper.downloader import DocumentationDownloader, Download
+from inventory.utils.epa_scraper.epa_scraper import Pesticide, SeleniumScraper
+from inventory.utils.epa_scraper.pesticide_cache import PesticideCache, hash_file
+from inventory.utils.epa_scraper.scraper_pool import ScraperPool
+from inventory.utils.fragment_cache import bump_generation
+from inventory.models.search import SearchDocument
+from inventory.services.search_service import SearchService
 import inflect
-from inventory.models.material import Material, MaterialCategory
+from inventory.models.material import Material, MaterialCategory, MaterialClass, MaterialField
 from common.models.target import Target
 from common.models.unit import Unit
 from inventory.models.brand import Brand
 import json
 import csv
 
-MATERIAL_PATH = settings.BASE_DIR / 'media' / 'materials' / 'documentation'
+BATCH_SIZE = 100
+
+logger = logging.getLogger(__name__)
 
 
 class MaterialUpdater:
-    def __init__(self):
+    def __init__(self, workers: int = 1, scraper_factory=SeleniumScraper, backoff: float = 1.0,
+                 cache: PesticideCache | None = None, batch_size: int = BATCH_SIZE):
         self.PESTICIDE_CATEGORY = MaterialCategory.objects.get(name='Pesticide')
         self.UNSET_UNIT = Unit.objects.get(name='Unspecified')
         self.UNSPECIFIED_BRAND = Brand.objects.get(name='Unspecified')
-        self.scraper = SeleniumScraper()
+        self.UNSPECIFIED_MATERIAL_CLASS = MaterialClass.objects.get(name='Unspecified')
+        self.PESTICIDE_FIELDS = list(self.PESTICIDE_CATEGORY.fields.all())
+        self.workers = workers
+        self.scraper_factory = scraper_factory
+        self.backoff = backoff
+        self.cache = cache
+        self.batch_size = batch_size
+        self.downloader = DocumentationDownloader(workers=workers)
         self.p = inflect.engine()
 
-    def download_documentation_to_temporary_location(self, download_url) -> str:
-        response = requests.get(download_url)
-        filepath = MATERIAL_PATH / 'temp_file.pdf'
-        with open(filepath, 'wb') as f:
-            f.write(response.content)
-        return filepath
-
-    def attach_material_documentation(self, material, documentation_url):
-        temporary_pdf_filepath = self.download_documentation_to_temporary_location(documentation_url)
-        with open(temporary_pdf_filepath, 'rb') as f:
-            material.documentation.save(f'{slugify(material.name)}.pdf', File(f))
-            material.save()
-        os.remove(temporary_pdf_filepath)
-        return material
+    @cached_property
+    def scraper(self):
+        return self.scraper_factory()
+
+    @staticmethod
+    def get_documentation_hash(material) -> str:
+        if not material.documentation or not material.documentation.storage.exists(material.documentation.name):
+            return ''
+        with material.documentation.open('rb') as f:
+            return hash_file(f)
+
+    def attach_material_documentation(self, material, documentation_url) -> str:
+        """
+        Downloads the documentation and saves it to the material unless it has the hash of the file the material
+        already has. Returns the hash of the downloaded file.
+        """
+        return self.store_documentation(material, self.downloader.download(documentation_url))
+
+    def store_documentation(self, material, download: Download) -> str:
+        with download.file as f:
+            # Compared with the file the material has, which the cached hash may no longer describe
+            if not material.documentation or download.sha256 != self.get_documentation_hash(material):
+                # The storage moves the temporary file into place rather than copying it
+                material.documentation.save(f'{slugify(material.name)}.pdf', f)
+        return download.sha256
 
     def create_or_update_pesticide(self, epa_registration_number: str, name: str) -> Material:
+        entry = self.cache.get_fresh(epa_registration_number) if self.cache else None
+        if entry:
+            return self.save_pesticide(entry.pesticide, name, epa_registration_number, changed=False)
         pesticide = self.scraper.parse_pesticide(epa_registration_number)
-        pests = {self.p.singular_noun(pest).title() if self.p.singular_noun(pest) else pest.title() for pest in
-                 pesticide.pests}
+        return self.save_pesticide(pesticide, name, epa_registration_number, changed=self.cache_pesticide(
+            epa_registration_number, pesticide))
+
+    def cache_pesticide(self, epa_registration_number: str, pesticide: Pesticide) -> bool:
+        """Stores a scraped pesticide in the cache, returning whether it changed since it was last scraped."""
+        if self.cache is None:
+            return True
+        changed = self.cache.has_changed(epa_registration_number, pesticide)
+        self.cache.set(epa_registration_number, pesticide)
+        return changed
+
+    def get_pests(self, pesticide: Pesticide) -> set[str]:
+        return {self.p.singular_noun(pest).title() if self.p.singular_noun(pest) else pest.title() for pest in
+                pesticide.pests}
+
+    def get_category_field_values(self, pesticide: Pesticide, pests: set[str]) -> dict[str, str]:
         sites = [site.title() for site in pesticide.sites]
-        category_field_values = {
+        return {
             'epa_registration_number': pesticide.registration_number,
             'pests': ', '.join(pests),
             'sites': ', '.join(sites),
@@ -54,18 +98,31 @@ class MaterialUpdater:
             'active_ingredients': json.dumps(pesticide.active_ingredients)
 
         }
+
+    def get_material_defaults(self, pesticide: Pesticide) -> dict:
+        return {
+            'description': pesticide.label.capitalize(),
+            'brand': self.UNSPECIFIED_BRAND,
+            'material_class': self.UNSPECIFIED_MATERIAL_CLASS,
+            'category': self.PESTICIDE_CATEGORY,
+            'retail_unit': self.UNSET_UNIT,
+            'usage_unit': self.UNSET_UNIT,
+        }
+
+    def save_pesticide(self, pesticide: Pesticide, name: str, epa_registration_number: str = None,
+                       changed: bool = True, downloads: list | None = None) -> Material:
+        """
+        Creates the material of a pesticide and attaches its documentation. With a downloads list the documentation
+        is downloaded in the background instead, and `attach_downloads` attaches it later.
+        """
+        pests = self.get_pests(pesticide)
+        category_field_values = self.get_category_field_values(pesticide, pests)
         material, missing = Material.objects.get_or_create(
             name=name.title(),
-            defaults={
-                'description': pesticide.label.capitalize(),
-                'brand': self.UNSPECIFIED_BRAND,
-                'category': self.PESTICIDE_CATEGORY,
-                'retail_unit': self.UNSET_UNIT,
-                'usage_unit': self.UNSET_UNIT,
-            }
+            defaults=self.get_material_defaults(pesticide),
         )
         if missing:
-            for field in self.PESTICIDE_CATEGORY.fields.all():
+            for field in self.PESTICIDE_FIELDS:
                 material.materialfield_set.get_or_create(
                     field=field,
                     defaults={'value': category_field_values[field.name]}
@@ -73,34 +130,168 @@ class MaterialUpdater:
             for pest in pests:
                 target, created = Target.objects.get_or_create(name=pest, defaults={'description': pest})
                 material.targets.add(target)
-            print(f'Added {material.name}')
+            logger.info('Added %s', material.name)
         else:
-            print(f'Passed {material.name}')
-        material = self.attach_material_documentation(material, pesticide.documentation_url)
+            logger.info('Passed %s', material.name)
+        self.update_documentation(material, pesticide, epa_registration_number or pesticide.registration_number,
+                                  changed, downloads)
         return material
 
+    def save_pesticides(self, pesticides: list[tuple[Pesticide, str, str, bool]],
+                        downloads: list | None = None) -> list[Material]:
+        """
+        Saves a batch of pesticides, given as (pesticide, name, registration number, changed), with a constant
+        number of queries: the missing materials are created in bulk, then the category fields of the new and
+        changed ones are upserted from the scraped values and their pests linked as targets, creating the missing
+        ones.
+        """
+        by_name = {name.title(): (pesticide, epa_registration_number, changed)
+                   for pesticide, name, epa_registration_number, changed in pesticides}
+        with transaction.atomic():
+            materials = {material.name: material for material in Material.objects.filter(name__in=by_name)}
+            missing = [Material(name=name, **self.get_material_defaults(pesticide))
+                       for name, (pesticide, *_) in by_name.items() if name not in materials]
+            if missing:
+                Material.objects.bulk_create(missing, batch_size=BATCH_SIZE, ignore_conflicts=True)
+                materials.update((material.name, material) for material in Material.objects.filter(
+                    name__in=[material.name for material in missing]))
+                for material in missing:
+                    logger.info('Added %s', material.name)
+            # Materials that existed are only updated when their registration changed since the last scrape
+            created = {material.name for material in missing}
+            pests = {name: self.get_pests(pesticide) for name, (pesticide, _, changed) in by_name.items()
+                     if changed or name in created}
+            if pests and self.PESTICIDE_FIELDS:
+                MaterialField.objects.bulk_create([
+                    MaterialField(material=materials[name], field=field, value=values[field.name])
+                    for name in pests
+                    for values in [self.get_category_field_values(by_name[name][0], pests[name])]
+                    for field in self.PESTICIDE_FIELDS
+                ], batch_size=BATCH_SIZE, update_conflicts=True, unique_fields=['material', 'field'],
+                    update_fields=['value'])
+            if pests:
+                targets = self.get_or_create_targets(set().union(*pests.values()))
+                Material.targets.through.objects.bulk_create([
+                    Material.targets.through(material_id=materials[name].pk, target_id=targets[pest].pk)
+                    for name, material_pests in pests.items() for pest in material_pests
+                ], batch_size=BATCH_SIZE, ignore_conflicts=True)
+                # Bulk inserts send no signals, so the written materials and their targets are indexed here
+                search = SearchService()
+                search.update(SearchDocument.DocumentType.MATERIAL, [materials[name].pk for name in pests])
+                search.update(SearchDocument.DocumentType.TARGET, [target.pk for target in targets.values()])
+        # Nor are the cached partials of the models invalidated
+        bump_generation(Material, MaterialField, Material.targets.through, Target)
+        for name, (pesticide, epa_registration_number, changed) in by_name.items():
+            self.update_documentation(materials[name], pesticide, epa_registration_number, changed, downloads)
+        return [materials[name] for name in by_name]
+
+    @staticmethod
+    def get_or_create_targets(names: set[str]) -> dict[str, Target]:
+        """
+        Returns the targets by name, creating the missing ones in bulk. New targets are roots without children, so
+        their tree fields are assigned directly instead of being inserted into the tree one by one.
+        """
+        targets = {target.name: target for target in Target.objects.filter(name__in=names)}
+        missing = sorted(names - targets.keys())
+        if missing:
+            opts = Target._mptt_meta
+            tree_id = Target.objects.aggregate(tree_id=Max(opts.tree_id_attr))['tree_id'] or 0
+            created = Target.objects.bulk_create([
+                Target(name=name, description=name, **{
+                    opts.tree_id_attr: tree_id + i, opts.left_attr: 1, opts.right_attr: 2, opts.level_attr: 0})
+                for i, name in enumerate(missing, start=1)
+            ], batch_size=BATCH_SIZE)
+            if not all(target.pk for target in created):
+                # Databases that cannot return the inserted ids need them read back
+                created = Target.objects.filter(name__in=missing)
+            targets.update((target.name, target) for target in created)
+        return targets
+
+    def update_documentation(self, material, pesticide: Pesticide, epa_registration_number: str, changed: bool,
+                             downloads: list | None = None):
+        entry = self.cache.get(epa_registration_number) if self.cache else None
+        if (not changed and entry and entry.documentation_hash and material.documentation
+                and material.documentation.storage.exists(material.documentation.name)):
+            # Neither the registration nor the label changed since the documentation was attached
+            return
+        if downloads is not None:
+            downloads.append((material, epa_registration_number, self.downloader.submit(pesticide.documentation_url)))
+            return
+        documentation_hash = self.attach_material_documentation(material, pesticide.documentation_url)
+        if entry:
+            self.cache.set_documentation_hash(epa_registration_number, documentation_hash)
+
+    def attach_downloads(self, downloads: list[tuple[Material, str, Future]]) -> list[tuple[str, str]]:
+        """
+        Attaches the documentation downloaded in the background from this thread, in the order requested. A failed
+        download does not stop the others, and is returned as the registration number and name of its material.
+        """
+        failed = []
+        for material, epa_registration_number, future in downloads:
+            try:
+                download = future.result()
+            except Exception:
+                logger.exception('Could not download the documentation of %s', material.name)
+                failed.append((epa_registration_number, material.name))
+                continue
+            try:
+                # Closes the temporary file whether or not it is stored
+                documentation_hash = self.store_documentation(material, download)
+            except Exception:
+                logger.exception('Could not store the documentation of %s', material.name)
+                failed.append((epa_registration_number, material.name))
+                continue
+            if self.cache and self.cache.get(epa_registration_number):
+                self.cache.set_documentation_hash(epa_registration_number, documentation_hash)
+        return failed
+
     def get_or_update_materials_and_targets_from_list(self, epa_registration_numbers: list[list[str, str]]):
+        """
+        Scrapes the pesticides with a pool of browser sessions while saving them here in batches as they arrive, so
+        the database is only written from this thread. Pesticides cached within the TTL are not scraped again, and
+        the documentation downloads concurrently while scraping goes on. Pesticides whose documentation could not be
+        downloaded are saved, and reported as failed with those that could not be scraped.
+        """
         failed_chemicals = []
         successful_chemicals = []
-        for epa_registration_number, name in epa_registration_numbers:
-            try:
-                successful_chemicals.append(self.create_or_update_pesticide(epa_registration_number, name))
-            except NoSuchElementException:
-                failed_chemicals.append((epa_registration_number, name))
-        self.scraper.driver.close()
-        return successful_chemicals, failed_chemicals
+        stale = []
+        batch = []
+        downloads = []
+
+        def save(pesticide, name, epa_registration_number, changed):
+            batch.append((pesticide, name, epa_registration_number, changed))
+            if len(batch) >= self.batch_size:
+                successful_chemicals.extend(self.save_pesticides(batch, downloads))
+                batch.clear()
+
+        try:
+            for epa_registration_number, name in epa_registration_numbers:
+                entry = self.cache.get_fresh(epa_registration_number) if self.cache else None
+                if entry:
+                    save(entry.pesticide, name, epa_registration_number, False)
+                else:
+                    stale.append((epa_registration_number, name))
+            if stale:
+                pool = ScraperPool(workers=self.workers, scraper_factory=self.scraper_factory, backoff=self.backoff)
+                for result in pool.scrape(stale):
+                    if result.error is None:
+                        changed = self.cache_pesticide(result.registration_number, result.pesticide)
+                        save(result.pesticide, result.name, result.registration_number, changed)
+                    else:
+                        failed_chemicals.append((result.registration_number, result.name))
+            if batch:
+                successful_chemicals.extend(self.save_pesticides(batch, downloads))
+            failed_chemicals.extend(self.attach_downloads(downloads))
+            return successful_chemicals, failed_chemicals
+        finally:
+            # Cancels the downloads an error left pending
+            self.downloader.close()
 
     def get_or_update_pesticides_and_targets_from_filepath(self, filepath: str):
-        failed_chemicals = []
-        successful_chemicals = []
         with open(filepath, 'r') as f:
-            for epa_registration_number, name in csv.reader(f):
-                try:
-                    successful_chemicals.append(self.create_or_update_pesticide(epa_registration_number, name))
-                except NoSuchElementException:
-                    failed_chemicals.append((epa_registration_number, name))
-        self.scraper.driver.close()
-        return successful_chemicals, failed_chemicals
+            return self.get_or_update_materials_and_targets_from_list(csv.reader(f))
 
     def close(self):
-        self.scraper.driver.close()
\ No newline at end of file
+        if 'scraper' in self.__dict__:
+            self.scraper.close()
+        self.downloader.close()
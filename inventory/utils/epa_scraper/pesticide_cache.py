@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass, fields
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .epa_scraper import Pesticide
+
+DATE_FIELDS = {'first_registered_date', 'current_registered_date'}
+
+
+def pesticide_to_dict(pesticide: Pesticide) -> dict:
+    values = asdict(pesticide)
+    for name in DATE_FIELDS:
+        if isinstance(values[name], date):
+            values[name] = values[name].isoformat()
+    return values
+
+
+def pesticide_from_dict(values: dict) -> Pesticide:
+    names = {field.name for field in fields(Pesticide)}
+    values = {name: value for name, value in values.items() if name in names}
+    for name in DATE_FIELDS:
+        if values.get(name):
+            values[name] = date.fromisoformat(values[name])
+    return Pesticide(**values)
+
+
+def hash_file(f) -> str:
+    """Returns the SHA-256 of a binary file object, read in blocks from its current position."""
+    digest = hashlib.sha256()
+    for block in iter(lambda: f.read(1 << 16), b''):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    pesticide: Pesticide
+    scraped_at: datetime
+    documentation_hash: str = ''
+
+
+class PesticideCache:
+    """
+    Keeps the last scraped Pesticide of every registration number on disk, one JSON file each. Entries younger than
+    the TTL are used instead of scraping again. A rescraped pesticide whose current registration date and label URL
+    did not change counts as unchanged, so its documentation is not downloaded again.
+    """
+
+    def __init__(self, path: str | Path | None = None, ttl: timedelta | None = None):
+        self.path = Path(path or settings.PESTICIDE_CACHE_PATH)
+        self.ttl = settings.PESTICIDE_CACHE_TTL if ttl is None else ttl
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def get_path(self, registration_number: str) -> Path:
+        return self.path / f'{registration_number.replace("/", "_")}.json'
+
+    def get(self, registration_number: str) -> CacheEntry | None:
+        try:
+            with open(self.get_path(registration_number)) as f:
+                values = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return CacheEntry(pesticide=pesticide_from_dict(values['pesticide']),
+                          scraped_at=datetime.fromisoformat(values['scraped_at']),
+                          documentation_hash=values.get('documentation_hash', ''))
+
+    def get_fresh(self, registration_number: str) -> CacheEntry | None:
+        """Returns the entry of the registration number unless it is missing or older than the TTL."""
+        entry = self.get(registration_number)
+        if entry is None or timezone.now() - entry.scraped_at >= self.ttl:
+            return None
+        return entry
+
+    def has_changed(self, registration_number: str, pesticide: Pesticide) -> bool:
+        entry = self.get(registration_number)
+        return entry is None or (
+            entry.pesticide.current_registered_date != pesticide.current_registered_date
+            or entry.pesticide.documentation_url != pesticide.documentation_url
+        )
+
+    def set(self, registration_number: str, pesticide: Pesticide, documentation_hash: str | None = None) -> CacheEntry:
+        """Stores a freshly scraped pesticide, keeping the documentation hash of the entry unless one is given."""
+        if documentation_hash is None:
+            entry = self.get(registration_number)
+            documentation_hash = entry.documentation_hash if entry else ''
+        entry = CacheEntry(pesticide=pesticide, scraped_at=timezone.now(), documentation_hash=documentation_hash)
+        self.write(registration_number, entry)
+        return entry
+
+    def set_documentation_hash(self, registration_number: str, documentation_hash: str):
+        entry = self.get(registration_number)
+        if entry is not None and entry.documentation_hash != documentation_hash:
+            entry.documentation_hash = documentation_hash
+            self.write(registration_number, entry)
+
+    def write(self, registration_number: str, entry: CacheEntry):
+        # Written to a temporary file first, so an interrupted run never leaves a truncated entry behind
+        with tempfile.NamedTemporaryFile('w', dir=self.path, suffix='.tmp', delete=False) as f:
+            json.dump({
+                'pesticide': pesticide_to_dict(entry.pesticide),
+                'scraped_at': entry.scraped_at.isoformat(),
+                'documentation_hash': entry.documentation_hash,
+            }, f, indent=4)
+        os.replace(f.name, self.get_path(registration_number))
@@ -0,0 +1,134 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator
+
+import requests
+from selenium.common import NoSuchElementException, WebDriverException
+
+from .epa_scraper import Pesticide, SeleniumScraper
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the work in the task queue, and a finished worker in the result queue
+DONE = object()
+
+
+@dataclass
+class ScrapeResult:
+    registration_number: str
+    name: str
+    pesticide: Pesticide | None = None
+    error: Exception | None = None
+    attempts: int = 0
+
+
+class ScraperPool:
+    """
+    Scrapes pesticides with several browser sessions at once. Each worker thread owns one scraper, the registration
+    numbers are fed through a bounded queue and the results come back to the thread iterating over `scrape`, so the
+    caller stays the only one writing to the database. Failed lookups are retried with an exponential backoff and a
+    fresh session, except missing elements: a registration number without a product page fails at once, and so
+    does one whose page cannot be parsed.
+    """
+
+    def __init__(self, workers: int = 4, scraper_factory: Callable[[], SeleniumScraper] = SeleniumScraper,
+                 retries: int = 2, backoff: float = 1.0,
+                 retry_on: tuple[type[Exception], ...] = (WebDriverException, requests.RequestException)):
+        self.workers = max(workers, 1)
+        self.scraper_factory = scraper_factory
+        self.retries = retries
+        self.backoff = backoff
+        self.retry_on = retry_on
+
+    def scrape(self, epa_registration_numbers: Iterable[tuple[str, str]]) -> Iterator[ScrapeResult]:
+        """Yields a result per registration number and name pair, in the order they finish."""
+        tasks = queue.Queue(maxsize=self.workers * 2)
+        results = queue.Queue()
+        stop = threading.Event()
+        feeder = threading.Thread(target=self._feed, args=(epa_registration_numbers, tasks, stop), daemon=True)
+        workers = [threading.Thread(target=self._work, args=(tasks, results, stop), daemon=True)
+                   for _ in range(self.workers)]
+        for thread in [feeder, *workers]:
+            thread.start()
+        running = len(workers)
+        try:
+            while running:
+                result = results.get()
+                if result is DONE:
+                    running -= 1
+                elif isinstance(result, BaseException):
+                    raise result
+                else:
+                    yield result
+        finally:
+            stop.set()
+            for thread in workers:
+                thread.join()
+
+    def _feed(self, epa_registration_numbers, tasks: queue.Queue, stop: threading.Event):
+        try:
+            for item in epa_registration_numbers:
+                if not self._put(tasks, tuple(item), stop):
+                    return
+        finally:
+            for _ in range(self.workers):
+                self._put(tasks, DONE, stop)
+
+    @staticmethod
+    def _put(tasks: queue.Queue, item, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                tasks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _work(self, tasks: queue.Queue, results: queue.Queue, stop: threading.Event):
+        scraper = None
+        try:
+            scraper = self.scraper_factory()
+            while not stop.is_set():
+                try:
+                    item = tasks.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is DONE:
+                    break
+                result, scraper = self._scrape(scraper, *item)
+                results.put(result)
+        except Exception as e:
+            # _scrape fails items itself, so only a session that could not be started, or restarted after a
+            # failure, ends up here: no retry of a single item would fix it
+            results.put(e)
+        finally:
+            if scraper is not None:
+                scraper.close()
+            results.put(DONE)
+
+    def _scrape(self, scraper, registration_number: str, name: str) -> tuple[ScrapeResult, SeleniumScraper]:
+        result = ScrapeResult(registration_number, name)
+        while True:
+            result.attempts += 1
+            try:
+                result.pesticide, result.error = scraper.parse_pesticide(registration_number), None
+                return result, scraper
+            except NoSuchElementException as e:
+                # Subclasses WebDriverException, but the page loaded without the product
+                result.error = e
+                return result, scraper
+            except self.retry_on as e:
+                result.error = e
+                if result.attempts > self.retries:
+                    return result, scraper
+                scraper.close()
+                scraper = self.scraper_factory()
+                time.sleep(self.backoff * 2 ** (result.attempts - 1))
+            except Exception as e:
+                # A page the parser does not understand fails its own item, not the whole import
+                logger.exception('Could not parse the product page of %s', registration_number)
+                result.error = e
+                return result, scraper
@@ -0,0 +1,140 @@
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+FRAGMENT_CACHE = 'fragments'
+
+
+def get_cache():
+    return caches[FRAGMENT_CACHE]
+
+
+def get_generation_key(model: type[Model]) -> str:
+    return f'generation:{model._meta.label_lower}'
+
+
+@functools.cache
+def get_dependencies(model: type[Model]) -> tuple[type[Model], ...]:
+    """Returns the model with the models its own relations point to and the tables of its many-to-many fields."""
+    models = {model}
+    for field in model._meta.get_fields():
+        if field.is_relation and field.concrete and field.related_model is not None:
+            models.add(field.related_model)
+            if field.many_to_many:
+                models.add(field.remote_field.through)
+    return tuple(sorted(models, key=lambda dependency: dependency._meta.label_lower))
+
+
+def get_lookup_models(model: type[Model], lookups=()) -> list[type[Model]]:
+    """Returns the dependencies of the model and of every model the select or prefetch lookups reach from it."""
+    models = set(get_dependencies(model))
+    for lookup in lookups:
+        related_model = model
+        for name in lookup.split('__'):
+            try:
+                related_model = related_model._meta.get_field(name).related_model
+            except FieldDoesNotExist:
+                break
+            if related_model is None:
+                break
+            models.update(get_dependencies(related_model))
+    return sorted(models, key=lambda dependency: dependency._meta.label_lower)
+
+
+def get_generations(models) -> list[int]:
+    """
+    Returns the generation of every model: the time in nanoseconds of its last change, or of the first time it was
+    asked for. Starting a missing one at the current time means a generation evicted from the cache never comes back
+    with a value that fragments rendered before were stored under.
+    """
+    cache = get_cache()
+    keys = [get_generation_key(model) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, time.time_ns(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generation(*models: type[Model]):
+    """Invalidates every fragment rendered from the models. Call it after changing rows without sending signals."""
+    cache = get_cache()
+    for model in models:
+        key = get_generation_key(model)
+        # The time of the change, which always moves forward so a generation is never repeated
+        cache.set(key, max(time.time_ns(), (cache.get(key) or 0) + 1), None)
+
+
+def get_fragment_key(*parts) -> str:
+    return f'fragment:{hashlib.sha256(repr(parts).encode()).hexdigest()}'
+
+
+def get_version(models, *parts) -> tuple[str, int]:
+    """
+    Returns the ETag and the Last-Modified timestamp of a response built from the models, varying with the parts.
+    Neither needs a query: they change with the generations of the models.
+    """
+    generations = get_generations(models)
+    etag = quote_etag(hashlib.sha256(repr((parts, generations)).encode()).hexdigest())
+    return etag, -(-max(generations) // 10 ** 9)
+
+
+def get_versioned_response(request, models, parts, get_response):
+    """
+    Answers 304 Not Modified when the request's validators match the version of the models, or gets the response
+    and tags it with the version.
+    """
+    etag, last_modified = get_version(models, *parts)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = get_response()
+        if response.status_code != 200:
+            return response
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_caches(app_configs=None, **kwargs):
+    """Warns when a cache that writes invalidate lives in one process, where the other workers' writes never reach."""
+    warnings = []
+    if isinstance(get_cache(), LocMemCache):
+        warnings.append(checks.Warning(
+            f'The {FRAGMENT_CACHE!r} cache keeps the model generations in each process, so a worker keeps serving '
+            'the partials and Not Modified responses another worker made stale.',
+            hint='Set FRAGMENT_CACHE_BACKEND to a cache shared by every worker, such as the file based default.',
+            id='inventory.W001',
+        ))
+    if isinstance(caches[settings.PERMISSION_CACHE], LocMemCache):
+        warnings.append(checks.Warning(
+            f'The {settings.PERMISSION_CACHE!r} cache keeps the resolved permissions in each process, so a worker '
+            'keeps granting the permissions another worker revoked, and denying those it granted.',
+            hint='Set PERMISSION_CACHE_BACKEND to a cache shared by every worker, such as the file based default.',
+            id='inventory.W002',
+        ))
+    return warnings
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_saved_model_generation(sender, **kwargs):
+    bump_generation(sender)
+
+
+@receiver(m2m_changed)
+def bump_through_model_generation(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_generation(sender)
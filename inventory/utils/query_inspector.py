@@ -0,0 +1,83 @@
+import re
+import traceback
+from contextlib import ExitStack
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connections
+
+IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+
+
+def get_query_shape(sql: str) -> str:
+    """Returns the SQL with its whitespace collapsed and parameter lists of any length written the same way."""
+    return IN_LIST.sub('(%s, ...)', ' '.join(sql.split()))
+
+
+def is_project_file(filename: str) -> bool:
+    return filename.startswith(str(settings.BASE_DIR)) and 'site-packages' not in filename and filename != __file__
+
+
+def get_project_stack() -> traceback.StackSummary:
+    """Returns the frames of the current stack in project code, outermost first. The last one ran the query."""
+    stack = traceback.StackSummary.extract(
+        ((frame, lineno) for frame, lineno in traceback.walk_stack(None)
+         if is_project_file(frame.f_code.co_filename)), lookup_lines=False)
+    stack.reverse()
+    return stack
+
+
+class RepeatedQueriesError(Exception):
+    pass
+
+
+@dataclass
+class RepeatedQuery:
+    shape: str
+    count: int
+    stack: traceback.StackSummary
+
+    @property
+    def call_site(self) -> traceback.FrameSummary | None:
+        return self.stack[-1] if self.stack else None
+
+    def __str__(self):
+        site = f'{self.call_site.filename}:{self.call_site.lineno} in {self.call_site.name}' if self.call_site else \
+            'outside the project'
+        return f'{self.count} queries from {site}: {self.shape}\n{"".join(self.stack.format())}'
+
+
+class QueryInspector:
+    """
+    Records the queries run on the database connections of the current thread while it is active, grouped by their
+    shape and the project line that ran them. The same query repeated from one line, as a lookup per row of a list
+    does, is reported once it runs `threshold` times.
+    """
+
+    def __init__(self, threshold: int | None = None, using: list[str] | None = None):
+        self.threshold = threshold or settings.QUERY_INSPECTOR_THRESHOLD
+        self.using = using or list(connections)
+        self.queries = {}
+        self.exit_stack = None
+
+    def __enter__(self):
+        self.exit_stack = ExitStack()
+        for alias in self.using:
+            self.exit_stack.enter_context(connections[alias].execute_wrapper(self.record))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.exit_stack.close()
+
+    def record(self, execute, sql, params, many, context):
+        stack = get_project_stack()
+        call_site = (stack[-1].filename, stack[-1].lineno) if stack else None
+        key = (get_query_shape(sql), call_site)
+        if key in self.queries:
+            self.queries[key].count += 1
+        else:
+            self.queries[key] = RepeatedQuery(shape=key[0], count=1, stack=stack)
+        return execute(sql, params, many, context)
+
+    def get_repeated_queries(self) -> list[RepeatedQuery]:
+        return [query for query in self.queries.values() if query.count >= self.threshold]
@@ -0,0 +1,162 @@
+import bisect
+import math
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connections
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+@dataclass
+class RequestMetrics:
+    view: str
+    kind: str
+    status: int = 0
+    latency_ms: float = 0
+    queries: int = 0
+    query_ms: float = 0
+    template_ms: float = 0
+    response_bytes: int = 0
+
+
+@dataclass
+class ViewMetrics:
+    """The totals of the requests to one view of one kind, with a histogram of their latencies."""
+    requests: int = 0
+    errors: int = 0
+    latency_ms: float = 0
+    max_latency_ms: float = 0
+    queries: int = 0
+    query_ms: float = 0
+    template_ms: float = 0
+    response_bytes: int = 0
+    latency_histogram: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+
+    def add(self, metrics: RequestMetrics):
+        self.requests += 1
+        self.errors += metrics.status >= 500
+        self.latency_ms += metrics.latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, metrics.latency_ms)
+        self.queries += metrics.queries
+        self.query_ms += metrics.query_ms
+        self.template_ms += metrics.template_ms
+        self.response_bytes += metrics.response_bytes
+        self.latency_histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, metrics.latency_ms)] += 1
+
+    def merge(self, other: 'ViewMetrics'):
+        self.requests += other.requests
+        self.errors += other.errors
+        self.latency_ms += other.latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, other.max_latency_ms)
+        self.queries += other.queries
+        self.query_ms += other.query_ms
+        self.template_ms += other.template_ms
+        self.response_bytes += other.response_bytes
+        self.latency_histogram = [a + b for a, b in zip(self.latency_histogram, other.latency_histogram)]
+
+    def get_percentile(self, percentile: float) -> float:
+        """Returns the upper bound of the histogram bucket the percentile falls in, or the slowest latency past them."""
+        rank, count = math.ceil(self.requests * percentile / 100), 0
+        for bound, bucket in zip(LATENCY_BUCKETS_MS, self.latency_histogram):
+            count += bucket
+            if count >= rank:
+                return min(bound, self.max_latency_ms)
+        return self.max_latency_ms
+
+    def as_dict(self) -> dict:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'latency_ms': {
+                'mean': round(self.latency_ms / self.requests, 3),
+                'p50': self.get_percentile(50),
+                'p95': self.get_percentile(95),
+                'p99': self.get_percentile(99),
+                'max': round(self.max_latency_ms, 3),
+                'histogram': dict(zip([str(bound) for bound in LATENCY_BUCKETS_MS] + ['+Inf'], self.latency_histogram)),
+            },
+            'queries_mean': round(self.queries / self.requests, 3),
+            'query_ms_mean': round(self.query_ms / self.requests, 3),
+            'template_ms_mean': round(self.template_ms / self.requests, 3),
+            'response_bytes_mean': round(self.response_bytes / self.requests),
+        }
+
+
+class MetricsAggregator:
+    """
+    Keeps the metrics of the requests of the last `window` seconds in memory, in slices of `slice_seconds` per view
+    and kind. Slices older than the window are dropped as new ones start, so a snapshot covers the recent load only.
+    """
+
+    def __init__(self, window: int | None = None, slice_seconds: int = 10):
+        self.window = window or settings.TELEMETRY_WINDOW
+        self.slice_seconds = slice_seconds
+        self.slices = deque()
+        self.lock = threading.Lock()
+
+    def add(self, metrics: RequestMetrics, now: float | None = None):
+        start = int((time.monotonic() if now is None else now) // self.slice_seconds * self.slice_seconds)
+        with self.lock:
+            if not self.slices or self.slices[-1][0] != start:
+                self.slices.append((start, {}))
+                self.expire(start)
+            views = self.slices[-1][1]
+            views.setdefault((metrics.view, metrics.kind), ViewMetrics()).add(metrics)
+
+    def expire(self, now: float):
+        while self.slices and self.slices[0][0] <= now - self.window:
+            self.slices.popleft()
+
+    def snapshot(self, now: float | None = None) -> dict:
+        """Returns the metrics of the window per view and kind, the views taking the most time in total first."""
+        totals = {}
+        with self.lock:
+            self.expire(time.monotonic() if now is None else now)
+            for _, views in self.slices:
+                for key, metrics in views.items():
+                    totals.setdefault(key, ViewMetrics()).merge(metrics)
+        return {
+            'window_seconds': self.window,
+            'views': [
+                {'view': view, 'kind': kind, **metrics.as_dict()}
+                for (view, kind), metrics in sorted(totals.items(), key=lambda item: -item[1].latency_ms)
+            ],
+        }
+
+    def clear(self):
+        with self.lock:
+            self.slices.clear()
+
+
+class QueryTimer:
+    """Counts and times the queries run on the database connections of the current thread while it is active."""
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0
+        self.exit_stack = None
+
+    def __enter__(self):
+        self.exit_stack = ExitStack()
+        for alias in connections:
+            self.exit_stack.enter_context(connections[alias].execute_wrapper(self.record))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.exit_stack.close()
+
+    def record(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.duration += time.perf_counter() - start
+
+
+aggregator = MetricsAggregator()
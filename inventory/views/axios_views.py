@@ -2,8 +2,10 @@ from django.db.models import Model
 from django.http import HttpResponse
 from django.views.generic import DetailView, ListView
 
+from inventory.views.mixins import ConditionalGetMixin, FragmentCacheMixin
 
-class AxiosDetailView(DetailView):
+
+class AxiosDetailView(ConditionalGetMixin, FragmentCacheMixin, DetailView):
     def get_template_names(self):
         names = super().get_template_names()
         if self.request.headers.get('X-Axios-Header'):
@@ -20,7 +22,7 @@ class AxiosDetailView(DetailView):
         return super().get(request, *args, **kwargs)
 
 
-class AxiosListView(ListView):
+class AxiosListView(ConditionalGetMixin, FragmentCacheMixin, ListView):
     def get_template_names(self):
         names = super().get_template_names()
         if self.request.headers.get('X-Axios-Header'):
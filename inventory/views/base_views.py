@@ -4,6 +4,10 @@ from django.views.generic import UpdateView, DeleteView, CreateView
 from django.views.generic.base import ContextMixin
 
 from inventory.views.axios_views import AxiosListView, AxiosDetailView
+from inventory.views.mixins import KeysetListMixin
+
+
+PERMISSION_ACTIONS = {'view': 'view', 'create': 'add', 'update': 'change', 'delete': 'delete'}
 
 
 class CustomMixin(PermissionRequiredMixin, ContextMixin):
@@ -14,12 +18,13 @@ class CustomMixin(PermissionRequiredMixin, ContextMixin):
     partial_list_template: str
     partial_detail_template: str
 
-    def get_permission_required(self) -> dict[str:list]:
+    def get_permission_required(self) -> tuple[str]:
         self.permission_required = self.permission_required or self.get_default_permission_required()
         return super().get_permission_required()
 
-    def get_default_permission_required(self) -> dict[str:list]:
-        return {'any': [f'{self.model._meta.app_label}_{self.permission_scope}_{self.model._meta.model_name}', ]}
+    def get_default_permission_required(self) -> tuple[str]:
+        action = PERMISSION_ACTIONS[self.permission_scope]
+        return f'{self.model._meta.app_label}.{action}_{self.model._meta.model_name}',
 
     def get_title(self):
         if hasattr(self, 'title'): return self.title
@@ -63,11 +68,16 @@ class CustomDetailView(CustomMixin, AxiosDetailView):
     view_type = 'detail'
 
 
-class CustomListView(CustomMixin, AxiosListView):
+class CustomListView(CustomMixin, KeysetListMixin, AxiosListView):
     permission_scope = 'view'
     view_type = 'list'
     template_name = 'inventory/list.html'
 
+    def get_template_names(self):
+        if self.request.headers.get('X-Axios-Header'):
+            return [self.get_partial_list_template()]
+        return super().get_template_names()
+
 
 class CustomUpdateView(CustomMixin, UpdateView):
     permission_scope = 'update'
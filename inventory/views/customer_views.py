@@ -1,4 +1,5 @@
 from customers.models.customer import Customer
+from inventory.filters import CustomerFilter
 from inventory.views.base_views import CustomDeleteView, CustomCreateView, CustomDetailView, CustomUpdateView, \
     CustomListView
 
@@ -9,6 +10,9 @@ class CustomerDetailView(CustomDetailView):
 
 class CustomerListView(CustomListView):
     model = Customer
+    partial_list_template = 'inventory/partials/customer_list.html'
+    partial_detail_template = 'inventory/partials/customer_detail.html'
+    filterset_class = CustomerFilter
 
 
 class CustomerCreateView(CustomCreateView):
@@ -1,3 +1,4 @@
+from inventory.filters import EquipmentFilter
 from inventory.models.equipment import Equipment
 from inventory.views.base_views import CustomDetailView, CustomListView, CustomCreateView, CustomDeleteView, \
     CustomUpdateView
@@ -9,6 +10,7 @@ class EquipmentDetailView(CustomDetailView):
 
 class EquipmentListView(CustomListView):
     model = Equipment
+    filterset_class = EquipmentFilter
 
 
 class EquipmentCreateView(CustomCreateView):
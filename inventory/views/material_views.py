@@ -1,3 +1,4 @@
+from inventory.filters import MaterialFilter
 from inventory.models.material import Material
 from inventory.views.base_views import CustomDetailView, CustomListView, CustomCreateView, CustomDeleteView, \
     CustomUpdateView
@@ -9,6 +10,7 @@ class MaterialDetailView(CustomDetailView):
 
 class MaterialListView(CustomListView):
     model = Material
+    filterset_class = MaterialFilter
 
 
 class MaterialCreateView(CustomCreateView):
@@ -1,3 +1,210 @@
+import json
+import re
+from dataclasses import dataclass
 
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404, HttpResponse, QueryDict
+from django.template.loader import get_template
+from django.utils.cache import patch_vary_headers
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from django.utils.translation import get_language, gettext_lazy as _
 
+from inventory.utils.fragment_cache import get_cache, get_dependencies, get_fragment_key, get_generations, \
+    get_versioned_response
 
+TEMPLATE_TAG = re.compile(r'{[{%](.*?)[}%]}', re.DOTALL)
+DOTTED_PATH = re.compile(r'\b[A-Za-z_]\w*((?:\.\w+)+)')
+
+
+class FragmentCacheMixin:
+    """
+    Serves the partials requested with the X-Axios-Header from the fragment cache. A fragment is keyed by the view,
+    its arguments and query parameters, the permissions of the user and the generations of the model and the models
+    it relates to, which every save or delete of one of them bumps. Views whose partials render other models list
+    them in `fragment_cache_models`.
+    """
+    fragment_cache_models = ()
+
+    def get(self, request, *args, **kwargs):
+        if not request.headers.get('X-Axios-Header'):
+            return super().get(request, *args, **kwargs)
+        key = self.get_fragment_key()
+        content = get_cache().get(key)
+        if content is not None:
+            return HttpResponse(content)
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.render()
+            get_cache().set(key, response.content)
+        return response
+
+    def get_fragment_key(self) -> str:
+        user = self.request.user
+        return get_fragment_key(
+            f'{type(self).__module__}.{type(self).__qualname__}',
+            sorted(self.kwargs.items()),
+            sorted(self.request.GET.lists()),
+            get_language(),
+            'superuser' if user.is_superuser else sorted(user.get_all_permissions()),
+            get_generations(self.get_cache_models()),
+        )
+
+    def get_cache_models(self) -> list:
+        return sorted({*get_dependencies(self.model), *self.fragment_cache_models},
+                      key=lambda model: model._meta.label_lower)
+
+
+class ConditionalGetMixin:
+    """
+    Answers a request with 304 Not Modified, before querying or rendering anything, while the model and the models
+    it relates to have not changed since the ETag or Last-Modified the client sends. The version also varies with
+    the user, the view, its arguments and query parameters, and whether a partial was requested. It goes before
+    FragmentCacheMixin, whose models it checks.
+    """
+
+    def get(self, request, *args, **kwargs):
+        response = get_versioned_response(
+            request, self.get_cache_models(), self.get_version_parts(),
+            lambda: super(ConditionalGetMixin, self).get(request, *args, **kwargs))
+        patch_vary_headers(response, ('X-Axios-Header',))
+        return response
+
+    def get_version_parts(self) -> tuple:
+        return (
+            f'{type(self).__module__}.{type(self).__qualname__}',
+            sorted(self.kwargs.items()),
+            sorted(self.request.GET.lists()),
+            bool(self.request.headers.get('X-Axios-Header')),
+            get_language(),
+            self.request.user.pk,
+        )
+
+
+def get_template_lookups(source: str) -> set[str]:
+    """Returns the dotted paths read from the variables of a template, without the variable itself."""
+    return {path.lstrip('.') for tag in TEMPLATE_TAG.findall(source) for path in DOTTED_PATH.findall(tag)}
+
+
+def get_select_related(model, paths) -> list[str]:
+    """Returns the chains of forward foreign keys and one-to-one fields the paths follow from the model."""
+    lookups = set()
+    for path in paths:
+        related_model, lookup = model, []
+        for name in path.split('.'):
+            try:
+                field = related_model._meta.get_field(name)
+            except FieldDoesNotExist:
+                break
+            if not (field.many_to_one or field.one_to_one) or not field.concrete:
+                break
+            lookup.append(name)
+            related_model = field.related_model
+        if lookup:
+            lookups.add('__'.join(lookup))
+    return sorted(lookups)
+
+
+def get_index_fields(model) -> list[str]:
+    """Returns the editable columns a list can be sorted by with an index: unique, indexed or leading an index."""
+    leading = {index.fields[0].lstrip('-') for index in model._meta.indexes if index.fields}
+    return [field.name for field in model._meta.concrete_fields
+            if field.editable and not field.is_relation and not field.null and not field.primary_key
+            and (field.unique or field.db_index or field.name in leading)]
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    sort: str
+    params: QueryDict
+    next_cursor: str | None = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def next_query(self) -> str:
+        params = self.params.copy()
+        params['after'] = self.next_cursor
+        return params.urlencode()
+
+
+class KeysetListMixin:
+    """
+    Lists a page at a time after the position of the last row of the previous page, filtered by a FilterSet and
+    sorted by one of `sort_fields`, which default to the indexed columns of the model. Foreign keys the partial
+    detail template reads are loaded with the list.
+
+    The query parameters are the filters, `sort` (a field, descending with a leading '-'), `page_size` and `after`,
+    the cursor a page links to its next with.
+    """
+    filterset_class = None
+    sort_fields = None
+    default_sort = 'pk'
+    page_size = 50
+    max_page_size = 500
+
+    def get_sort_fields(self) -> list[str]:
+        return ['pk', *(get_index_fields(self.model) if self.sort_fields is None else self.sort_fields)]
+
+    def get_sort(self) -> str:
+        sort = self.request.GET.get('sort') or self.default_sort
+        return sort if sort.lstrip('-') in self.get_sort_fields() else self.default_sort
+
+    def get_page_size(self) -> int:
+        try:
+            return min(max(int(self.request.GET['page_size']), 1), self.max_page_size)
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_select_related(self) -> list[str]:
+        template = get_template(self.get_partial_detail_template())
+        return get_select_related(self.model, get_template_lookups(template.template.source))
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select_related = self.get_select_related()
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if self.filterset_class is not None:
+            self.filterset = self.filterset_class(self.request.GET, queryset=queryset, request=self.request)
+            queryset = self.filterset.qs
+        sort = self.get_sort()
+        return queryset.order_by(*{sort: None, 'pk' if sort[0] != '-' else '-pk': None})
+
+    def get_paginate_by(self, queryset) -> int:
+        return self.get_page_size()
+
+    def paginate_queryset(self, queryset, page_size):
+        sort = self.get_sort()
+        name, descending = sort.lstrip('-'), sort.startswith('-')
+        field = self.model._meta.pk if name == 'pk' else self.model._meta.get_field(name)
+        after = self.request.GET.get('after')
+        if after:
+            try:
+                value, pk = json.loads(urlsafe_base64_decode(after))
+                value, pk = field.to_python(value), self.model._meta.pk.to_python(pk)
+            except (TypeError, ValueError, ValidationError):
+                raise Http404(_('Invalid cursor'))
+            comparison = 'lt' if descending else 'gt'
+            queryset = queryset.filter(Q(**{f'{name}__{comparison}': value})
+                                       | Q(**{name: value, f'pk__{comparison}': pk}))
+        rows = list(queryset[:page_size + 1])
+        params = self.request.GET.copy()
+        params.pop('after', None)
+        page = KeysetPage(object_list=rows[:page_size], sort=sort, params=params)
+        if len(rows) > page_size:
+            last = rows[page_size - 1]
+            page.next_cursor = urlsafe_base64_encode(json.dumps(
+                [field.value_to_string(last), last.pk], cls=DjangoJSONEncoder).encode())
+        return None, page, page.object_list, bool(after) or page.has_next
+
+    def get_context_data(self, **kwargs) -> dict:
+        context = super().get_context_data(**kwargs)
+        context['filter'] = getattr(self, 'filterset', None)
+        context['sort'] = context['page_obj'].sort
+        context['sort_fields'] = self.get_sort_fields()
+        return context
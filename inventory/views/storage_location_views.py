@@ -1,3 +1,4 @@
+from inventory.filters import StorageLocationFilter
 from inventory.models.storage_location import StorageLocation
 from inventory.views.base_views import CustomDetailView, CustomListView, CustomCreateView, CustomDeleteView, \
     CustomUpdateView
@@ -9,6 +10,9 @@ class StorageLocationDetailView(CustomDetailView):
 
 class StorageLocationListView(CustomListView):
     model = StorageLocation
+    partial_list_template = 'inventory/partials/stock_location_list.html'
+    partial_detail_template = 'inventory/partials/stock_location_detail.html'
+    filterset_class = StorageLocationFilter
 
 
 class StorageLocationCreateView(CustomCreateView):
@@ -0,0 +1,99 @@
+import json
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from main.management.commands.autodump import ModelStats, open_output
+from main.management.commands.bulkload import iterate_json_array, open_input
+
+
+class Delta:
+    """
+    The combined effect of a sequence of deltas written by `autodump --since`: the latest version of every created
+    or changed row, the rows deleted, and per model the primary keys still live when the last delta was taken.
+    """
+
+    def __init__(self):
+        self.changes = {}
+        self.deleted = set()
+        self.live = {}
+
+    @staticmethod
+    def key(entry, pk=None):
+        return entry['model'], str(entry['pk'] if pk is None else pk)
+
+    def add(self, entry):
+        model = entry['model']
+        if 'fields' in entry:
+            key = self.key(entry)
+            self.changes[key] = entry
+            self.deleted.discard(key)
+        elif 'deleted' in entry:
+            for pk in entry['deleted']:
+                key = self.key(entry, pk)
+                self.changes.pop(key, None)
+                self.deleted.add(key)
+        elif 'live' in entry or entry.get('replace'):
+            live = {str(pk) for pk in entry.get('live', ())}
+            self.live[model] = live
+            for key in [key for key in self.changes if key[0] == model and key[1] not in live]:
+                del self.changes[key]
+        else:
+            raise CommandError(f'Unknown delta entry for {model}.')
+
+    def is_removed(self, key) -> bool:
+        model, pk = key
+        return key in self.deleted or (model in self.live and pk not in self.live[model])
+
+    def apply(self, objects):
+        """Yields the objects of the base dump with the delta applied, followed by the rows it created."""
+        changes = dict(self.changes)
+        for entry in objects:
+            key = self.key(entry)
+            if key in changes:
+                yield changes.pop(key)
+            elif not self.is_removed(key):
+                yield entry
+        yield from changes.values()
+
+
+class Command(BaseCommand):
+    help = (
+        'Replays deltas dumped by `autodump --since` onto a base dump, writing a new full dump. The base dump is '
+        'streamed, so only the deltas are held in memory.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('base', help='The full dump the deltas were taken against.')
+        parser.add_argument('deltas', nargs='+', help='Deltas to apply, oldest first.')
+        parser.add_argument('-o', '--output', required=True,
+                            help='Specifies file to which the resulting dump is written.')
+        parser.add_argument('--indent', type=int, default=4,
+                            help='Specifies the indent level to use when pretty-printing output.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        delta = Delta()
+        for path in options['deltas']:
+            with open_input(path) as stream:
+                for entry in iterate_json_array(stream):
+                    delta.add(entry)
+
+        stats = ModelStats('Total')
+        with open_input(options['base']) as source, open_output(options['output']) as stream:
+            stream.write('[')
+            separator = '\n'
+            for entry in delta.apply(iterate_json_array(source)):
+                stream.write(separator)
+                json.dump(entry, stream, cls=DjangoJSONEncoder, indent=options['indent'], ensure_ascii=False)
+                separator = ',\n'
+                stats.count += 1
+            stream.write('\n]\n')
+        stats.seconds = time.perf_counter() - started
+
+        if options['verbosity'] > 0:
+            self.stdout.write(
+                f'{stats} after {len(delta.changes)} changes and {len(delta.deleted)} deletions '
+                f'from {len(options["deltas"])} deltas')
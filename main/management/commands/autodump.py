@@ -1,12 +1,21 @@
 import gzip
+import json
 import os
+import time
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
 
+import django
 from django.apps import apps
 from django.core import serializers
 from django.core.management.base import BaseCommand, CommandError
 from django.core.management.utils import parse_apps_and_model_labels
-from django.db import DEFAULT_DB_ALIAS, router
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 try:
     import bz2
@@ -20,11 +29,181 @@ try:
 except ImportError:
     has_lzma = False
 
+try:
+    import zstandard
+    has_zstd = True
+except ImportError:
+    has_zstd = False
+
+CHUNK_SIZE = 2000
+
 
 class ProxyModelWarning(Warning):
     pass
 
 
+@dataclass
+class ModelStats:
+    label: str
+    count: int = 0
+    seconds: float = 0
+
+    @property
+    def rate(self) -> float:
+        return self.count / self.seconds if self.seconds else 0
+
+    def __str__(self):
+        return f'{self.label}: {self.count} rows in {self.seconds:.2f}s ({self.rate:.0f} rows/s)'
+
+
+def open_output(output):
+    """Opens the output file for streaming text, compressed according to its extension."""
+    file_root, file_ext = os.path.splitext(output)
+    compression_formats = {
+        '.bz2': (open, {}, file_root),
+        '.gz': (gzip.open, {}, output),
+        '.lzma': (open, {}, file_root),
+        '.xz': (open, {}, file_root),
+        '.zip': (open, {}, file_root),
+        '.zst': (open, {}, file_root),
+    }
+    if has_bz2:
+        compression_formats['.bz2'] = (bz2.open, {}, output)
+    if has_lzma:
+        compression_formats['.lzma'] = (
+            lzma.open, {'format': lzma.FORMAT_ALONE}, output
+        )
+        compression_formats['.xz'] = (lzma.open, {}, output)
+    if has_zstd:
+        compression_formats['.zst'] = (zstandard.open, {}, output)
+    try:
+        open_method, kwargs, file_path = compression_formats[file_ext]
+    except KeyError:
+        open_method, kwargs, file_path = (open, {}, output)
+    if file_path != output:
+        file_name = os.path.basename(file_path)
+        warnings.warn(
+            f"Unsupported file extension ({file_ext}). "
+            f"Fixtures saved in '{file_name}'.",
+            RuntimeWarning,
+        )
+    return open_method(file_path, 'wt', **kwargs)
+
+
+def get_queryset(model, using, use_base_manager=False, primary_keys=None):
+    objects = model._base_manager if use_base_manager else model._default_manager
+    queryset = objects.using(using).order_by(model._meta.pk.name)
+    if primary_keys:
+        queryset = queryset.filter(pk__in=primary_keys)
+    return queryset
+
+
+def iterate_keyset(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Yields the rows of the queryset in primary key order, fetching each chunk with a `pk > last` query so that
+    memory stays flat and no chunk pays for an OFFSET scan.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        chunk = list((queryset if last_pk is None else queryset.filter(pk__gt=last_pk))[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        last_pk = chunk[-1].pk
+
+
+def count_rows(objects, stats: ModelStats):
+    """Passes the objects through while counting them and timing how long they took to produce."""
+    started = time.perf_counter()
+    for obj in objects:
+        stats.count += 1
+        yield obj
+    stats.seconds = time.perf_counter() - started
+
+
+def dump_model(label, output, options) -> ModelStats:
+    """Dumps one model into its own file. Runs in worker processes, so it takes and returns plain values."""
+    stats = ModelStats(label)
+    queryset = get_queryset(apps.get_model(label), options['database'], options['use_base_manager'])
+    with open_output(output) as stream:
+        serializers.serialize(
+            options['format'], count_rows(iterate_keyset(queryset, options['chunk_size']), stats),
+            indent=options['indent'], use_natural_foreign_keys=options['use_natural_foreign_keys'],
+            use_natural_primary_keys=options['use_natural_primary_keys'], stream=stream,
+        )
+    return stats
+
+
+def read_checkpoint(since):
+    """Returns the timestamp of a checkpoint file written by an earlier dump, or of an ISO 8601 timestamp."""
+    value = since
+    if os.path.isfile(since):
+        with open(since) as stream:
+            value = json.load(stream)['timestamp']
+    timestamp = parse_datetime(value)
+    if timestamp is None:
+        raise CommandError(f"'{since}' is neither a checkpoint file nor a timestamp.")
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return timestamp
+
+
+def write_checkpoint(path, timestamp, output):
+    with open(path, 'w') as stream:
+        json.dump({'timestamp': timestamp.isoformat(), 'output': output}, stream, indent=4)
+
+
+def get_change_tracking(model):
+    """
+    Returns how the changes of a model since a checkpoint are found: 'history' for models tracked by
+    simple_history, 'appended' for the history tables themselves, 'timestamp' for models with an auto_now field,
+    or None when they cannot be found and the model is dumped in full.
+    """
+    if hasattr(model._meta, 'simple_history_manager_attribute'):
+        return 'history'
+    if hasattr(model, 'instance_type'):
+        return 'appended'
+    if get_timestamp_field(model):
+        return 'timestamp'
+    return None
+
+
+def get_timestamp_field(model):
+    return next((field.name for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)), None)
+
+
+def iterate_delta(model, queryset, since, chunk_size=CHUNK_SIZE, **serializer_options):
+    """
+    Yields the delta entries of a model as fixture dicts. A marker comes first: the rows deleted since the checkpoint
+    according to the history, the primary keys of every live row for timestamped models, or a replacement of the
+    whole model. The rows created or changed since the checkpoint follow.
+    """
+    label = model._meta.label_lower
+    tracking = get_change_tracking(model)
+    if tracking == 'history':
+        history = getattr(model, model._meta.simple_history_manager_attribute).using(queryset.db).filter(
+            history_date__gte=since)
+        pk_name = model._meta.pk.attname
+        changed = set(history.values_list(pk_name, flat=True))
+        queryset = queryset.filter(pk__in=changed)
+        live = set(queryset.values_list('pk', flat=True))
+        deleted = set(history.filter(history_type='-').values_list(pk_name, flat=True)) - live
+        if deleted:
+            yield {'model': label, 'deleted': sorted(deleted)}
+    elif tracking == 'appended':
+        queryset = queryset.filter(history_date__gte=since)
+    elif tracking == 'timestamp':
+        yield {'model': label, 'live': list(queryset.values_list('pk', flat=True).iterator(chunk_size))}
+        queryset = queryset.filter(**{f'{get_timestamp_field(model)}__gte': since})
+    else:
+        yield {'model': label, 'replace': True}
+    serializer = serializers.get_serializer('python')()
+    objects = iterate_keyset(queryset, chunk_size)
+    while chunk := list(islice(objects, chunk_size)):
+        yield from serializer.serialize(chunk, **serializer_options)
+
+
 class Command(BaseCommand):
     help = (
         "Output the contents of the database as a fixture of the given format "
@@ -75,7 +254,32 @@ class Command(BaseCommand):
         )
         parser.add_argument(
             '-o', '--output', default='fixtures/db.json',
-            help='Specifies file to which the output is written.'
+            help='Specifies file to which the output is written, or the directory with --split.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Number of rows fetched per query while streaming a model.',
+        )
+        parser.add_argument(
+            '--split', action='store_true',
+            help='Writes each model to its own file in the output directory.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Number of processes dumping models in parallel. Implies --split.',
+        )
+        parser.add_argument(
+            '--compression', default='', choices=['', 'gz', 'bz2', 'xz', 'zst'],
+            help='Compresses the per-model files of --split while they are written.',
+        )
+        parser.add_argument(
+            '--since',
+            help='Dumps only the rows created, changed or deleted since a checkpoint file or ISO 8601 timestamp, '
+                 'as a delta for the applydelta command.',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Writes the time the dump started to this file, for the --since option of the next dump.',
         )
 
     def handle(self, *app_labels, **options):
@@ -152,43 +356,46 @@ class Command(BaseCommand):
 
             raise CommandError("Unknown serialization format: %s" % format)
 
+        dump_models = self.get_models(app_list, excluded_models, using, use_natural_foreign_keys)
+        report = self.stdout if output else self.stderr
+        checkpoint = timezone.now()
+
+        if options['since']:
+            if options['split'] or options['workers'] > 1 or primary_keys:
+                raise CommandError("You cannot use --since option with --split or --pks")
+            if format != 'json':
+                raise CommandError("Deltas can only be dumped as json")
+            started = time.perf_counter()
+            all_stats = self.dump_delta(dump_models, output, read_checkpoint(options['since']), options)
+            self.write_report(report, all_stats, time.perf_counter() - started, options['verbosity'])
+            if options['checkpoint']:
+                write_checkpoint(options['checkpoint'], checkpoint, output)
+            return
+
+        if options['split'] or options['workers'] > 1:
+            if primary_keys:
+                raise CommandError("You cannot use --pks option with --split")
+            started = time.perf_counter()
+            all_stats = self.dump_split(dump_models, output, options)
+            self.write_report(report, all_stats, time.perf_counter() - started, options['verbosity'])
+            if options['checkpoint']:
+                write_checkpoint(options['checkpoint'], checkpoint, output)
+            return
+
+        all_stats = []
+
         def get_objects(count_only=False):
             """
             Collate the objects to be serialized. If count_only is True, just
             count the number of objects to be serialized.
             """
-            if use_natural_foreign_keys:
-                models = serializers.sort_dependencies(app_list.items(), allow_cycles=True)
-            else:
-                # There is no need to sort dependencies when natural foreign
-                # keys are not used.
-                models = []
-                for (app_config, model_list) in app_list.items():
-                    if model_list is None:
-                        models.extend(app_config.get_models())
-                    else:
-                        models.extend(model_list)
-            for model in models:
-                if model in excluded_models:
-                    continue
-                if model._meta.proxy and model._meta.proxy_for_model not in models:
-                    warnings.warn(
-                        "%s is a proxy model and won't be serialized." % model._meta.label,
-                        category=ProxyModelWarning,
-                    )
-                if not model._meta.proxy and router.allow_migrate_model(using, model):
-                    if use_base_manager:
-                        objects = model._base_manager
-                    else:
-                        objects = model._default_manager
-
-                    queryset = objects.using(using).order_by(model._meta.pk.name)
-                    if primary_keys:
-                        queryset = queryset.filter(pk__in=primary_keys)
-                    if count_only:
-                        yield queryset.order_by().quantity()
-                    else:
-                        yield from queryset.iterator()
+            for model in dump_models:
+                queryset = get_queryset(model, using, use_base_manager, primary_keys)
+                if count_only:
+                    yield queryset.order_by().count()
+                else:
+                    all_stats.append(ModelStats(model._meta.label))
+                    yield from count_rows(iterate_keyset(queryset, options['chunk_size']), all_stats[-1])
 
         try:
             self.stdout.ending = None
@@ -198,36 +405,8 @@ class Command(BaseCommand):
             if output and self.stdout.isatty() and options['verbosity'] > 0:
                 progress_output = self.stdout
                 object_count = sum(get_objects(count_only=True))
-            if output:
-                file_root, file_ext = os.path.splitext(output)
-                compression_formats = {
-                    '.bz2': (open, {}, file_root),
-                    '.gz': (gzip.open, {}, output),
-                    '.lzma': (open, {}, file_root),
-                    '.xz': (open, {}, file_root),
-                    '.zip': (open, {}, file_root),
-                }
-                if has_bz2:
-                    compression_formats['.bz2'] = (bz2.open, {}, output)
-                if has_lzma:
-                    compression_formats['.lzma'] = (
-                        lzma.open, {'format': lzma.FORMAT_ALONE}, output
-                    )
-                    compression_formats['.xz'] = (lzma.open, {}, output)
-                try:
-                    open_method, kwargs, file_path = compression_formats[file_ext]
-                except KeyError:
-                    open_method, kwargs, file_path = (open, {}, output)
-                if file_path != output:
-                    file_name = os.path.basename(file_path)
-                    warnings.warn(
-                        f"Unsupported file extension ({file_ext}). "
-                        f"Fixtures saved in '{file_name}'.",
-                        RuntimeWarning,
-                    )
-                stream = open_method(file_path, 'wt', **kwargs)
-            else:
-                stream = None
+            started = time.perf_counter()
+            stream = open_output(output) if output else None
             try:
                 serializers.serialize(
                     format, get_objects(), indent=indent,
@@ -243,3 +422,93 @@ class Command(BaseCommand):
             if show_traceback:
                 raise
             raise CommandError("Unable to serialize database: %s" % e)
+        self.stdout.ending = '\n'
+        self.write_report(report, all_stats, time.perf_counter() - started, options['verbosity'])
+        if options['checkpoint']:
+            write_checkpoint(options['checkpoint'], checkpoint, output)
+
+    @staticmethod
+    def get_models(app_list, excluded_models, using, use_natural_foreign_keys):
+        """Lists the models to dump, in dependency order when natural foreign keys are used."""
+        if use_natural_foreign_keys:
+            models = serializers.sort_dependencies(app_list.items(), allow_cycles=True)
+        else:
+            # There is no need to sort dependencies when natural foreign
+            # keys are not used.
+            models = []
+            for (app_config, model_list) in app_list.items():
+                if model_list is None:
+                    models.extend(app_config.get_models())
+                else:
+                    models.extend(model_list)
+        dump_models = []
+        for model in models:
+            if model in excluded_models:
+                continue
+            if model._meta.proxy and model._meta.proxy_for_model not in models:
+                warnings.warn(
+                    "%s is a proxy model and won't be serialized." % model._meta.label,
+                    category=ProxyModelWarning,
+                )
+            if not model._meta.proxy and router.allow_migrate_model(using, model):
+                dump_models.append(model)
+        return dump_models
+
+    @staticmethod
+    def dump_split(dump_models, output, options) -> list[ModelStats]:
+        """Dumps every non-empty model into its own file of the output directory, in parallel with --workers."""
+        os.makedirs(output, exist_ok=True)
+        options = {name: options[name] for name in (
+            'format', 'indent', 'database', 'use_base_manager', 'use_natural_foreign_keys', 'use_natural_primary_keys',
+            'chunk_size', 'compression', 'workers')}
+        extension = f'.{options["format"]}' + (f'.{options["compression"]}' if options['compression'] else '')
+        jobs = [
+            (model._meta.label, os.path.join(output, f'{model._meta.label_lower}{extension}'))
+            for model in dump_models
+            if get_queryset(model, options['database'], options['use_base_manager']).exists()
+        ]
+        if options['workers'] <= 1:
+            return [dump_model(label, path, options) for label, path in jobs]
+        # Forked workers must not share the connections of the parent process
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as executor:
+            futures = [executor.submit(dump_model, label, path, options) for label, path in jobs]
+            return [future.result() for future in futures]
+
+    def dump_delta(self, dump_models, output, since, options) -> list[ModelStats]:
+        """Writes the delta entries of every model since the checkpoint as one JSON array."""
+        all_stats = []
+        stream = open_output(output) if output else self.stdout
+        self.stdout.ending = None
+        try:
+            stream.write('[')
+            separator = '\n'
+            for model in dump_models:
+                all_stats.append(ModelStats(model._meta.label))
+                queryset = get_queryset(model, options['database'], options['use_base_manager'])
+                entries = iterate_delta(
+                    model, queryset, since, options['chunk_size'],
+                    use_natural_foreign_keys=options['use_natural_foreign_keys'],
+                    use_natural_primary_keys=options['use_natural_primary_keys'],
+                )
+                for entry in count_rows(entries, all_stats[-1]):
+                    stream.write(separator)
+                    json.dump(entry, stream, cls=DjangoJSONEncoder, indent=options['indent'], ensure_ascii=False)
+                    separator = ',\n'
+            stream.write('\n]\n')
+        finally:
+            self.stdout.ending = '\n'
+            if output:
+                stream.close()
+        return all_stats
+
+    @staticmethod
+    def write_report(report, all_stats, seconds, verbosity):
+        if verbosity < 1:
+            return
+        if verbosity > 1:
+            for stats in all_stats:
+                if stats.count:
+                    report.write(str(stats))
+        total = ModelStats('Total', sum(stats.count for stats in all_stats), seconds)
+        report.write(f'{total} across {len(all_stats)} models')
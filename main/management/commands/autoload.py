@@ -5,4 +5,5 @@ class Command(BaseCommand):
     help = 'Loads data from fixtures/db created by the autodump command'
 
     def handle(self, **kwargs):
-        call_command('loaddata', 'fixtures/db_requirements')
\ No newline at end of file
+        # Deferring the signals makes bulkload create the stock holders and price history once the rows are in
+        call_command('bulkload', 'fixtures/db_requirements.json', defer_signals=True)
@@ -0,0 +1,11 @@
+from django.core.management import BaseCommand
+
+from inventory.models.price_history import backfill_price_history
+
+
+class Command(BaseCommand):
+    help = 'Records the current prices of the vendor items that have no price history yet'
+
+    def handle(self, **kwargs):
+        recorded = backfill_price_history()
+        self.stdout.write(self.style.SUCCESS(f'Recorded the prices of {recorded} vendor items'))
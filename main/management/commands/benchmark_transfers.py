@@ -0,0 +1,110 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections
+from django.test.utils import setup_databases, teardown_databases
+
+from common.models.address import Address
+from common.models.unit import Unit, UnitCategory
+from inventory.exceptions import TransactionError
+from inventory.models.brand import Brand
+from inventory.models.material import Material, MaterialCategory, MaterialClass
+from inventory.models.stock_holder import StockHolder
+from inventory.models.storage_location import StorageLocation
+from inventory.models.transfer import Transfer, TransferMaterialItem
+from inventory.models.vehicle import Vehicle
+from inventory.services.stock_ledger_service import StockLedgerService
+from inventory.services.transfer_service import TransferService
+
+MAX_ATTEMPTS = 50
+
+
+class Command(BaseCommand):
+    help = """Measures the throughput of completing transfers concurrently.
+    The benchmark runs against a temporary test database and never touches existing data.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transfers', type=int, default=200, help='Number of transfers to complete.')
+        parser.add_argument('--lines', type=int, default=10, help='Number of material lines per transfer.')
+        parser.add_argument('--workers', type=int, default=8, help='Number of concurrent workers.')
+        parser.add_argument('--vehicles', type=int, default=20, help='Number of destination vehicles.')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            # Worker threads need a file database to share, the default in-memory test database is per connection
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={DEFAULT_DB_ALIAS})
+        try:
+            transfer_ids = self.create_transfers(**options)
+            elapsed, failures, retries = self.complete_transfers(transfer_ids, options['workers'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+        completed = len(transfer_ids) - failures
+        self.stdout.write(
+            f'Completed {completed} of {len(transfer_ids)} transfers ({completed * options["lines"]} lines) '
+            f'with {options["workers"]} workers in {elapsed:.3f}s\n'
+            f'{completed / elapsed:.1f} transfers/s, {completed * options["lines"] / elapsed:.1f} lines/s, '
+            f'{retries} retries'
+        )
+
+    @staticmethod
+    def create_transfers(transfers: int, lines: int, vehicles: int, **kwargs) -> list[int]:
+        user = get_user_model().objects.create(username='benchmark')
+        unit_category = UnitCategory.objects.create(name='Benchmark', description='')
+        unit = Unit.objects.create(name='Benchmark', abbreviation='', category=unit_category)
+        brand = Brand.objects.create(name='Benchmark')
+        material_class = MaterialClass.objects.create(name='Benchmark', description='')
+        category = MaterialCategory.objects.create(name='Benchmark', description='')
+        materials = Material.objects.bulk_create(
+            Material(name=f'Benchmark {i}', description='', brand=brand, material_class=material_class,
+                     category=category, usage_unit=unit, retail_unit=unit) for i in range(lines))
+        address = Address.objects.create(name='Benchmark', street_address='', city='', state='', postal_code='')
+        warehouse = StorageLocation.objects.create(name='Benchmark', address=address, description='')
+        trucks = Vehicle.objects.bulk_create(
+            Vehicle(name=f'Benchmark {i}', vin_number=f'{i}', license_plate=f'{i}', make='', model='',
+                    model_year=2020) for i in range(vehicles))
+
+        ledger = StockLedgerService(user=user)
+        for material in materials:
+            ledger.receive(material, transfers, destination=warehouse)
+
+        # The trucks were bulk created without signals, so their holders are created here
+        StockHolder.objects.sync()
+        holders = dict(StockHolder.objects.filter(vehicle__in=trucks).values_list('vehicle_id', 'pk'))
+        created = Transfer.objects.bulk_create(
+            Transfer(source=warehouse.stock_holder, destination_id=holders[trucks[i % vehicles].pk],
+                     release_agent=user, transfer_agent=user)
+            for i in range(transfers))
+        TransferMaterialItem.objects.bulk_create(
+            TransferMaterialItem(transfer=transfer, material_item=material, quantity=1)
+            for transfer in created for material in materials)
+        return [transfer.pk for transfer in created]
+
+    @staticmethod
+    def complete_transfers(transfer_ids: list[int], workers: int) -> tuple[float, int, int]:
+        def complete(transfer_id) -> tuple[bool, int]:
+            try:
+                for attempt in range(MAX_ATTEMPTS):
+                    try:
+                        TransferService().complete(transfer_id)
+                        return True, attempt
+                    except OperationalError:
+                        # SQLite allows a single writer and fails lock upgrades instead of waiting for them
+                        time.sleep(0.001 * 2 ** min(attempt, 6))
+                    except TransactionError:
+                        return False, attempt
+                return False, MAX_ATTEMPTS
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(complete, transfer_ids))
+        elapsed = time.perf_counter() - start
+        return elapsed, sum(1 for completed, _retries in results if not completed), sum(
+            retries for _completed, retries in results)
@@ -0,0 +1,260 @@
+import gzip
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.python import Deserializer as PythonDeserializer
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch.dispatcher import NO_RECEIVERS
+
+from inventory.utils.fragment_cache import bump_generation
+from main.management.commands.autodump import ModelStats
+
+try:
+    import bz2
+    has_bz2 = True
+except ImportError:
+    has_bz2 = False
+
+try:
+    import lzma
+    has_lzma = True
+except ImportError:
+    has_lzma = False
+
+try:
+    import zstandard
+    has_zstd = True
+except ImportError:
+    has_zstd = False
+
+BATCH_SIZE = 1000
+READ_SIZE = 1 << 16
+WHITESPACE = ' \t\n\r'
+
+
+def open_input(path):
+    """Opens a fixture for streaming text, decompressing it according to its extension."""
+    open_methods = {'.gz': gzip.open}
+    if has_bz2:
+        open_methods['.bz2'] = bz2.open
+    if has_lzma:
+        open_methods['.xz'] = lzma.open
+        open_methods['.lzma'] = lzma.open
+    if has_zstd:
+        open_methods['.zst'] = zstandard.open
+    return open_methods.get(os.path.splitext(path)[1], open)(path, 'rt')
+
+
+def iterate_json_array(stream, read_size=READ_SIZE):
+    """
+    Yields the items of a top level JSON array one at a time while reading the stream in blocks, so that
+    fixtures of any size are parsed in constant memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof = '', 0, False
+
+    def skip(*characters):
+        nonlocal buffer, position, eof
+        while True:
+            while position < len(buffer) and buffer[position] in WHITESPACE:
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            buffer, position = stream.read(read_size), 0
+            eof = not buffer
+        if position < len(buffer) and buffer[position] in characters:
+            position += 1
+            return True
+        return False
+
+    if not skip('['):
+        raise CommandError('The fixture is not a JSON array.')
+    while True:
+        if skip(']'):
+            return
+        if skip(','):
+            skip()
+        while True:
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+                break
+            except json.JSONDecodeError:
+                chunk = stream.read(read_size)
+                if not chunk:
+                    raise
+                buffer, position = buffer[position:] + chunk, 0
+        yield item
+
+
+MODEL_SIGNALS = (pre_save, post_save, pre_delete, post_delete, m2m_changed)
+
+
+@contextmanager
+def deferred_signals(*models, signals=MODEL_SIGNALS):
+    """
+    Mutes the receivers of the signals for the given models by marking them as having none in the sender cache of
+    each signal, then forgets the marks. Receivers of other models keep firing. The cache is shared by the whole
+    process, so this is not thread-safe: saves of the same models in other threads are muted as well meanwhile.
+    """
+    for signal in signals:
+        for model in models:
+            signal.sender_receivers_cache[model] = NO_RECEIVERS
+    try:
+        yield
+    finally:
+        for signal in signals:
+            for model in models:
+                signal.sender_receivers_cache.pop(model, None)
+
+
+class BulkLoader:
+    """
+    Inserts deserialized objects with bulk_create, buffering them per model and flushing a model whenever its
+    buffer is full. Foreign keys are checked when the transaction ends, so batches of different models may be
+    flushed in any order. Models with concrete parents cannot be bulk inserted and are saved one by one, as are
+    forward references; with `defer_signals` those saves send no model signals either.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, batch_size=BATCH_SIZE, defer_signals=False):
+        self.using = using
+        self.batch_size = batch_size
+        self.defer_signals = defer_signals
+        self.connection = connections[using]
+        self.buffers = defaultdict(list)
+        self.m2m_rows = defaultdict(list)
+        self.deferred = []
+        self.stats = {}
+
+    def add(self, deserialized):
+        model = type(deserialized.object)
+        self.buffers[model].append(deserialized)
+        if len(self.buffers[model]) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, model):
+        objects = self.buffers.pop(model, [])
+        if not objects:
+            return
+        stats = self.stats.setdefault(model, ModelStats(model._meta.label))
+        started = time.perf_counter()
+        if model._meta.parents:
+            with self.get_deferred_signals(model):
+                for deserialized in objects:
+                    deserialized.object.save_base(raw=True, using=self.using)
+        else:
+            fields = [field.name for field in model._meta.concrete_fields if not field.primary_key]
+            kwargs = {}
+            if self.connection.features.supports_update_conflicts_with_target and fields:
+                # Rows that already exist are overwritten like loaddata does
+                kwargs = {'update_conflicts': True, 'unique_fields': [model._meta.pk.name], 'update_fields': fields}
+            model._base_manager.using(self.using).bulk_create(
+                [deserialized.object for deserialized in objects], **kwargs)
+        for deserialized in objects:
+            if deserialized.deferred_fields:
+                self.deferred.append(deserialized)
+            for field_name, values in (deserialized.m2m_data or {}).items():
+                field = model._meta.get_field(field_name)
+                through = field.remote_field.through
+                source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+                self.m2m_rows[through].extend(
+                    through(**{f'{source}_id': deserialized.object.pk, f'{target}_id': value}) for value in values)
+        stats.count += len(objects)
+        stats.seconds += time.perf_counter() - started
+
+    def get_deferred_signals(self, *models):
+        return deferred_signals(*models) if self.defer_signals else nullcontext()
+
+    def finish(self) -> list[ModelStats]:
+        """Flushes the remaining objects in dependency order, then the many-to-many rows and forward references."""
+        for model in serializers.sort_dependencies(
+                [(model._meta.app_config, [model]) for model in list(self.buffers)], allow_cycles=True):
+            self.flush(model)
+        for through, rows in self.m2m_rows.items():
+            through._base_manager.using(self.using).bulk_create(rows, batch_size=self.batch_size,
+                                                                ignore_conflicts=True)
+        with self.get_deferred_signals(*{type(deserialized.object) for deserialized in self.deferred}):
+            for deserialized in self.deferred:
+                deserialized.save_deferred_fields(using=self.using)
+        models = list(self.stats) + list(self.m2m_rows)
+        with self.connection.cursor() as cursor:
+            for sql in self.connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+        self.connection.check_constraints(table_names=[model._meta.db_table for model in models])
+        return list(self.stats.values())
+
+
+class Command(BaseCommand):
+    help = (
+        'Loads fixtures created by autodump with bulk inserts. JSON fixtures are streamed, so their size is not '
+        'bound by memory. Directories load every fixture they contain.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('args', metavar='fixture', nargs='+', help='Fixture files or directories of fixtures.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help='Nominates a specific database to load fixtures into.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Number of rows inserted per query.')
+        parser.add_argument('-i', '--ignorenonexistent', action='store_true',
+                            help='Ignores entries in the fixtures for fields that do not exist on the model.')
+        parser.add_argument('--defer-signals', action='store_true',
+                            help='Mutes the model signals of the objects that cannot be bulk inserted and are saved '
+                                 'one by one.')
+        parser.add_argument('--history', action='store_true',
+                            help='Creates the initial history records of the loaded models afterwards.')
+
+    def handle(self, *fixtures, **options):
+        using = options['database']
+        paths = []
+        for fixture in fixtures:
+            if os.path.isdir(fixture):
+                paths.extend(sorted(os.path.join(fixture, name) for name in os.listdir(fixture)
+                                    if '.json' in name))
+            elif os.path.exists(fixture):
+                paths.append(fixture)
+            else:
+                raise CommandError(f"No fixture named '{fixture}' found.")
+
+        loader = BulkLoader(using=using, batch_size=options['batch_size'], defer_signals=options['defer_signals'])
+        started = time.perf_counter()
+        with transaction.atomic(using=using):
+            for path in paths:
+                with open_input(path) as stream:
+                    index = 0
+                    try:
+                        for deserialized in PythonDeserializer(
+                                iterate_json_array(stream), using=using,
+                                ignorenonexistent=options['ignorenonexistent'], handle_forward_references=True):
+                            loader.add(deserialized)
+                            index += 1
+                    except (DeserializationError, json.JSONDecodeError) as e:
+                        raise CommandError(f"Invalid object {index} in fixture '{path}': {e}") from e
+            all_stats = loader.finish()
+        seconds = time.perf_counter() - started
+        bump_generation(*(apps.get_model(stats.label) for stats in all_stats))
+
+        # Bulk inserts send no signals, so what their receivers maintain is caught up with afterwards
+        call_command('sync_stock_holders', verbosity=options['verbosity'], stdout=self.stdout)
+        call_command('backfill_price_history', verbosity=options['verbosity'], stdout=self.stdout)
+        call_command('rebuild_search_index', verbosity=options['verbosity'], stdout=self.stdout)
+        if options['history']:
+            labels = [stats.label for stats in all_stats if hasattr(apps.get_model(stats.label), 'history')]
+            if labels:
+                call_command('populate_history', *labels, verbosity=options['verbosity'], stdout=self.stdout)
+
+        if options['verbosity'] > 1:
+            for stats in all_stats:
+                self.stdout.write(str(stats))
+        if options['verbosity'] > 0:
+            total = ModelStats('Total', sum(stats.count for stats in all_stats), seconds)
+            self.stdout.write(f'{total} across {len(all_stats)} models from {len(paths)} fixtures')
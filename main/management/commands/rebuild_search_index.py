@@ -0,0 +1,11 @@
+from django.core.management import BaseCommand
+
+from inventory.services.search_service import SearchService
+
+
+class Command(BaseCommand):
+    help = 'Indexes every material, equipment item, customer and target for search from scratch'
+
+    def handle(self, **kwargs):
+        indexed = SearchService().rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} search documents'))
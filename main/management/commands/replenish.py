@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+
+from inventory.services.replenishment_service import ReplenishmentService
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Drafts purchase orders for the materials held below their minimum quantity'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Username recorded as the creator of the purchase orders')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be ordered')
+
+    def handle(self, **options):
+        user = User.objects.filter(username=options['user']).first()
+        if user is None:
+            raise CommandError(f'User {options["user"]} does not exist')
+        service = ReplenishmentService(user=user)
+        if options['dry_run']:
+            for holder_type, holder_id, material_id, quantity, minimum, maximum, suggested in service.get_shortages():
+                self.stdout.write(f'{holder_type} {holder_id}: material {material_id} at {quantity} of {minimum}, '
+                                  f'{suggested} units short of {max(maximum, minimum)}')
+            plan = service.plan()
+        else:
+            purchase_orders, plan = service.draft_purchase_orders()
+            self.stdout.write(self.style.SUCCESS(f'Drafted {len(purchase_orders)} purchase orders'))
+        for vendor_id, lines in plan.orders.items():
+            self.stdout.write(f'Vendor {vendor_id}: {len(lines)} materials, {sum(q for _, q in lines)} units')
+        for material_id, quantity in plan.unsourced.items():
+            self.stdout.write(self.style.WARNING(f'No available offer for material {material_id} ({quantity} units)'))
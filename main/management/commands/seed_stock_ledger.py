@@ -0,0 +1,11 @@
+from django.core.management import BaseCommand
+
+from inventory.services.stock_ledger_service import StockLedgerService
+
+
+class Command(BaseCommand):
+    help = 'Records the stock held in the legacy counters as opening adjustments of the stock ledger'
+
+    def handle(self, **kwargs):
+        recorded = StockLedgerService().seed_from_legacy_counters()
+        self.stdout.write(self.style.SUCCESS(f'Recorded {recorded} opening adjustments'))
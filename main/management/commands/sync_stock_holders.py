@@ -0,0 +1,11 @@
+from django.core.management import BaseCommand
+
+from inventory.models.stock_holder import StockHolder
+
+
+class Command(BaseCommand):
+    help = 'Creates the missing stock holders of storage locations, vehicles, technicians and job sites'
+
+    def handle(self, **kwargs):
+        created = StockHolder.objects.sync()
+        self.stdout.write(self.style.SUCCESS(f'Created {created} stock holders'))
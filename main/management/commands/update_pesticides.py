@@ -0,0 +1,44 @@
+import functools
+import logging
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from inventory.utils.epa_scraper import HttpScraper, MaterialUpdater, PesticideCache, SeleniumScraper
+from inventory.utils.epa_scraper.epa_scraper import SEARCH_URL
+
+
+class Command(BaseCommand):
+    help = 'Creates or updates the pesticides of a CSV of EPA registration numbers and names from the EPA PPLS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('filepath', help='CSV file of EPA registration numbers and material names.')
+        parser.add_argument('--workers', type=int, default=4, help='Number of sessions scraping at once.')
+        parser.add_argument('--backend', choices=['selenium', 'http'], default='selenium',
+                            help='Drives a browser through the pages, or fetches them over plain HTTP.')
+        parser.add_argument('--headless', action='store_true', help='Runs the browsers of the selenium backend '
+                                                                    'without a window.')
+        parser.add_argument('--search-url', default=SEARCH_URL, help='URL of the PPLS search page.')
+        parser.add_argument('--refresh', action='store_true',
+                            help='Scrapes every pesticide again, however recently it was cached.')
+        parser.add_argument('--no-cache', action='store_true', help='Neither reads nor writes the pesticide cache.')
+
+    def handle(self, *args, **options):
+        if options['verbosity'] > 1:
+            # Reports every material added or passed
+            logger = logging.getLogger('inventory.utils.epa_scraper')
+            logger.addHandler(logging.StreamHandler(self.stdout))
+            logger.setLevel(logging.INFO)
+        cache = None
+        if not options['no_cache']:
+            cache = PesticideCache(ttl=timedelta(0) if options['refresh'] else None)
+        if options['backend'] == 'selenium':
+            scraper_factory = functools.partial(
+                SeleniumScraper, search_url=options['search_url'], headless=options['headless'])
+        else:
+            scraper_factory = functools.partial(HttpScraper, search_url=options['search_url'])
+        updater = MaterialUpdater(workers=options['workers'], cache=cache, scraper_factory=scraper_factory)
+        materials, failed = updater.get_or_update_pesticides_and_targets_from_filepath(options['filepath'])
+        for epa_registration_number, name in failed:
+            self.stderr.write(f'Failed {epa_registration_number} {name}')
+        self.stdout.write(f'Updated {len(materials)} pesticides, {len(failed)} failed')
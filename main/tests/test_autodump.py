@@ -0,0 +1,80 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from common.models.task import Task
+from inventory.models.brand import Brand
+from main.management.commands.autodump import iterate_keyset
+from users.models import User
+
+
+class TestAutodump(TestCase):
+
+    def setUp(self):
+        Brand.objects.bulk_create(Brand(name=f'Brand {i}') for i in range(25))
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_keyset_iteration_fetches_one_query_per_chunk(self):
+        with self.assertNumQueries(3):
+            brands = list(iterate_keyset(Brand.objects.all(), chunk_size=10))
+        self.assertEqual(list(Brand.objects.order_by('pk')), brands)
+
+    def test_dump_to_compressed_file(self):
+        output = os.path.join(self.directory.name, 'db.json.gz')
+        stdout = StringIO()
+        call_command('autodump', 'inventory.Brand', output=output, chunk_size=7, stdout=stdout)
+        with gzip.open(output, 'rt') as stream:
+            self.assertEqual(25, len(json.load(stream)))
+        self.assertIn('Total: 25 rows', stdout.getvalue())
+
+    def test_split_writes_one_file_per_model(self):
+        stdout = StringIO()
+        call_command('autodump', 'inventory', 'common.UnitCategory', output=self.directory.name, split=True,
+                     verbosity=2, stdout=stdout)
+        self.assertEqual(['inventory.brand.json'], os.listdir(self.directory.name))
+        with open(os.path.join(self.directory.name, 'inventory.brand.json')) as stream:
+            self.assertEqual(25, len(json.load(stream)))
+        self.assertIn('inventory.Brand: 25 rows', stdout.getvalue())
+
+    def test_delta_applied_to_base_dump_matches_full_dump(self):
+        models = ('inventory.Brand', 'common.Task', 'users.User', 'users.HistoricalUser')
+        kept, removed = (User.objects.create_user(username=name) for name in ('kept', 'removed'))
+        task_type = ContentType.objects.get_for_model(Brand)
+        tasks = [Task.objects.create(title=f'Task {i}', start_date=timezone.now(), end_date=timezone.now(),
+                                     content_type=task_type, object_id=1) for i in range(3)]
+        base = os.path.join(self.directory.name, 'base.json')
+        checkpoint = os.path.join(self.directory.name, 'checkpoint.json')
+        call_command('autodump', *models, output=base, checkpoint=checkpoint, verbosity=0)
+
+        kept.first_name = 'Changed'
+        kept.save()
+        removed_pk = removed.pk
+        removed.delete()
+        User.objects.create_user(username='created')
+        tasks[0].delete()
+        tasks[1].title = 'Changed'
+        tasks[1].save()
+        Brand.objects.create(name='Created')
+        delta = os.path.join(self.directory.name, 'delta.json')
+        call_command('autodump', *models, output=delta, since=checkpoint, verbosity=0)
+        with open(delta) as stream:
+            entries = json.load(stream)
+        self.assertIn({'model': 'users.user', 'deleted': [removed_pk]}, entries)
+        self.assertEqual(['created', 'kept'], sorted(
+            entry['fields']['username'] for entry in entries if entry['model'] == 'users.user' and 'fields' in entry))
+        self.assertEqual(['Changed'], [
+            entry['fields']['title'] for entry in entries if entry['model'] == 'common.task' and 'fields' in entry])
+
+        applied, full = (os.path.join(self.directory.name, name) for name in ('applied.json', 'full.json'))
+        call_command('applydelta', base, delta, output=applied, stdout=StringIO())
+        call_command('autodump', *models, output=full, verbosity=0)
+        with open(applied) as applied_stream, open(full) as full_stream:
+            self.assertCountEqual(json.load(full_stream), json.load(applied_stream))
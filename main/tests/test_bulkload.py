@@ -0,0 +1,99 @@
+import io
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db.models.signals import post_save
+from django.test import TestCase
+
+from common.models.address import Address
+from common.models.contact import Contact
+from customers.models.customer import Customer, ServiceLocation
+from inventory.models.search import SearchDocument
+from inventory.models.stock_holder import StockHolder
+from main.management.commands.bulkload import deferred_signals, iterate_json_array
+
+
+class TestBulkload(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_json_array_is_parsed_incrementally(self):
+        items = [{'model': 'a', 'fields': {'text': 'x ' * 10, 'nested': [1, {'b': ']'}]}} for _ in range(20)]
+        stream = io.StringIO(json.dumps(items, indent=4))
+        self.assertEqual(items, list(iterate_json_array(stream, read_size=7)))
+        self.assertEqual([], list(iterate_json_array(io.StringIO(' [ ] '))))
+
+    def test_dump_and_load_round_trip(self):
+        customer = Customer.objects.create(customer_type=Customer.CustomerType.RESIDENTIAL, first_name='First',
+                                           last_name='Last')
+        contacts = [Contact.objects.create(first_name=f'Contact {i}', last_name='Last') for i in range(3)]
+        service_location = ServiceLocation.objects.create(customer=customer, name='Home', street_address='Street',
+                                                          city='City', state='State', postal_code='00000')
+        service_location.contacts.set(contacts)
+        output = os.path.join(self.directory.name, 'db.json.gz')
+        call_command('autodump', 'common.Address', 'common.Contact', 'customers.Customer',
+                     'customers.ServiceLocation', output=output, verbosity=0)
+        ServiceLocation.objects.all().delete()
+        Address.objects.all().delete()
+        Contact.objects.all().delete()
+        Customer.objects.all().delete()
+        StockHolder.objects.all().delete()
+
+        stdout = StringIO()
+        call_command('bulkload', output, batch_size=2, defer_signals=True, verbosity=2, stdout=stdout)
+        service_location = ServiceLocation.objects.get()
+        self.assertEqual('Home', service_location.name)
+        self.assertEqual(3, service_location.contacts.count())
+        self.assertEqual('First', Customer.objects.get().first_name)
+        self.assertTrue(StockHolder.objects.filter(job_site=service_location).exists())
+        self.assertIn('common.Contact: 3 rows', stdout.getvalue())
+        self.assertIn('Total: 6 rows', stdout.getvalue())
+
+    def test_plain_load_catches_up_with_the_receivers(self):
+        customer = Customer.objects.create(customer_type=Customer.CustomerType.RESIDENTIAL, first_name='First',
+                                           last_name='Last')
+        ServiceLocation.objects.create(customer=customer, name='Home', street_address='Street', city='City',
+                                       state='State', postal_code='00000')
+        output = os.path.join(self.directory.name, 'db.json')
+        call_command('autodump', 'common.Address', 'customers.Customer', 'customers.ServiceLocation', output=output,
+                     verbosity=0)
+        ServiceLocation.objects.all().delete()
+        Address.objects.all().delete()
+        Customer.objects.all().delete()
+        StockHolder.objects.all().delete()
+        SearchDocument.objects.all().delete()
+
+        call_command('bulkload', output, verbosity=0)
+        self.assertTrue(StockHolder.objects.filter(job_site=ServiceLocation.objects.get()).exists())
+        self.assertTrue(SearchDocument.objects.filter(document_type=SearchDocument.DocumentType.CUSTOMER,
+                                                      object_id=Customer.objects.get().pk).exists())
+
+    def test_malformed_objects_are_reported_with_their_fixture_and_index(self):
+        output = os.path.join(self.directory.name, 'contacts.json')
+        with open(output, 'w') as f:
+            json.dump([{'model': 'common.contact', 'pk': 1, 'fields': {'first_name': 'First', 'last_name': 'Last'}},
+                       {'model': 'common.contact', 'pk': 'not a pk', 'fields': {}}], f)
+
+        with self.assertRaisesMessage(CommandError, f"Invalid object 1 in fixture '{output}'"):
+            call_command('bulkload', output, verbosity=0)
+        self.assertFalse(Contact.objects.exists())
+
+    def test_deferred_signals_mute_only_the_given_models(self):
+        senders = []
+
+        def receiver(sender, **kwargs):
+            senders.append(sender)
+
+        post_save.connect(receiver)
+        self.addCleanup(post_save.disconnect, receiver)
+        with deferred_signals(Contact):
+            Contact.objects.create(first_name='Muted', last_name='Last')
+            Customer.objects.create(customer_type=Customer.CustomerType.RESIDENTIAL, first_name='First',
+                                    last_name='Last')
+        Contact.objects.create(first_name='Sent', last_name='Last')
+        self.assertEqual([Customer, Contact], senders)
@@ -0,0 +1,57 @@
+from django.test import SimpleTestCase, TestCase
+
+from inventory.tests.helpers import create_material, create_user
+from inventory.utils.telemetry import MetricsAggregator, RequestMetrics, aggregator
+
+
+class TestMetricsAggregator(SimpleTestCase):
+
+    def test_drops_requests_older_than_the_window(self):
+        metrics = MetricsAggregator(window=60, slice_seconds=10)
+        metrics.add(RequestMetrics(view='old', kind='page', latency_ms=30), now=0)
+        for latency in (3, 40, 40, 700):
+            metrics.add(RequestMetrics(view='new', kind='page', latency_ms=latency), now=55)
+
+        self.assertEqual(['old', 'new'], [view['view'] for view in metrics.snapshot(now=59)['views']][::-1])
+        [view] = metrics.snapshot(now=61)['views']
+        self.assertEqual('new', view['view'])
+        self.assertEqual(4, view['requests'])
+        self.assertEqual(50, view['latency_ms']['p50'])
+        self.assertEqual(700, view['latency_ms']['p99'])
+        self.assertEqual({'5': 1, '50': 2, '1000': 1}, {
+            bound: count for bound, count in view['latency_ms']['histogram'].items() if count})
+
+
+class TestTelemetryMiddleware(TestCase):
+
+    def setUp(self):
+        aggregator.clear()
+        for i in range(3):
+            create_material(f'Material {i}')
+        admin = create_user('admin')
+        admin.is_staff = admin.is_superuser = True
+        admin.save()
+        self.client.force_login(admin)
+
+    def test_records_pages_and_partials_per_view(self):
+        self.client.get('/materials/')
+        self.client.get('/materials/', HTTP_X_AXIOS_HEADER='1')
+        self.client.get('/materials/', HTTP_X_AXIOS_HEADER='1')
+
+        views = {(view['view'], view['kind']): view for view in self.client.get('/main/metrics').json()['views']}
+        page, partial = views['inventory:material_list', 'page'], views['inventory:material_list', 'partial']
+        self.assertEqual(1, page['requests'])
+        self.assertEqual(2, partial['requests'])
+        self.assertGreater(page['queries_mean'], 0)
+        self.assertGreater(page['template_ms_mean'], 0)
+        self.assertGreater(page['response_bytes_mean'], partial['response_bytes_mean'])
+
+    def test_metrics_are_not_served_to_remote_clients(self):
+        self.client.logout()
+        self.assertEqual(403, self.client.get('/main/metrics', REMOTE_ADDR='203.0.113.1').status_code)
+
+    def test_metrics_are_only_served_to_listed_internal_ips(self):
+        self.client.logout()
+        self.assertEqual(403, self.client.get('/main/metrics', REMOTE_ADDR='127.0.0.1').status_code)
+        with self.settings(INTERNAL_IPS=['127.0.0.1']):
+            self.assertEqual(200, self.client.get('/main/metrics', REMOTE_ADDR='127.0.0.1').status_code)
@@ -1,7 +1,8 @@
 from django.urls import path
 
-from main.views import success
+from main.views import metrics, success
 
 urlpatterns = [
     path('success', success, name='success'),
-]
\ No newline at end of file
+    path('metrics', metrics, name='metrics'),
+]
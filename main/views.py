@@ -1,6 +1,17 @@
-from django.http import HttpResponse
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse, JsonResponse
+
+from inventory.utils.telemetry import aggregator
 
 
 def success(request, *args, **kwargs):
     response = HttpResponse(headers={'response': 'success'}, )
     return response
+
+
+def metrics(request, *args, **kwargs):
+    """Returns the request metrics of the telemetry window to staff and to clients listed in INTERNAL_IPS."""
+    if request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS and not request.user.is_staff:
+        raise PermissionDenied
+    return JsonResponse(aggregator.snapshot())
@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+VERSION_KEY = 'permissions:version'
+PERMISSION_THROUGH_MODELS = {'users.user_groups', 'users.user_user_permissions', 'auth.group_permissions'}
+
+
+def get_cache():
+    return caches[settings.PERMISSION_CACHE]
+
+
+def get_permissions_key(user_pk) -> str:
+    return f'permissions:user:{user_pk}'
+
+
+def get_permissions_version() -> int:
+    cache = get_cache()
+    cache.add(VERSION_KEY, 0, None)
+    return cache.get(VERSION_KEY, 0)
+
+
+def invalidate_permissions(user_pk=None):
+    """Drops the cached permissions of a user, or those of every user when groups or permissions change."""
+    cache = get_cache()
+    if user_pk is not None:
+        cache.delete(get_permissions_key(user_pk))
+        return
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+class CachedPermissionBackend(ModelBackend):
+    """
+    Resolves the permissions of a user from their own and their groups' permissions once, then keeps the effective
+    sets in the permission cache until the user, a group or a permission changes. Every has_perm check of views, the
+    API and the admin reads them from there instead of querying on each request.
+    """
+
+    def _get_permissions(self, user_obj, obj, from_name):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        perm_cache_name = f'_{from_name}_perm_cache'
+        if not hasattr(user_obj, perm_cache_name):
+            setattr(user_obj, perm_cache_name, self.get_cached_permissions(user_obj)[from_name])
+        return getattr(user_obj, perm_cache_name)
+
+    def get_cached_permissions(self, user_obj) -> dict:
+        cache = get_cache()
+        key = get_permissions_key(user_obj.pk)
+        version = get_permissions_version()
+        cached = cache.get(key)
+        if cached is None or cached['version'] != version or cached['is_superuser'] != user_obj.is_superuser:
+            cached = {
+                'version': version,
+                'is_superuser': user_obj.is_superuser,
+                'user': super()._get_permissions(user_obj, None, 'user'),
+                'group': super()._get_permissions(user_obj, None, 'group'),
+            }
+            cache.set(key, cached)
+        return cached
+
+
+@receiver(post_save, sender='users.User')
+@receiver(post_delete, sender='users.User')
+@receiver(post_save, sender='users.HistoricalUser')
+def invalidate_user_permissions(sender, instance, **kwargs):
+    # Historical records keep the id of the user they record
+    invalidate_permissions(instance.id)
+
+
+@receiver(post_save, sender='auth.Group')
+@receiver(post_delete, sender='auth.Group')
+@receiver(post_save, sender='auth.Permission')
+@receiver(post_delete, sender='auth.Permission')
+def invalidate_all_permissions(sender, **kwargs):
+    invalidate_permissions()
+
+
+@receiver(m2m_changed)
+def invalidate_membership_permissions(sender, action, **kwargs):
+    """Invalidates every user when a user's groups or permissions, or a group's permissions, change."""
+    if action.startswith('post_') and sender._meta.label_lower in PERMISSION_THROUGH_MODELS:
+        invalidate_permissions()
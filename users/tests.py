@@ -1,3 +1,49 @@
+from django.contrib.auth.models import Group, Permission
 from django.test import TestCase
 
-# Create your tests here.
+from inventory.tests.helpers import create_material
+from users.backends import get_cache
+from users.models import User
+
+
+class TestCachedPermissionBackend(TestCase):
+
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user('viewer', password='viewer')
+        self.group = Group.objects.create(name='Technicians')
+        self.view_material = Permission.objects.get(codename='view_material')
+
+    def has_perm(self, perm: str) -> bool:
+        return User.objects.get(pk=self.user.pk).has_perm(perm)
+
+    def test_resolves_permissions_once(self):
+        self.assertFalse(self.has_perm('inventory.view_material'))
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertFalse(user.has_perm('inventory.view_material'))
+            self.assertEqual(set(), user.get_all_permissions())
+
+    def test_group_and_permission_changes_invalidate(self):
+        self.has_perm('inventory.view_material')
+        self.user.groups.add(self.group)
+        self.assertFalse(self.has_perm('inventory.view_material'))
+        self.group.permissions.add(self.view_material)
+        self.assertTrue(self.has_perm('inventory.view_material'))
+        self.group.permissions.remove(self.view_material)
+        self.assertFalse(self.has_perm('inventory.view_material'))
+        self.user.user_permissions.add(self.view_material)
+        self.assertTrue(self.has_perm('inventory.view_material'))
+
+        self.user.is_superuser = True
+        self.user.save()
+        self.assertTrue(self.has_perm('inventory.change_material'))
+
+    def test_views_check_the_model_permissions(self):
+        material = create_material()
+        self.client.force_login(self.user)
+        self.assertEqual(403, self.client.get(f'/materials/{material.pk}').status_code)
+
+        self.user.user_permissions.add(self.view_material)
+        self.assertEqual(200, self.client.get(f'/materials/{material.pk}').status_code)
+        self.assertEqual(403, self.client.get(f'/materials/{material.pk}/update').status_code)